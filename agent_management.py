@@ -64,6 +64,7 @@ def get_all_tools(allowed_tools: list[str], user_name: str) -> list[BaseTool]:
         - The function logs information about loaded and excluded tools
     """
     tools = []
+    loaded_names = set()  # a tool imported by another tools module is met twice: register it once
     try:
         # Try to add the current directory to sys.path if it's not already there
         import sys
@@ -83,6 +84,8 @@ def get_all_tools(allowed_tools: list[str], user_name: str) -> list[BaseTool]:
                         continue
 
                     if isinstance(obj, BaseTool):
+                        if obj.name in loaded_names:
+                            continue
                         if allowed_tools is None or name in allowed_tools:
                             if obj.name == 'standard_search_tool':
                                 continue # Skip standard_search_tool as it's not working due to DuckDuckGo Rate Limit
@@ -90,11 +93,13 @@ def get_all_tools(allowed_tools: list[str], user_name: str) -> list[BaseTool]:
                             if obj.name == 'video_tool':
                                 if user_name == 'jerome':
                                     tools.append(obj)
+                                    loaded_names.add(obj.name)
                                     logger.info(f"Loaded tool: {name} from module {module_name} - allowed for user {user_name}")
                                 else:
                                     logger.warning(f"Tool excluded: {obj.name} for user {user_name}")
                             else:
                                 tools.append(obj)
+                                loaded_names.add(obj.name)
                                 logger.info(f"Loaded tool: {name} from module {module_name} - allowed for user {user_name}")
                         else:
                             logger.info(f"Tool {name} from module {module_name} is not allowed and will not be loaded.")
@@ -0,0 +1,194 @@
+# agents/research_planner.py
+import os
+import re
+import time
+import asyncio
+import logging
+
+from pydantic import BaseModel, Field
+
+from models.models import get_google_model
+from tools.research_tools import google_search_tool, advanced_research_tool, fetch_and_remember, focus_page_content
+from utils import load_prompt
+
+logger = logging.getLogger(__name__)
+
+RESEARCH_MAX_SUB_QUERIES = int(os.getenv("RESEARCH_MAX_SUB_QUERIES", 4))
+RESEARCH_MAX_CONCURRENCY = int(os.getenv("RESEARCH_MAX_CONCURRENCY", 6))  # global limit on in-flight searches/fetches
+RESEARCH_RESULTS_PER_QUERY = 5
+RESEARCH_PAGES_PER_QUERY = int(os.getenv("RESEARCH_PAGES_PER_QUERY", 2))
+RESEARCH_STEP_TIMEOUT = int(os.getenv("RESEARCH_STEP_TIMEOUT", 45))  # seconds per search, answer or page
+
+
+class ResearchPlan(BaseModel):
+    """Independent web search queries that together cover a research question."""
+    sub_queries: list[str] = Field(description="Short, independent web search queries, in the language of the question")
+
+
+class Evidence:
+    def __init__(self, source: str, content: str, title: str = "", kind: str = "search"):
+        self.source = source
+        self.content = content
+        self.title = title
+        self.kind = kind
+
+
+class EvidenceCollector:
+    """
+    Merges the evidence returned by concurrent searches, dropping duplicates.
+
+    Sources are deduplicated per kind (a URL seen in several searches is kept once),
+    identical texts are deduplicated across sources, and page URLs are claimed before
+    being fetched so that the same page is never downloaded twice.
+    """
+
+    def __init__(self):
+        self.items: list[Evidence] = []
+        self.seen_sources: set[tuple[str, str]] = set()
+        self.seen_texts: set[str] = set()
+        self.claimed_urls: set[str] = set()
+
+    def add(self, source: str, content: str, title: str = "", kind: str = "search") -> bool:
+        normalized_text = re.sub(r"\s+", " ", content).strip().lower()
+        if not normalized_text or (kind, source) in self.seen_sources or normalized_text in self.seen_texts:
+            return False
+        self.seen_sources.add((kind, source))
+        self.seen_texts.add(normalized_text)
+        self.items.append(Evidence(source=source, content=content, title=title, kind=kind))
+        return True
+
+    def claim_url(self, url: str) -> bool:
+        if url in self.claimed_urls:
+            return False
+        self.claimed_urls.add(url)
+        return True
+
+
+async def plan_research(question: str, model) -> list[str]:
+    """
+    Decomposes a research question into independent sub-queries with a single LLM call.
+
+    Args:
+        question (str): The research question.
+        model: The chat model used for planning.
+
+    Returns:
+        list[str]: Up to RESEARCH_MAX_SUB_QUERIES unique sub-queries (the question itself if planning yields none).
+    """
+    prompt = load_prompt("research_planner", question=question, max_sub_queries=RESEARCH_MAX_SUB_QUERIES)
+    plan = await model.with_structured_output(ResearchPlan).ainvoke(prompt)
+
+    sub_queries = []
+    for sub_query in (plan.sub_queries if plan else []):
+        sub_query = sub_query.strip()
+        if sub_query and sub_query.lower() not in (q.lower() for q in sub_queries):
+            sub_queries.append(sub_query)
+
+    return sub_queries[:RESEARCH_MAX_SUB_QUERIES] or [question]
+
+
+async def search_web(query: str) -> dict:
+    return await google_search_tool.ainvoke({"query": query, "max_results": RESEARCH_RESULTS_PER_QUERY})
+
+
+async def ask_perplexity(query: str) -> str:
+    return await advanced_research_tool.ainvoke({"query": query, "max_results": RESEARCH_RESULTS_PER_QUERY})
+
+
+async def read_page(url: str, query: str) -> str:
+    return focus_page_content(await asyncio.to_thread(fetch_and_remember, url), query)
+
+
+async def gather_evidence(sub_queries: list[str]) -> list[Evidence]:
+    """
+    Runs the searches, Perplexity answers and page reads of all sub-queries concurrently.
+
+    Every network call goes through one semaphore (RESEARCH_MAX_CONCURRENCY) and its own
+    timeout. Page reads of a sub-query start as soon as its search results arrive, and a
+    failing call only loses its own piece of evidence.
+
+    Args:
+        sub_queries (list[str]): The planned sub-queries.
+
+    Returns:
+        list[Evidence]: The deduplicated evidence.
+    """
+    semaphore = asyncio.Semaphore(RESEARCH_MAX_CONCURRENCY)
+    collector = EvidenceCollector()
+
+    async def limited(coroutine_function, *args):
+        async with semaphore:
+            return await asyncio.wait_for(coroutine_function(*args), timeout=RESEARCH_STEP_TIMEOUT)
+
+    async def search_and_read(query: str):
+        results = await limited(search_web, query)
+        organic = results.get("organic", []) if isinstance(results, dict) else []
+        for result in organic:
+            if result.get("link") and result.get("snippet"):
+                collector.add(result["link"], f"{result.get('title', '')}\n{result['snippet']}", title=result.get("title", ""), kind="search")
+
+        urls = [result["link"] for result in organic if result.get("link") and collector.claim_url(result["link"])]
+        urls = urls[:RESEARCH_PAGES_PER_QUERY]
+        pages = await asyncio.gather(*(limited(read_page, url, query) for url in urls), return_exceptions=True)
+        for url, page in zip(urls, pages):
+            if isinstance(page, str) and not page.startswith(("Error fetching URL", "Error processing URL")):
+                collector.add(url, page, kind="page")
+            else:
+                logger.warning(f"Research pipeline could not read {url}: {page}")
+
+    async def answer(query: str):
+        response = await limited(ask_perplexity, query)
+        if isinstance(response, str) and not response.startswith("Perplexity AI error"):
+            collector.add(f"perplexity:{query}", response, title=query, kind="answer")
+
+    tasks = [search_and_read(query) for query in sub_queries] + [answer(query) for query in sub_queries]
+    for outcome in await asyncio.gather(*tasks, return_exceptions=True):
+        if isinstance(outcome, BaseException):
+            logger.warning(f"Research pipeline step failed: {type(outcome).__name__}: {outcome}")
+
+    return collector.items
+
+
+def format_evidence(evidence: list[Evidence]) -> str:
+    sections = []
+    for i, item in enumerate(evidence, 1):
+        title = f"{item.title} - " if item.title else ""
+        sections.append(f"[{i}] ({item.kind}) {title}{item.source}\n{item.content}")
+    return "\n\n".join(sections)
+
+
+async def run_research_pipeline(question: str) -> str:
+    """
+    Answers a research question with one planning call, concurrent evidence gathering
+    and one synthesis call, instead of a sequential ReAct tool loop.
+
+    Args:
+        question (str): The research question.
+
+    Returns:
+        str: The synthesized answer with citations.
+
+    Raises:
+        RuntimeError: If no evidence could be gathered (callers fall back to the research agent).
+    """
+    model = get_google_model(streaming=False)
+
+    start = time.perf_counter()
+    sub_queries = await plan_research(question, model)
+    planned = time.perf_counter()
+
+    evidence = await gather_evidence(sub_queries)
+    gathered = time.perf_counter()
+    if not evidence:
+        raise RuntimeError("no evidence gathered")
+
+    response = await model.ainvoke(load_prompt("research_synthesis", question=question, evidence=format_evidence(evidence)))
+    done = time.perf_counter()
+
+    logger.info(
+        f"Research pipeline: {len(sub_queries)} sub-queries, {len(evidence)} evidence items, "
+        f"plan {planned - start:.2f}s, gather {gathered - planned:.2f}s, synthesis {done - gathered:.2f}s"
+    )
+
+    content = response.content
+    return "\n".join(content) if isinstance(content, list) else content
@@ -11,7 +11,7 @@ import chainlit as cl
 from chainlit.cli import run_chainlit
 
 # Import the other modules
-from chainlit_setup import start, on_chat_resume
+from chainlit_setup import start, on_chat_resume, start_worker_pools, close_clients
 from audio_processing import on_audio_start, on_audio_chunk, on_audio_end
 from message_processing import on_message
 from users import *
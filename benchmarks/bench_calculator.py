@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark for calculator_tool latency.
+
+Replays the expressions used by tests/test_math_tools.py and compares:
+  - legacy: in-process evaluation, namespace and parse_expr globals rebuilt on every call
+  - inline: in-process evaluation with the prebuilt namespace and globals
+  - pool:   calculator_tool with the result cache cleared before every call (worker process round trip)
+  - warm:   calculator_tool with the LRU result cache
+and the bare dispatch overhead of the worker pool (a no-op job).
+
+Usage:
+    python benchmarks/bench_calculator.py
+"""
+
+import os
+import re
+import sys
+import time
+import asyncio
+import logging
+import statistics
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sympy.parsing.sympy_parser import parse_expr
+
+from tools.math_tools import (
+    _build_namespace, evaluate_expression, calculator_tool, calculator_cache, calculator_pool, CALCULATOR_TRANSFORMATIONS
+)
+import tools.math_tools as math_tools
+
+ROUNDS = 20
+
+
+def load_expressions() -> list[str]:
+    test_file = os.path.join(os.path.dirname(__file__), '..', 'tests', 'test_math_tools.py')
+    with open(test_file, encoding='utf-8') as f:
+        return re.findall(r'ainvoke\("(.*?)"\)', f.read())
+
+
+def legacy_parse(expression: str):
+    return parse_expr(expression, local_dict=_build_namespace(), transformations=CALCULATOR_TRANSFORMATIONS, evaluate=True)
+
+
+def time_inline(expressions: list[str]) -> list[float]:
+    timings = []
+    for _ in range(ROUNDS):
+        for expression in expressions:
+            start = time.perf_counter()
+            evaluate_expression(expression)
+            timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+async def time_calls(expressions: list[str], use_cache: bool) -> list[float]:
+    timings = []
+    for _ in range(ROUNDS):
+        for expression in expressions:
+            if not use_cache:
+                calculator_cache.entries.clear()
+            start = time.perf_counter()
+            await calculator_tool.ainvoke(expression)
+            timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def time_dispatch() -> list[float]:
+    timings = []
+    for _ in range(ROUNDS * 10):
+        start = time.perf_counter()
+        calculator_pool.run(abs, -1)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def summarize(name: str, timings: list[float]):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{name:<9} median {statistics.median(timings):8.3f} ms   p95 {p95:8.3f} ms")
+
+
+def main():
+    logging.disable(logging.CRITICAL)
+    # The error-handling cases of the tests are left out (workers log every failed calculation)
+    expressions = [expression for expression in load_expressions()
+                   if not evaluate_expression(expression).startswith(("Error", "An unexpected error occurred"))]
+    print(f"{len(expressions)} expressions x {ROUNDS} rounds")
+
+    original_parse = math_tools.parse_calculator_expression
+    math_tools.parse_calculator_expression = legacy_parse
+    try:
+        summarize("legacy", time_inline(expressions))
+    finally:
+        math_tools.parse_calculator_expression = original_parse
+    summarize("inline", time_inline(expressions))
+
+    calculator_pool.start()
+    calculator_pool.run(abs, 0)  # wait until the workers have imported sympy
+    summarize("dispatch", time_dispatch())
+    summarize("pool", asyncio.run(time_calls(expressions, use_cache=False)))
+    summarize("warm", asyncio.run(time_calls(expressions, use_cache=True)))
+    print(f"Cache: {calculator_cache.stats()}")
+    calculator_pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
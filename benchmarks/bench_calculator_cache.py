@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the persistent canonical-form calculator cache.
+
+Evaluates expensive symbolic requests once (cold, computed and stored), then again in
+another surface form that has the same canonical key (served from the SQLite cache, as
+another user or worker would see it).
+
+Usage:
+    python benchmarks/bench_calculator_cache.py
+"""
+
+import os
+import sys
+import time
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import tools.math_tools as math_tools
+from tools.math_cache import PersistentResultCache
+
+# (first form, equivalent form asked later)
+CASES = [
+    ("integrate(x**5*exp(x)*sin(x), x)", "integrate(x^5 * sin(x) * exp(x), x)"),
+    ("integrate(1/(x**4 + 1), x)", "integrate(1/(1 + x**4), x)"),
+    ("solve(x**4 - 3*x**2 + 1, x)", "solve(x^4 + 1 - 3x^2, x)"),
+    ("limit((1 + 1/x)**(2*x), x, oo)", "limit((1 + 1/x)^(x + x), x, oo)"),
+    ("simplify((x**3 + x**2 - x - 1)/(x**2 + 2*x + 1))", "simplify((x^3 + x^2 - x - 1)/(x^2 + 2x + 1))"),
+    ("factor(x**8 - 1)", "factor(-1 + x**8)"),
+]
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        math_tools.persistent_cache = PersistentResultCache(os.path.join(directory, "cache.sqlite3"), version="bench")
+        print(f"{'expression':<52} {'cold ms':>9} {'equivalent ms':>14} {'same':>5}")
+        for first, equivalent in CASES:
+            start = time.perf_counter()
+            first_result = math_tools.evaluate_cached(first)
+            cold = time.perf_counter() - start
+
+            start = time.perf_counter()
+            second_result = math_tools.evaluate_cached(equivalent)
+            warm = time.perf_counter() - start
+
+            print(f"{first:<52} {cold * 1000:>9.1f} {warm * 1000:>14.2f} {str(first_result == second_result):>5}")
+        print(f"Cache: {math_tools.persistent_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Benchmark for calculator_grid_tool against one calculator evaluation per point.
+
+Tabulates a few expressions over x = 0..1000 (1001 points), once by evaluating every
+point with evaluate_expression (what the LLM does today with one calculator_tool call
+per point, LLM round trips not included) and once with a single vectorized evaluate_grid.
+
+Usage:
+    python benchmarks/bench_calculator_grid.py
+"""
+
+import os
+import sys
+import time
+import logging
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tools.math_tools import evaluate_expression, evaluate_grid
+
+CASES = [
+    "x**2 + 3*x - 7",
+    "sin(x) * exp(-x/100)",
+    "sqrt(x) + log(x + 1)",
+    "exp(x)",  # overflows float64 above x = 709: mpmath fallback
+]
+RANGE = "0:1000"
+
+
+def main():
+    logging.disable(logging.CRITICAL)
+    print(f"x = {RANGE} (1001 points)")
+    print(f"{'expression':<24} {'per point s':>11} {'grid ms':>8} {'speedup':>8}")
+
+    for expression in CASES:
+        start = time.perf_counter()
+        for x in range(0, 1001):
+            evaluate_expression(f"({expression}).subs(x, {x})")
+        per_point = time.perf_counter() - start
+
+        start = time.perf_counter()
+        evaluate_grid(expression, {"x": RANGE}, "csv")
+        grid = time.perf_counter() - start
+
+        print(f"{expression:<24} {per_point:>11.2f} {grid * 1000:>8.1f} {per_point / grid:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
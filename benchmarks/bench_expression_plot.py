@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark for expression plotting against the data-as-text path of plot_tool.
+
+Before expressions were supported, the LLM had to write the points of a curve as a CSV
+table in its tool call, which plot_tool then parsed and drew with seaborn. This script
+measures, for a few functions:
+
+- data-as-text: parsing + drawing + PNG encoding of a CSV of N points (N = 200, what a
+  model typically writes; poles and steps are not resolved at that density), and the
+  size of that CSV in tokens;
+- expressions: sampling (lambdify + adaptive refinement) + drawing + PNG encoding.
+
+The time the LLM spends generating the CSV cannot be measured offline: it is estimated
+from the token count with an assumed output rate (--tokens-per-second, 50 by default).
+Tokens are counted with tiktoken when its encoding is available, otherwise estimated as
+characters / 4.
+
+Usage:
+    python benchmarks/bench_expression_plot.py [--tokens-per-second 50] [--repeat 3]
+"""
+
+import os
+import io
+import sys
+import time
+import logging
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+from tools.plotting import generate_plot, generate_expression_plot, sample_expression
+
+CASES = [
+    ("sin(x)", "-2*pi:2*pi", lambda x: np.sin(x)),
+    ("x**3 - 2*x", "-3:3", lambda x: x ** 3 - 2 * x),
+    ("tan(x)", "-2*pi:2*pi", lambda x: np.tan(x)),
+    ("exp(-x**2)*cos(5*x)", "-3:3", lambda x: np.exp(-x ** 2) * np.cos(5 * x)),
+]
+CSV_POINTS = 200
+
+
+def count_tokens(text: str) -> tuple[int, str]:
+    try:
+        import tiktoken
+        return len(tiktoken.get_encoding("cl100k_base").encode(text)), "tiktoken"
+    except Exception:
+        return len(text) // 4, "chars/4"
+
+
+def best_time(function, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def render_csv(csv: str):
+    plot = generate_plot(csv, "line", "f", "x", "y")
+    buf = io.BytesIO()
+    plot.savefig(buf, format='png')
+    plt.close()
+
+
+def render_expression(expression: str, x_range: str):
+    figure = generate_expression_plot([expression], x_range, "f", "x", "y")
+    figure.savefig(io.BytesIO(), format='png')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens-per-second", type=float, default=50.0, help="assumed LLM output rate")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    # Warm up imports, fonts and the seaborn theme
+    render_csv("x,y\n0,0\n1,1")
+    render_expression("x", "0:1")
+
+    print(f"data-as-text: {CSV_POINTS} points per CSV, LLM time assumed at {args.tokens_per_second:g} tokens/s")
+    print(f"{'expression':<22} {'csv tok':>7} {'llm s*':>7} {'csv ms':>7} {'total s':>8} "
+          f"{'expr tok':>8} {'samples':>8} {'expr ms':>8} {'total s':>8} {'speedup':>8}")
+
+    for expression, x_range, function in CASES:
+        low, high = {"-2*pi:2*pi": (-2 * np.pi, 2 * np.pi), "-3:3": (-3, 3)}[x_range]
+        x = np.linspace(low, high, CSV_POINTS)
+        csv = "x,y\n" + "\n".join(f"{a:.4f},{b:.4f}" for a, b in zip(x, function(x)))
+        csv_tokens, tokenizer = count_tokens(csv)
+        expression_tokens, _ = count_tokens(f'["{expression}"] "{x_range}"')
+
+        csv_seconds = best_time(lambda: render_csv(csv), args.repeat)
+        expression_seconds = best_time(lambda: render_expression(expression, x_range), args.repeat)
+        samples = len(sample_expression(expression, low, high)[0])
+
+        csv_total = csv_tokens / args.tokens_per_second + csv_seconds
+        expression_total = expression_tokens / args.tokens_per_second + expression_seconds
+        print(f"{expression:<22} {csv_tokens:>7} {csv_tokens / args.tokens_per_second:>7.1f} {csv_seconds * 1000:>7.0f} "
+              f"{csv_total:>8.2f} {expression_tokens:>8} {samples:>8} {expression_seconds * 1000:>8.0f} "
+              f"{expression_total:>8.2f} {csv_total / expression_total:>7.1f}x")
+
+    print(f"* estimated, not measured (tokens counted with {tokenizer})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the numeric fast path of calculator_tool (tools/fast_math.py).
+
+For a corpus of typical calculator requests, measures the SymPy evaluation
+(evaluate_expression, in-process) and the fast path, checks that both give the same
+answer, and reports how much of the corpus the fast path handles.
+
+Usage:
+    python benchmarks/bench_fast_math.py
+"""
+
+import os
+import sys
+import time
+import logging
+import statistics
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tools.fast_math import fast_evaluate
+from tools.math_tools import evaluate_expression
+
+REPEATS = 20
+
+# Mostly plain arithmetic (totals, percentages, unit conversions, compound interest),
+# a few real functions, and the symbolic requests that must go to SymPy.
+CORPUS = [
+    "12.5*3 + 4^2", "1 + 2 * 3 / 4", "(17 + 23) * 4", "1999 * 0.8", "250 * 1.2 - 15",
+    "100 * 1.05^10", "1500 / 12", "3.5 * 60", "72 * 1.60934",
+    "(98.6 - 32) * 5/9", "5000 * (1 + 0.04/12)^(12*5)", "2^32", "2**64 - 1", "1/3 + 1/6",
+    "0.1 + 0.2", "19.99 * 3 * 1.2", "45 / 100 * 360", "1024 * 1024 * 8", "7 % 3",
+    "365 * 24 * 60 * 60", "3.14159 * 2.5^2", "1e6 / 7", "(120 - 80) / 80 * 100", "12 // 5",
+    "sqrt(144)", "sqrt(2)", "2 * pi * 6371", "exp(1)", "log(1000, 10)",
+    "log(2)", "sin(1.2) + cos(0.3)", "atan(1) * 4", "100 * exp(-0.5 * 3)", "pi * 10^2",
+    "sin(pi/6)", "solve(x**2 - 4, x)", "diff(x**3, x)", "integrate(sin(x), x)", "factor(x**2 - 1)",
+    "2x + 3", "factorial(10)", "N(pi, 30)", "isprime(97)", "Matrix([[1, 2], [3, 4]]).det()",
+]
+
+
+def median_ms(function, expression: str) -> float:
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        function(expression)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    logging.disable(logging.CRITICAL)
+    handled, mismatches = 0, []
+    sympy_total = fast_total = 0.0
+
+    for expression in CORPUS:
+        sympy_result = evaluate_expression(expression)
+        fast_result = fast_evaluate(expression)
+        sympy_ms = median_ms(evaluate_expression, expression)
+        fast_ms = median_ms(fast_evaluate, expression)
+
+        sympy_total += sympy_ms
+        if fast_result is None:
+            fast_total += fast_ms + sympy_ms  # failed fast attempt, then SymPy
+        else:
+            handled += 1
+            fast_total += fast_ms
+            if fast_result != sympy_result:
+                mismatches.append((expression, fast_result, sympy_result))
+
+    print(f"{len(CORPUS)} expressions, {handled} handled by the fast path ({handled / len(CORPUS):.0%})")
+    print(f"Mean latency, SymPy only:       {sympy_total / len(CORPUS):.3f} ms")
+    print(f"Mean latency, fast path first:  {fast_total / len(CORPUS):.3f} ms")
+
+    fast_only = [median_ms(fast_evaluate, e) for e in CORPUS if fast_evaluate(e) is not None]
+    sympy_only = [median_ms(evaluate_expression, e) for e in CORPUS if fast_evaluate(e) is not None]
+    print(f"Handled expressions: SymPy median {statistics.median(sympy_only):.3f} ms, fast median {statistics.median(fast_only):.4f} ms")
+
+    print(f"Mismatches: {len(mismatches)}")
+    for expression, fast_result, sympy_result in mismatches:
+        print(f"  {expression!r}: fast {fast_result!r} vs SymPy {sympy_result!r}")
+
+
+if __name__ == "__main__":
+    main()
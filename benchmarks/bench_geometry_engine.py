@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the geometry scene engine against the former per-shape approach, on random
+scenes of squares and circles (as in tests/test_geometry_engine.py).
+
+For each scene size:
+- build: one Shapely object per shape in a Python loop, vs one vectorized call per kind;
+- pairs: intersecting pairs, their overlap areas, containment and each shape's nearest distance, comparing
+  every pair of shapes in Python, vs STRtree queries and vectorized operations;
+- render: one plot/fill call per shape, vs one collection per kind (draw + PNG encoding).
+
+The pairwise loop is quadratic: above LOOP_LIMIT shapes it is not run.
+
+Usage:
+    python benchmarks/bench_geometry_engine.py [--sizes 250 1000 4000]
+"""
+
+import os
+import sys
+import time
+import argparse
+import itertools
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from matplotlib.figure import Figure
+from shapely.geometry import Point, Polygon
+
+from tools.geometry_engine import GeometryScene, draw_scene
+
+LOOP_LIMIT = 1000
+CORNERS = np.array([(-1, -1), (1, -1), (1, 1), (-1, 1)])
+
+
+def random_shapes(count: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    centers = rng.uniform(0, 1000, (count, 2))
+    sizes = rng.uniform(1, 15, count)
+    kinds = np.where(np.arange(count) % 2 == 0, "polygon", "circle")
+    coordinates = [center + CORNERS * size if kind == "polygon" else center[None, :]
+                   for kind, center, size in zip(kinds, centers, sizes)]
+    return kinds, coordinates, sizes
+
+
+def legacy_build(kinds, coordinates, sizes) -> list:
+    return [Polygon(rows) if kind == "polygon" else Point(rows[0]).buffer(size)
+            for kind, rows, size in zip(kinds, coordinates, sizes)]
+
+
+def legacy_pairs(geometries: list):
+    overlaps, containments = {}, []
+    for (i, first), (j, second) in itertools.combinations(enumerate(geometries), 2):
+        if first.intersects(second):
+            overlaps[i, j] = first.intersection(second).area
+            containments += [(i, j)] * first.contains(second) + [(j, i)] * second.contains(first)
+    nearest = [min(first.distance(second) for j, second in enumerate(geometries) if j != i)
+               for i, first in enumerate(geometries)]
+    return overlaps, containments, nearest
+
+
+def legacy_render(kinds, geometries: list):
+    figure = Figure()
+    ax = figure.add_subplot()
+    ax.set_aspect('equal')
+    for kind, geometry in zip(kinds, geometries):
+        x, y = geometry.exterior.xy
+        if kind == "polygon":
+            ax.fill(x, y, alpha=0.5, fc='green', ec='black')
+        else:
+            ax.plot(x, y, color='purple')
+    figure.savefig(os.devnull, format="png")
+
+
+def engine_pairs(scene: GeometryScene):
+    scene.intersections()
+    scene.containments()
+    scene.nearest()
+
+
+def engine_render(scene: GeometryScene):
+    figure = Figure()
+    draw_scene(figure.add_subplot(), scene)
+    figure.savefig(os.devnull, format="png")
+
+
+def timed(function, *args) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[250, 1000, 4000])
+    args = parser.parse_args()
+
+    print(f"{'shapes':>7} {'step':<7} {'per-shape loop':>15} {'engine':>10} {'speedup':>8}")
+    for size in args.sizes:
+        kinds, coordinates, sizes = random_shapes(size)
+        counts = [len(rows) for rows in coordinates]
+        stacked = np.concatenate(coordinates)
+
+        legacy_time, geometries = timed(legacy_build, kinds, coordinates, sizes)
+        engine_time, scene = timed(GeometryScene.from_arrays, kinds, stacked, counts, sizes)
+        rows = [("build", legacy_time, engine_time)]
+
+        engine_time, _ = timed(engine_pairs, scene)
+        legacy_time = timed(legacy_pairs, geometries)[0] if size <= LOOP_LIMIT else None
+        rows.append(("pairs", legacy_time, engine_time))
+
+        rows.append(("render", timed(legacy_render, kinds, geometries)[0], timed(engine_render, scene)[0]))
+        for step, legacy_time, engine_time in rows:
+            legacy = f"{legacy_time * 1000:>13.1f}ms" if legacy_time is not None else f"{'(skipped)':>15}"
+            speedup = f"{legacy_time / engine_time:>7.1f}x" if legacy_time is not None else f"{'':>8}"
+            print(f"{size:>7} {step:<7} {legacy} {engine_time * 1000:>8.1f}ms {speedup}")
+        print(f"{'':>7} {len(scene.intersections()[0])} intersecting pairs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the geometry grammar fast path: descriptions parsed without the LLM, and the
+time this saves in parse_geometry_description.
+
+DESCRIPTIONS mixes common phrasings with explicit coordinates (English, French, Spanish,
+German) and descriptions only the LLM can parse. Each is parsed once (no cache hits),
+with and without the grammar. With GOOGLE_API_KEY set the LLM is called live, otherwise
+it is simulated as in bench_geometry_pipeline.py (LLM_LATENCY seconds per call).
+
+Usage:
+    python benchmarks/bench_geometry_grammar.py
+"""
+
+import os
+import sys
+import time
+import asyncio
+import logging
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import tools.geometry_tool as geometry
+from tools.geometry_grammar import parse_geometry_grammar
+from models.models import get_google_model
+from bench_geometry_pipeline import SimulatedModel, LLM_LATENCY, TIME_SCALE
+
+DESCRIPTIONS = [
+    "a point at 10, 20",
+    "a line from 0,0 to 5,5",
+    "a circle with center 2,2 and radius 3",
+    "a square polygon with corners at (0,0), (1,0), (1,1), (0,1)",
+    "a triangle with vertices 0,0 4,0 and 2,3",
+    "a rectangle from 0,0 to 4,2 and a circle at 2,1 with radius 1",
+    "what is the area of a circle at the origin with radius 2?",
+    "un point en (3; 4)",
+    "un cercle de centre (2; 3) et de rayon 1,5",
+    "un triángulo con vértices (0,0), (4,0) y (2,3)",
+    "una línea desde 1,1 hasta 4,5",
+    "Kreis mit Mittelpunkt (1 2) und Durchmesser 4",
+    "Zeichne ein Rechteck von (0, 0) bis (4, 2)",
+    # Left to the LLM
+    "a square of side 4 at the origin and a circle of radius 1 at its center",
+    "a regular hexagon of radius 2",
+    "an equilateral triangle with side 3",
+    "a circle of radius 3 tangent to the line y=5",
+    "the unit square",
+]
+
+
+async def run(descriptions: list[str]) -> float:
+    start = time.perf_counter()
+    for description in descriptions:
+        await geometry.parse_geometry_description(description)
+    return time.perf_counter() - start
+
+
+async def main():
+    logging.disable(logging.CRITICAL)
+    live = bool(os.getenv("GOOGLE_API_KEY"))
+    model = get_google_model(streaming=False) if live else SimulatedModel()
+    scale = 1 if live else 1 / TIME_SCALE
+    geometry.get_geometry_model = lambda: model
+    print(f"{'live Gemini' if live else f'simulated LLM, {LLM_LATENCY}s per call'}; {len(DESCRIPTIONS)} descriptions")
+
+    start = time.perf_counter()
+    repeats = 1000
+    for _ in range(repeats):
+        hits = sum(parse_geometry_grammar(description) is not None for description in DESCRIPTIONS)
+    per_description = (time.perf_counter() - start) / repeats / len(DESCRIPTIONS)
+    print(f"grammar: {hits}/{len(DESCRIPTIONS)} parsed, {per_description * 1e6:.0f}us per description")
+
+    grammar = geometry.parse_geometry_grammar
+    geometry.parse_geometry_grammar = lambda description: None
+    geometry.geometry_cache = geometry.ResultCache(max_size=64)
+    llm_only = await run(DESCRIPTIONS) * scale
+
+    geometry.parse_geometry_grammar = grammar
+    geometry.geometry_cache = geometry.ResultCache(max_size=64)
+    geometry.grammar_stats = geometry.GrammarStats()
+    with_grammar = await run(DESCRIPTIONS)
+    stats = geometry.grammar_stats.stats()
+    print(f"{'LLM only':<14} {llm_only:>7.2f}s  {len(DESCRIPTIONS):>3} LLM calls")
+    print(f"{'grammar + LLM':<14} {with_grammar * scale:>7.2f}s  {geometry.grammar_stats.llm_calls:>3} LLM calls"
+          f"  (hit rate {stats['hit_rate']:.0%}, logged estimate of time saved: {stats['llm_seconds_saved'] * scale:.2f}s)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the geometry pipeline: one structured LLM call (with a cache of parsed
+descriptions) against the former two sequential calls (intent, then entities as free-form
+JSON parsed with json.loads).
+
+With GOOGLE_API_KEY set, both are run live on DESCRIPTIONS (each asked twice, as a user
+refining a request would). Otherwise the LLM is simulated with LLM_LATENCY seconds per
+call, and the former entity reply is fenced in ```json, as Gemini often returns it.
+
+Reported: wall time, LLM calls, and descriptions that failed to parse.
+
+Usage:
+    python benchmarks/bench_geometry_pipeline.py
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from langchain.prompts import ChatPromptTemplate
+
+import tools.geometry_tool as geometry
+from tools.geometry_tool import GeometryRequest, parse_geometry_description
+from models.models import get_google_model
+
+DESCRIPTIONS = [
+    "a point at 10, 20",
+    "a line from 0,0 to 5,5",
+    "a square polygon with corners at (0,0), (1,0), (1,1), (0,1)",
+    "a circle with center at 2,2 and radius 3",
+    "a triangle with vertices 0,0 4,0 and 2,3",
+]
+REPEATS = 2
+LLM_LATENCY = 0.9  # assumed seconds per Gemini Flash call, used without GOOGLE_API_KEY
+TIME_SCALE = 0.05  # simulated sleeps are scaled down, results are scaled back up
+
+
+class SimulatedModel:
+    """Answers after LLM_LATENCY: a GeometryRequest when structured, fenced JSON otherwise."""
+
+    def __init__(self):
+        self.calls = 0
+        self.schema = None
+
+    def with_structured_output(self, schema):
+        model = SimulatedModel()
+        model.schema = schema
+        model.parent = self
+        return model
+
+    def _count(self):
+        getattr(self, "parent", self).calls += 1
+
+    async def ainvoke(self, prompt):
+        self._count()
+        await asyncio.sleep(LLM_LATENCY * TIME_SCALE)
+        return GeometryRequest(intent="draw", shapes=[{"kind": "point", "coordinates": [{"x": 10, "y": 20}]}])
+
+    def invoke(self, prompt):
+        self._count()
+        time.sleep(LLM_LATENCY * TIME_SCALE)
+        text = prompt[0].content if isinstance(prompt, list) else str(prompt)
+
+        class Reply:
+            content = "draw" if "Classify" in text else '```json\n{"shape": "point", "position": [10, 20]}\n```'
+        return Reply()
+
+
+def legacy_parse(llm, description: str) -> dict:
+    # The former steps 1 and 2 of generate_geometry: two blocking calls, free-form JSON
+    intent_prompt = ChatPromptTemplate.from_template(
+        "Classify the intent of the following user input: '{user_input}'. "
+        "Possible intents: draw, modify, calculate, query. "
+        "Return ONLY the intent name."
+    ).format_messages(user_input=description)
+    llm.invoke(intent_prompt).content.strip()
+    entity_prompt = ChatPromptTemplate.from_template(
+        "Extract the key entities from the following geometric description: '{user_input}'. "
+        "Entities to extract: shape, dimensions, position, relationship, equation. "
+        "Return a JSON object with the extracted entities."
+    ).format_messages(user_input=description)
+    return json.loads(llm.invoke(entity_prompt).content.strip())
+
+
+async def run(parse, descriptions: list[str]) -> tuple[float, int]:
+    failures = 0
+    start = time.perf_counter()
+    for description in descriptions:
+        try:
+            await parse(description)
+        except Exception:
+            failures += 1
+    return time.perf_counter() - start, failures
+
+
+async def main():
+    logging.disable(logging.CRITICAL)
+    live = bool(os.getenv("GOOGLE_API_KEY"))
+    model = get_google_model(streaming=False) if live else SimulatedModel()
+    scale = 1 if live else 1 / TIME_SCALE
+    workload = DESCRIPTIONS * REPEATS
+    print(f"{'live Gemini' if live else f'simulated LLM, {LLM_LATENCY}s per call'}; "
+          f"{len(workload)} requests ({len(DESCRIPTIONS)} descriptions x {REPEATS})")
+
+    async def legacy(description):
+        return await asyncio.to_thread(legacy_parse, model, description)
+
+    seconds, failures = await run(legacy, workload)
+    calls = model.calls if not live else 2 * len(workload)
+    print(f"{'two calls + json.loads':<26} {seconds * scale:>7.2f}s  {calls:>3} LLM calls  {failures:>2} parse failures")
+
+    geometry.get_geometry_model = lambda: model
+    geometry.geometry_cache = geometry.ResultCache(max_size=64)
+    if not live:
+        model.calls = 0
+    seconds, failures = await run(parse_geometry_description, workload)
+    calls = model.calls if not live else geometry.geometry_cache.stats()["misses"]
+    print(f"{'one structured call':<26} {seconds * scale:>7.2f}s  {calls:>3} LLM calls  {failures:>2} parse failures"
+          f"  (cache: {geometry.geometry_cache.stats()['hits']} hits)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
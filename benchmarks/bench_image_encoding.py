@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark of chart image payloads.
+
+Renders a few typical charts (a bar chart, a line, a 2k point scatter, an expression plot
+and a 100k point scatter drawn as hexbin) and reports, for each size preset, the bytes
+and encoding time of the former default PNG (figure.savefig) and of every output format,
+then what "auto" picks with the CHART_IMAGE_MAX_BYTES budget.
+
+Usage:
+    python benchmarks/bench_image_encoding.py [--presets small large hires]
+"""
+
+import io
+import os
+import sys
+import time
+import logging
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tools.image_encoding import encode_figure, IMAGE_PRESETS, CHART_IMAGE_MAX_BYTES
+from tools.plotting import generate_plot, generate_expression_plot
+
+FORMATS = ["png", "png8", "webp", "svg"]
+
+
+def make_charts() -> dict:
+    rng = np.random.default_rng(0)
+    walk = lambda points: {"x": np.arange(points), "y": rng.normal(size=points).cumsum()}
+    return {
+        "bar, 12 rows": lambda: generate_plot(walk(12), "bar", "Bar", "x", "y"),
+        "line, 200 rows": lambda: generate_plot(walk(200), "line", "Line", "x", "y"),
+        "scatter, 2k rows": lambda: generate_plot(
+            {"x": rng.normal(size=2000), "y": rng.normal(size=2000)}, "scatter", "Scatter", "x", "y"),
+        "expressions": lambda: generate_expression_plot(["sin(x)", "x**2/20", "tan(x)"], "-10:10", "Expressions", "x", "y"),
+        "hexbin, 100k rows": lambda: generate_plot(
+            {"x": rng.normal(size=100_000), "y": rng.normal(size=100_000)}, "scatter", "Hexbin", "x", "y"),
+    }
+
+
+def default_png(figure, preset: str) -> bytes:
+    # The former output: savefig with the default settings, at the preset size
+    width, height, dpi = IMAGE_PRESETS[preset]
+    figure.set_size_inches(width, height)
+    buf = io.BytesIO()
+    figure.savefig(buf, format="png", dpi=dpi)
+    return buf.getvalue()
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--presets", nargs="+", default=["small", "large", "hires"], choices=list(IMAGE_PRESETS))
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    print(f"KB (encoding ms); auto uses the {CHART_IMAGE_MAX_BYTES:,} bytes budget")
+    print(f"{'chart':<18} {'preset':<7} {'default png':>13} " + " ".join(f"{name:>13}" for name in FORMATS) + f" {'auto':>19}")
+    for name, make in make_charts().items():
+        for preset in args.presets:
+            figure = make()
+            png, png_ms = timed(default_png, figure, preset)
+            cells = [f"{len(png) / 1024:>6.0f} ({png_ms:>4.0f})"]
+            for image_format in FORMATS:
+                image, ms = timed(encode_figure, figure, image_format, preset, 0)
+                cells.append(f"{len(image.data) / 1024:>6.0f} ({ms:>4.0f})")
+            image, ms = timed(encode_figure, figure, "auto", preset, CHART_IMAGE_MAX_BYTES)
+            cells.append(f"{image.format:>5} {len(image.data) / 1024:>5.0f} ({ms:>4.0f})")
+            print(f"{name:<18} {preset:<7} " + " ".join(cells))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the NumPy backend of the calculator linear-algebra functions.
+
+For random integer matrices of sizes 5 to 500, times det, inv, eigenvals and svd
+through tools.matrix_backend (NumPy/LAPACK, conversion from/to SymPy included) and,
+for the sizes where it finishes in reasonable time, with exact=True (pure SymPy).
+
+Usage:
+    python benchmarks/bench_matrix_backend.py
+"""
+
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import sympy
+
+from tools import matrix_backend
+
+SIZES = [5, 10, 20, 50, 100, 200, 500]
+OPERATIONS = ["det", "inv", "eigenvals", "svd"]
+# Largest sizes run with exact=True (SymPy's exact eigenvalues and SVD need symbolic roots beyond 4x4)
+EXACT_MAX_SIZE = {"det": 50, "inv": 20, "eigenvals": 0, "svd": 0}
+
+
+def random_matrix(size: int) -> sympy.Matrix:
+    rng = random.Random(size)
+    return sympy.Matrix(size, size, lambda i, j: rng.randint(-9, 9) + (10 * size if i == j else 0))
+
+
+def timed(function, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    function(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def main():
+    matrix_backend.MATRIX_NUMPY_THRESHOLD = 1  # force NumPy for every size, including 5x5
+    print(f"{'size':>5} " + " ".join(f"{operation + ' numpy':>15} {operation + ' exact':>15}" for operation in OPERATIONS))
+
+    for size in SIZES:
+        matrix = random_matrix(size)
+        cells = []
+        for operation in OPERATIONS:
+            function = getattr(matrix_backend, operation)
+            cells.append(f"{timed(function, matrix) * 1000:>13.1f}ms")
+            if size <= EXACT_MAX_SIZE[operation]:
+                cells.append(f"{timed(function, matrix, exact=True) * 1000:>13.1f}ms")
+            else:
+                cells.append(f"{'-':>15}")
+        print(f"{size:>5} " + " ".join(cells))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the query-focused passage ranking used by webpage_research_tool.
+
+Compares, for a set of long "pages" and questions, the context handed to the LLM with
+and without the ranking stage: estimated tokens and ranking time are always measured;
+when GOOGLE_API_KEY is set, the research-turn LLM latency and reported token usage are
+measured as well.
+
+Usage:
+    python benchmarks/bench_passage_ranking.py
+"""
+
+import os
+import sys
+import time
+import pydoc
+import statistics
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dotenv import load_dotenv
+
+from tools.passage_ranking import rank_passages, estimate_tokens, PassageIndex
+from tools.research_tools import PASSAGE_TOP_K, PASSAGE_TOKEN_BUDGET
+
+load_dotenv()
+
+# Long plain-text documents standing in for fetched pages, with a question for each.
+CASES = [
+    ("asyncio", "How do I cancel a task after a timeout?"),
+    ("collections", "What does OrderedDict.move_to_end do?"),
+    ("argparse", "How to add a mutually exclusive group of arguments?"),
+    ("datetime", "How do I convert a timestamp to a timezone aware datetime?"),
+    ("typing", "How do I declare a TypedDict with optional keys?"),
+]
+
+
+def load_page(module_name: str) -> str:
+    module = __import__(module_name)
+    return pydoc.render_doc(module, renderer=pydoc.plaintext)
+
+
+def time_llm_turn(context: str, question: str) -> tuple[float, int | None]:
+    from models.models import get_google_model
+    llm = get_google_model(streaming=False)
+    prompt = f"Answer the question using the page below.\n\nPage:\n{context}\n\nQuestion: {question}"
+    start = time.perf_counter()
+    response = llm.invoke(prompt)
+    elapsed = time.perf_counter() - start
+    usage = getattr(response, "usage_metadata", None) or {}
+    return elapsed, usage.get("input_tokens")
+
+
+def main():
+    use_llm = bool(os.getenv("GOOGLE_API_KEY"))
+    print(f"Token budget: {PASSAGE_TOKEN_BUDGET}, top_k: {PASSAGE_TOP_K}, LLM timing: {'on' if use_llm else 'off (GOOGLE_API_KEY not set)'}")
+    print(f"{'page':<12} {'full tok':>9} {'ranked tok':>10} {'index ms':>9} {'rank ms':>8}" + ("  full LLM s  ranked LLM s" if use_llm else ""))
+
+    ratios = []
+    for module_name, question in CASES:
+        page = load_page(module_name)
+
+        start = time.perf_counter()
+        index = PassageIndex.from_text(page)
+        index_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        index.top_passages(question, top_k=PASSAGE_TOP_K, token_budget=PASSAGE_TOKEN_BUDGET)
+        rank_ms = (time.perf_counter() - start) * 1000
+
+        ranked = rank_passages(page, question, top_k=PASSAGE_TOP_K, token_budget=PASSAGE_TOKEN_BUDGET)
+        full_tokens, ranked_tokens = estimate_tokens(page), estimate_tokens(ranked)
+        ratios.append(full_tokens / ranked_tokens)
+
+        line = f"{module_name:<12} {full_tokens:>9} {ranked_tokens:>10} {index_ms:>9.1f} {rank_ms:>8.2f}"
+        if use_llm:
+            full_s, _ = time_llm_turn(page, question)
+            ranked_s, _ = time_llm_turn(ranked, question)
+            line += f"  {full_s:>10.2f}  {ranked_s:>12.2f}"
+        print(line)
+
+    print(f"Median context reduction: {statistics.median(ratios):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the rendered plot cache.
+
+Renders a few plots once (cache miss: key + parsing + seaborn + image encoding, in-process
+so that the pool start-up is not counted) and requests them again (cache hit: key +
+reading the image file). The cache lives in a temporary directory.
+
+Usage:
+    python benchmarks/bench_plot_cache.py [--repeat 5]
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+import statistics
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tools.plot_cache import PlotCache
+from tools.plotting import plot_cache_key, render_data_plot_image, warm_up_renderer
+
+
+def make_cases() -> list[tuple[str, str, str]]:
+    rng = np.random.default_rng(0)
+    cases = []
+    for points, plot_type in [(20, "bar"), (200, "line"), (2000, "scatter"), (10000, "line")]:
+        csv = "x,y\n" + "\n".join(f"{x},{y:.4f}" for x, y in enumerate(rng.normal(size=points).cumsum()))
+        cases.append((f"{plot_type}, {points} rows", csv, plot_type))
+    return cases
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    warm_up_renderer()
+
+    print(f"{'plot':<22} {'KB':>7} {'miss ms':>8} {'hit ms':>7} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        cache = PlotCache(directory)
+        for name, csv, plot_type in make_cases():
+            options = dict(plot_type=plot_type, title=name, x_label="x", y_label="y")
+
+            misses = []
+            for _ in range(args.repeat):
+                cache.clear()
+                start = time.perf_counter()
+                key = plot_cache_key(data=csv, **options)
+                png = cache.get(key)
+                if png is None:
+                    png = render_data_plot_image(csv, **options)
+                    cache.put(key, png)
+                misses.append(time.perf_counter() - start)
+
+            hits = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                assert cache.get(plot_cache_key(data=csv, **options)) == png
+                hits.append(time.perf_counter() - start)
+
+            miss, hit = statistics.median(misses), statistics.median(hits)
+            print(f"{name:<22} {len(png) / 1024:>7.0f} {miss * 1000:>8.1f} {hit * 1000:>7.2f} {miss / hit:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark for downsampling of large line and scatter plots.
+
+Renders random-walk series of increasing length to PNG, once with every row handed to
+seaborn (PLOT_MAX_POINTS raised above the row count) and once with the automatic
+reduction (LTTB for lines, hexbin for scatters). The "grouped" line has 10 rows per x
+value, which seaborn aggregates with a bootstrapped confidence interval. Full renders
+above --full-max rows (--full-max-grouped for the grouped line) are skipped, they take
+minutes.
+
+Usage:
+    python benchmarks/bench_plot_downsampling.py [--sizes 10000 100000 1000000] [--full-max 1000000]
+                                                 [--full-max-grouped 100000]
+"""
+
+import io
+import os
+import sys
+import time
+import logging
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import tools.plotting as plotting
+from tools.plotting import generate_plot, warm_up_renderer
+
+
+def render(data: pd.DataFrame, plot_type: str, max_points: int) -> tuple[float, int]:
+    plotting.PLOT_MAX_POINTS = max_points
+    start = time.perf_counter()
+    figure = generate_plot(data, plot_type, "Benchmark", "x", "y")
+    buf = io.BytesIO()
+    figure.savefig(buf, format='png')
+    return time.perf_counter() - start, len(buf.getvalue())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--full-max", type=int, default=1_000_000, help="largest size rendered without reduction")
+    parser.add_argument("--full-max-grouped", type=int, default=100_000, help="same for the grouped line")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    warm_up_renderer()
+    default_max_points = plotting.PLOT_MAX_POINTS
+
+    print(f"PLOT_MAX_POINTS = {default_max_points}")
+    print(f"{'plot':<8} {'rows':>9} {'full s':>8} {'full KB':>8} {'reduced s':>10} {'reduced KB':>11} {'speedup':>8}")
+    rng = np.random.default_rng(0)
+    for size in args.sizes:
+        data = pd.DataFrame({"x": np.arange(size, dtype=float), "y": rng.normal(size=size).cumsum()})
+        grouped = pd.DataFrame({"x": np.arange(size) // 10, "y": rng.normal(size=size).cumsum()})
+        cases = [("line", data, "line", args.full_max), ("scatter", data, "scatter", args.full_max),
+                 ("grouped", grouped, "line", args.full_max_grouped)]
+        for name, frame, plot_type, full_max in cases:
+            reduced_seconds, reduced_bytes = render(frame, plot_type, default_max_points)
+            if size <= full_max:
+                full_seconds, full_bytes = render(frame, plot_type, size + 1)
+                full = f"{full_seconds:>8.2f} {full_bytes / 1024:>8.0f}"
+                speedup = f"{full_seconds / reduced_seconds:>7.1f}x"
+            else:
+                full, speedup = f"{'skipped':>8} {'':>8}", f"{'':>8}"
+            print(f"{name:<8} {size:>9,} {full} {reduced_seconds:>10.2f} {reduced_bytes / 1024:>11.0f} {speedup}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark of plotting a workspace file with plot_tool(file=...) against pasting its content.
+
+Before, the agent read the file with read_file_content (the whole text enters the context)
+and passed it back as plot_tool's `data` (the whole text is generated again). Now it passes
+the file name, columns, filters and an aggregation. For generated CSV files of 10k, 100k and
+1M rows (date, region, product, sales, price), it reports:
+
+- the tokens the file costs the model, estimated at 4 characters per token, both ways;
+- the time to get the plotted table: read_table on the file text (aggregation not included)
+  against read_table_file with column selection, a filter and a sum per product;
+- the peak memory (VmHWM, Linux) of a fresh interpreter doing either, above its memory after imports.
+
+Usage:
+    python benchmarks/bench_plot_from_file.py [--sizes 10000 100000 1000000]
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+import subprocess
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import tools.table_ingest as table_ingest
+
+CHARS_PER_TOKEN = 4
+REQUEST = {"columns": ["product", "sales"], "filters": ["region == north"], "aggregate": "sum"}
+
+# Linux only: ru_maxrss survives exec (a child starts with the benchmark's peak), VmHWM does not
+MEMORY_SCRIPT = """
+import sys, json
+sys.path.insert(0, {root!r})
+from tools.table_ingest import read_table, read_table_file
+def status_kb(name):
+    with open("/proc/self/status") as status:
+        return next(int(line.split()[1]) for line in status if line.startswith(name + ":"))
+before = status_kb("VmRSS")
+if {from_file}:
+    read_table_file({path!r}, **json.loads({request!r}))
+else:
+    with open({path!r}, encoding="utf-8") as file:
+        read_table(file.read())
+print(status_kb("VmHWM") - before)
+"""
+
+
+def make_file(rows: int, directory: str) -> str:
+    rng = np.random.default_rng(0)
+    path = os.path.join(directory, f"sales_{rows}.csv")
+    pd.DataFrame({
+        "date": pd.date_range("2020-01-01", periods=rows, freq="min").strftime("%Y-%m-%d %H:%M"),
+        "region": rng.choice(["north", "south", "east", "west"], rows),
+        "product": rng.choice([f"product {i}" for i in range(20)], rows),
+        "sales": rng.integers(0, 1000, rows),
+        "price": rng.normal(50, 10, rows).round(2),
+    }).to_csv(path, index=False)
+    return path
+
+
+def peak_memory_mb(path: str, from_file: bool) -> float:
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    script = MEMORY_SCRIPT.format(root=root, path=path, from_file=from_file, request=json.dumps(REQUEST))
+    output = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True).stdout
+    return int(output.strip().splitlines()[-1]) / 1024
+
+
+def timed(function, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    function(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    pyarrow = table_ingest.pyarrow
+    print(f"pyarrow: {'installed ' + pyarrow.__version__ if pyarrow else 'not installed'}")
+
+    request_tokens = len(json.dumps({"file": "data/sales.csv", **REQUEST})) / CHARS_PER_TOKEN
+    print(f"{'rows':>9} {'file MB':>8} {'tokens pasted':>14} {'tokens file':>12} "
+          f"{'text s':>7} {'file s':>7} {'file s (pandas)':>16} {'text MB':>8} {'file MB':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in args.sizes:
+            path = make_file(rows, directory)
+            with open(path, encoding="utf-8") as file:
+                text = file.read()
+            # read_file_content output, then the same text generated as plot_tool's data
+            pasted_tokens = 2 * len(text) / CHARS_PER_TOKEN
+
+            text_seconds = timed(table_ingest.read_table, text)
+            file_seconds = timed(table_ingest.read_table_file, path, **REQUEST)
+            table_ingest.pyarrow = None
+            pandas_seconds = timed(table_ingest.read_table_file, path, **REQUEST)
+            table_ingest.pyarrow = pyarrow
+
+            print(f"{rows:>9,} {os.path.getsize(path) / 2**20:>8.1f} {pasted_tokens:>14,.0f} {request_tokens:>12,.0f} "
+                  f"{text_seconds:>7.2f} {file_seconds:>7.2f} {pandas_seconds:>16.2f} "
+                  f"{peak_memory_mb(path, False):>8.0f} {peak_memory_mb(path, True):>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the matplotlib fast renderer against the seaborn renderer.
+
+Per-render latency: generate_plot (data parsing, drawing and layout) plus an Agg draw of
+the figure, without image encoding, for line, bar, scatter and histogram plots of 10 and
+1,000 rows. "seaborn" is the former generate_plot code, every plot drawn by seaborn.
+
+Start-up: import time of tools.plotting in a fresh interpreter, and time until a new plot
+worker has rendered its first plot, with seaborn loaded lazily (now) and at import (before).
+Start-up times are the best of --starts runs.
+
+Usage:
+    python benchmarks/bench_plot_renderer.py [--repeat 10] [--starts 3]
+"""
+
+import os
+import sys
+import time
+import asyncio
+import logging
+import argparse
+import statistics
+import subprocess
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from tools.plotting import generate_plot, read_table, warm_up_renderer, render_data_plot_image
+from tools.worker_pool import WorkerPool
+
+PLOT_TYPES = ["line", "bar", "scatter", "histogram"]
+
+
+def seaborn_plot(data: str, plot_type: str, title: str, x_label: str, y_label: str) -> Figure:
+    # The drawing code of generate_plot before the fast renderer
+    import seaborn as sns
+
+    data = read_table(data)
+    with sns.axes_style("darkgrid"):
+        figure = Figure(figsize=(10, 6))
+        axes = figure.add_subplot()
+    plot = {"line": sns.lineplot, "bar": sns.barplot, "scatter": sns.scatterplot, "histogram": sns.histplot}[plot_type]
+    plot(x=data.columns[0], y=data.columns[1], data=data, ax=axes)
+    axes.set_title(title, fontsize=15)
+    axes.set_xlabel(x_label, fontsize=12)
+    axes.set_ylabel(y_label, fontsize=12)
+    figure.tight_layout()
+    return figure
+
+
+def make_data(rows: int, plot_type: str) -> str:
+    rng = np.random.default_rng(0)
+    x = np.arange(rows) if plot_type in ("line", "bar") else rng.normal(size=rows)
+    y = rng.normal(size=rows).cumsum() if plot_type == "line" else rng.normal(size=rows)
+    return "x,y\n" + "\n".join(f"{a:.4f},{b:.4f}" for a, b in zip(x, y))
+
+
+def render_ms(render, data: str, plot_type: str, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        figure = render(data, plot_type, "Benchmark", "x", "y")
+        FigureCanvasAgg(figure).draw()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def import_seconds(statement: str) -> float:
+    code = f"import time; start = time.perf_counter(); {statement}; print(time.perf_counter() - start)"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            cwd=os.path.join(os.path.dirname(__file__), '..')).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+async def worker_start_seconds(warm_modules: tuple[str, ...]) -> float:
+    pool = WorkerPool(size=1, job_timeout=120, warm_modules=warm_modules, initializer=warm_up_renderer)
+    start = time.perf_counter()
+    pool.start()
+    await pool.submit(render_data_plot_image, "x,y\n0,0\n1,1", "line", "Start", "x", "y", "png", "small")
+    seconds = time.perf_counter() - start
+    pool.shutdown()
+    return seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--starts", type=int, default=3)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    warm_up_renderer()
+    seaborn_plot("x,y\n0,0\n1,1", "line", "Warm-up", "x", "y")
+
+    print(f"{'plot':<18} {'seaborn ms':>11} {'fast ms':>8} {'speedup':>8}")
+    for rows in (10, 1000):
+        for plot_type in PLOT_TYPES:
+            data = make_data(rows, plot_type)
+            before = render_ms(seaborn_plot, data, plot_type, args.repeat)
+            after = render_ms(lambda *plot_args: generate_plot(*plot_args), data, plot_type, args.repeat)
+            print(f"{plot_type + f', {rows} rows':<18} {before:>11.1f} {after:>8.1f} {before / after:>7.1f}x")
+
+    print()
+    print(f"{'start-up':<34} {'seaborn at import s':>20} {'lazy seaborn s':>15}")
+    eager = min(import_seconds("import seaborn, tools.plotting") for _ in range(args.starts))
+    lazy = min(import_seconds("import tools.plotting") for _ in range(args.starts))
+    print(f"{'import tools.plotting':<34} {eager:>20.2f} {lazy:>15.2f}")
+    eager = min(asyncio.run(worker_start_seconds(("seaborn", "tools.plotting"))) for _ in range(args.starts))
+    lazy = min(asyncio.run(worker_start_seconds(("tools.plotting",))) for _ in range(args.starts))
+    print(f"{'plot worker start to first plot':<34} {eager:>20.2f} {lazy:>15.2f}")
+
+
+if __name__ == "__main__":
+    main()
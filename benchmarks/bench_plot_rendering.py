@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark of plot rendering throughput with 20 concurrent plot requests.
+
+Compares rendering on the event loop thread (how plot_tool used to work: every render
+blocks the loop, requests are served one after the other) with the pre-warmed plot
+worker pool. For each mode it reports the wall time of the 20 renders, the throughput,
+the latency percentiles seen by the requests and the longest event loop stall, measured
+by a heartbeat task ticking every 10 ms.
+
+The worker count can be varied with --workers; on a machine with fewer cores than
+workers the pool cannot render faster than the event loop, but the loop stays responsive.
+
+Usage:
+    python benchmarks/bench_plot_rendering.py [--requests 20] [--workers 1 2 4]
+"""
+
+import os
+import sys
+import time
+import asyncio
+import logging
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tools.plotting import render_data_plot_image, warm_up_renderer
+from tools.worker_pool import WorkerPool
+
+PLOT_TYPES = ["line", "bar", "scatter", "line"]
+HEARTBEAT = 0.01
+
+
+def make_requests(count: int) -> list[tuple]:
+    rng = np.random.default_rng(0)
+    requests = []
+    for i in range(count):
+        plot_type = PLOT_TYPES[i % len(PLOT_TYPES)]
+        points = 20 if plot_type == "bar" else 200
+        csv = "x,y\n" + "\n".join(f"{x},{y:.3f}" for x, y in enumerate(rng.normal(size=points).cumsum()))
+        requests.append((csv, plot_type, f"Plot {i}", "x", "y"))
+    return requests
+
+
+async def heartbeat(stalls: list, stop: asyncio.Event):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(HEARTBEAT)
+        stalls.append(time.perf_counter() - start - HEARTBEAT)
+
+
+async def measure(render, requests: list[tuple]) -> dict:
+    stalls, stop = [], asyncio.Event()
+    monitor = asyncio.create_task(heartbeat(stalls, stop))
+    await asyncio.sleep(0)
+    latencies = []
+
+    async def request(args):
+        start = time.perf_counter()
+        await render(*args)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(request(args) for args in requests))
+    wall = time.perf_counter() - start
+    stop.set()
+    await monitor
+    return {
+        "wall": wall,
+        "throughput": len(requests) / wall,
+        "p50": float(np.percentile(latencies, 50)),
+        "p95": float(np.percentile(latencies, 95)),
+        "stall": max(stalls, default=0.0),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    requests = make_requests(args.requests)
+
+    print(f"{args.requests} concurrent plot requests, {os.cpu_count()} CPU(s)")
+    print(f"{'mode':<22} {'wall s':>7} {'plots/s':>8} {'p50 s':>7} {'p95 s':>7} {'max stall ms':>13}")
+
+    def report(name, stats):
+        print(f"{name:<22} {stats['wall']:>7.2f} {stats['throughput']:>8.1f} {stats['p50']:>7.2f} "
+              f"{stats['p95']:>7.2f} {stats['stall'] * 1000:>13.0f}")
+
+    warm_up_renderer()
+
+    async def on_loop(*plot_args):
+        render_data_plot_image(*plot_args)  # blocks the event loop, like the former plot_tool
+
+    report("event loop", await measure(on_loop, requests))
+
+    for workers in args.workers:
+        pool = WorkerPool(size=workers, job_timeout=120, max_pending=args.requests,
+                          warm_modules=("tools.plotting",), initializer=warm_up_renderer)
+        start = time.perf_counter()
+        pool.start()
+        # Wait until every worker is warm, outside of the measurement
+        await asyncio.gather(*(pool.submit(render_data_plot_image, *requests[0]) for _ in range(workers)))
+        warm_seconds = time.perf_counter() - start
+        report(f"pool, {workers} worker(s)", await measure(lambda *plot_args: pool.submit(render_data_plot_image, *plot_args), requests))
+        print(f"{'':<22} (start-up and warm-up: {warm_seconds:.1f}s, once per worker)")
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark comparing research_tool's parallel fan-out pipeline with the sequential ReAct research agent.
+
+With GOOGLE_API_KEY, SERPER_API_KEY and PERPLEXITY_API_KEY set, both modes are run live on
+a few questions. Otherwise the pipeline code runs against simulated network/LLM latencies
+(see LATENCIES) and is compared with the same steps executed one after another, which is
+what the ReAct loop does (one LLM turn per tool call).
+
+Usage:
+    python benchmarks/bench_research_pipeline.py
+"""
+
+import os
+import sys
+import time
+import asyncio
+from unittest.mock import patch, MagicMock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from agents import research_planner
+from agents.research_planner import ResearchPlan, run_research_pipeline, RESEARCH_PAGES_PER_QUERY
+
+QUESTIONS = [
+    "What are the main differences between the EU AI Act and the US executive order on AI?",
+    "How do solid-state batteries compare to lithium-ion in energy density, cost and availability?",
+    "What caused the 2008 financial crisis and which regulations followed?",
+]
+
+# Assumed latencies in seconds (order of magnitude for Gemini Flash, Serper and Perplexity Sonar)
+LATENCIES = {"llm_turn": 1.2, "search": 0.8, "perplexity": 4.0, "page": 1.5}
+TIME_SCALE = 0.05  # simulated sleeps are scaled down, results are scaled back up
+SUB_QUERIES = 4
+
+
+async def simulated_sleep(step: str):
+    await asyncio.sleep(LATENCIES[step] * TIME_SCALE)
+
+
+async def run_simulated_pipeline() -> float:
+    model = MagicMock()
+
+    async def plan(_):
+        await simulated_sleep("llm_turn")
+        return ResearchPlan(sub_queries=[f"sub-query {i}" for i in range(SUB_QUERIES)])
+
+    async def synthesize(_):
+        await simulated_sleep("llm_turn")
+        return MagicMock(content="answer")
+
+    async def search(query):
+        await simulated_sleep("search")
+        return {"organic": [{"title": f"{query} {i}", "link": f"https://example.com/{query}/{i}", "snippet": f"{query} snippet {i}"} for i in range(5)]}
+
+    async def perplexity(query):
+        await simulated_sleep("perplexity")
+        return f"answer for {query}"
+
+    async def page(url, query):
+        await simulated_sleep("page")
+        return f"content of {url}"
+
+    model.with_structured_output.return_value.ainvoke = plan
+    model.ainvoke = synthesize
+    with patch.object(research_planner, "get_google_model", return_value=model), \
+            patch.object(research_planner, "search_web", search), \
+            patch.object(research_planner, "ask_perplexity", perplexity), \
+            patch.object(research_planner, "read_page", page):
+        start = time.perf_counter()
+        await run_research_pipeline("question")
+        return (time.perf_counter() - start) / TIME_SCALE
+
+
+async def run_simulated_sequential() -> float:
+    start = time.perf_counter()
+    for _ in range(SUB_QUERIES):
+        for step in ["search", "perplexity"] + ["page"] * RESEARCH_PAGES_PER_QUERY:
+            await simulated_sleep("llm_turn")  # the agent decides on the next tool call
+            await simulated_sleep(step)
+    await simulated_sleep("llm_turn")  # final answer
+    return (time.perf_counter() - start) / TIME_SCALE
+
+
+async def run_live():
+    from tools import agents_tools
+
+    for question in QUESTIONS:
+        timings = {}
+        for mode in ("agent", "pipeline"):
+            with patch.object(agents_tools, "RESEARCH_MODE", mode):
+                start = time.perf_counter()
+                await agents_tools.research_tool.ainvoke(question)
+                timings[mode] = time.perf_counter() - start
+        print(f"{timings['agent']:>8.1f}s {timings['pipeline']:>10.1f}s  {question[:60]}")
+
+
+def main():
+    live = all(os.getenv(key) for key in ("GOOGLE_API_KEY", "SERPER_API_KEY", "PERPLEXITY_API_KEY"))
+    if live:
+        print(f"{'agent':>9} {'pipeline':>11}  question")
+        asyncio.run(run_live())
+        return
+
+    print(f"Simulated latencies (s): {LATENCIES}, {SUB_QUERIES} sub-queries, {RESEARCH_PAGES_PER_QUERY} pages each")
+    sequential = asyncio.run(run_simulated_sequential())
+    pipeline = asyncio.run(run_simulated_pipeline())
+    print(f"Sequential agent loop: {sequential:6.1f}s")
+    print(f"Fan-out pipeline:      {pipeline:6.1f}s  ({sequential / pipeline:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark for plot_tool table ingest.
+
+Parses generated tables of 1k, 100k and 1M rows (a date, an integer, a float and a label
+column) written as CSV and as a markdown table, with:
+
+- legacy: the former generate_plot parsing (Python loops over markdown rows and cells,
+  then pd.to_numeric per column; the default pandas engine for CSV);
+- ingest (pandas): read_table with the pandas C parser;
+- ingest (pyarrow): read_table with pyarrow's CSV reader, when pyarrow is installed.
+
+A second CSV has formatted numbers ("1,234", "12.5%") that the legacy path leaves as text.
+
+Usage:
+    python benchmarks/bench_table_ingest.py [--sizes 1000 100000 1000000]
+"""
+
+import io
+import os
+import sys
+import time
+import logging
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import tools.table_ingest as table_ingest
+
+
+def legacy_parse(data: str) -> pd.DataFrame:
+    # The parsing code of generate_plot before the ingest layer
+    clean_data = data.strip()
+    if '|' in clean_data:
+        table_lines = [line.strip() for line in clean_data.split('\n') if line.strip()]
+        table_lines = [line for line in table_lines if not (line.startswith('|') and all(c == '-' or c == '|' or c.isspace() for c in line))]
+        rows = [[cell.strip() for cell in line.strip('|').split('|')] for line in table_lines]
+        df = pd.DataFrame(rows[1:], columns=rows[0])
+        for col in df.columns:
+            try:
+                df[col] = pd.to_numeric(df[col])
+            except (ValueError, TypeError):
+                pass
+        return df
+    return pd.read_csv(io.StringIO(clean_data))
+
+
+def make_tables(rows: int) -> dict[str, str]:
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame({
+        "date": pd.date_range("2000-01-01", periods=rows, freq="h").strftime("%Y-%m-%d %H:%M"),
+        "count": rng.integers(0, 10_000, rows),
+        "value": rng.normal(size=rows).round(4),
+        "label": rng.choice(["north", "south", "east", "west"], rows),
+    })
+    markdown = "| " + " | ".join(frame.columns) + " |\n|" + "---|" * len(frame.columns) + "\n"
+    markdown += "\n".join("| " + " | ".join(row) + " |" for row in frame.astype(str).itertuples(index=False))
+
+    formatted = frame.copy()
+    formatted["count"] = [f"{value:,}" for value in formatted["count"]]
+    formatted["value"] = [f"{value:.1f}%" for value in formatted["value"] * 100]
+    return {"csv": frame.to_csv(index=False), "markdown": markdown, "csv formatted": formatted.to_csv(index=False)}
+
+
+def timed(function, text: str) -> tuple[float, pd.DataFrame]:
+    start = time.perf_counter()
+    result = function(text)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    pyarrow = table_ingest.pyarrow
+
+    print(f"pyarrow: {'installed ' + pyarrow.__version__ if pyarrow else 'not installed'}")
+    print(f"{'table':<14} {'rows':>9} {'legacy s':>9} {'pandas s':>9} {'pyarrow s':>10} {'typed cols (legacy/ingest)':>27}")
+    for rows in args.sizes:
+        for name, text in make_tables(rows).items():
+            legacy_seconds, legacy = timed(legacy_parse, text)
+
+            table_ingest.pyarrow = None
+            pandas_seconds, ingested = timed(table_ingest.read_table, text)
+            table_ingest.pyarrow = pyarrow
+            arrow = f"{timed(table_ingest.read_table, text)[0]:>10.3f}" if pyarrow else f"{'-':>10}"
+
+            typed = lambda frame: sum(frame[column].dtype != object for column in frame.columns)
+            print(f"{name:<14} {rows:>9,} {legacy_seconds:>9.3f} {pandas_seconds:>9.3f} {arrow} "
+                  f"{typed(legacy):>15}/{typed(ingested)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 # chainlit_setup.py
+import asyncio
 import datetime
 import logging
 import uuid
@@ -9,11 +10,39 @@ from langchain_core.messages import HumanMessage, AIMessage
 from typing import List, Optional
 
 from agent_management import initialize_agent
+from tools.math_tools import calculator_pool
+from tools.plotting import plot_pool
+from tools.research_tools import perplexity_client
 from utils import handle_error
 
 logger = logging.getLogger(__name__)
 
 
+@cl.on_app_startup
+async def start_worker_pools():
+    """
+    Starts the calculator and plotting worker pools when the application starts.
+
+    Spawning the workers and importing SymPy and Matplotlib in them takes a few seconds;
+    doing it here keeps that cost off the first calculation or plot of the first user.
+    The processes are started on a thread so the server keeps starting meanwhile.
+    """
+    try:
+        await asyncio.gather(asyncio.to_thread(calculator_pool.start), asyncio.to_thread(plot_pool.start))
+    except Exception as e:
+        # The pools still start on first use
+        logger.error(f"Error starting the worker pools: {e}")
+
+
+@cl.on_app_shutdown
+async def close_clients():
+    """Closes the HTTP connections kept open by the Perplexity AI client."""
+    try:
+        await perplexity_client.aclose()
+    except Exception as e:
+        logger.error(f"Error closing the Perplexity AI client: {e}")
+
+
 async def init_chainlit():
     """
     Initializes the Chainlit session with user and thread information.
@@ -5,5 +5,8 @@ SUPERVISOR_PROMPT_NAME = "supervisor"
 JARVIS_NAME = "Jarvis_MK42"
 RECURSION_LIMIT = 250
 
+# Research mode for research_tool: "pipeline" (parallel fan-out planner) or "agent" (ReAct research agent)
+RESEARCH_MODE = os.environ.get("RESEARCH_MODE", "pipeline").lower()
+
 # Audio settings (example)
 MPV_INSTALLED = os.environ.get("MPV_INSTALLED", "False").lower() == "true"
@@ -28,6 +28,7 @@ def main():
         "research": "test_research_tools.py",
         "reasoning": "test_reasoning_tools.py",
         "plotting": "test_plotting.py",
+        "geometry": "test_geometry_tool.py",
         "agents": "test_agents_tools.py",
         "multimodal": "test_multimodal_tools.py",
     }
@@ -3,6 +3,7 @@ import re
 from unittest.mock import patch, AsyncMock, MagicMock
 
 from tools.agents_tools import research_tool, reasoning_tool, coding_tool
+from agents.research_planner import ResearchPlan
 
 # Since these tools require agents that may be complex to initialize in tests,
 # we'll use mocking to test the tool functions independently
@@ -24,8 +25,9 @@ async def test_research_tool_with_mocks():
         ]
     })
     
-    # Patch the get_research_agent function to return our mock
-    with patch('tools.agents_tools.get_research_agent', return_value=mock_agent):
+    # Patch the get_research_agent function to return our mock (agent mode skips the fan-out pipeline)
+    with patch('tools.agents_tools.get_research_agent', return_value=mock_agent), \
+            patch('tools.agents_tools.RESEARCH_MODE', 'agent'):
         result = await research_tool.ainvoke(test_query)
         
         # Check that the result matches our expected response
@@ -43,6 +45,40 @@ async def test_research_tool_with_mocks():
         assert call_kwargs["input"]["messages"][0].content == test_query, f"Message content should be '{test_query}'"
 
 
+@pytest.mark.asyncio
+async def test_research_tool_pipeline_fans_out_sub_queries():
+    """Test that the research pipeline plans once, gathers evidence concurrently and synthesizes once."""
+    sub_queries = ["python data science libraries", "python machine learning ecosystem"]
+
+    mock_model = MagicMock()
+    mock_model.with_structured_output.return_value.ainvoke = AsyncMock(return_value=ResearchPlan(sub_queries=sub_queries))
+    mock_model.ainvoke = AsyncMock(return_value=MagicMock(content="Synthesized answer [1]"))
+
+    async def fake_search(query):
+        # Both searches return the same page, which must only be read once
+        return {"organic": [{"title": "Shared", "link": "https://example.com/shared", "snippet": f"snippet for {query}"}]}
+
+    read_page = AsyncMock(return_value="Pandas and NumPy are the core libraries.")
+    ask_perplexity = AsyncMock(side_effect=lambda query: f"Perplexity answer about {query}")
+
+    with patch('tools.agents_tools.RESEARCH_MODE', 'pipeline'), \
+            patch('agents.research_planner.get_google_model', return_value=mock_model), \
+            patch('agents.research_planner.search_web', side_effect=fake_search), \
+            patch('agents.research_planner.ask_perplexity', ask_perplexity), \
+            patch('agents.research_planner.read_page', read_page):
+        result = await research_tool.ainvoke("What makes Python good for data science?")
+
+    assert result == "Synthesized answer [1]", f"Expected the synthesized answer, got '{result}'"
+    assert mock_model.ainvoke.call_count == 1, "Synthesis should be a single LLM call"
+    assert ask_perplexity.call_count == len(sub_queries), "Each sub-query should be sent to Perplexity"
+    assert read_page.call_count == 1, "A page returned by several searches should be fetched once"
+
+    synthesis_prompt = mock_model.ainvoke.call_args.args[0]
+    assert synthesis_prompt.count("(search) Shared - https://example.com/shared") == 1, "Duplicate search results should be merged"
+    for query in sub_queries:
+        assert f"Perplexity answer about {query}" in synthesis_prompt
+
+
 @pytest.mark.asyncio
 async def test_reasoning_tool_with_mocks():
     """Test reasoning_tool with mocked agent."""
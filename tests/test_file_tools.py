@@ -2,6 +2,7 @@ import os
 import pytest
 import asyncio
 
+import tools.file_tools as file_tools
 from tools.file_tools import list_jarvis_files, read_file_content, write_file_tool
 
 @pytest.mark.asyncio
@@ -84,4 +85,18 @@ async def test_write_file_tool():
     
     # Clean up after test
     if os.path.exists(test_filename):
-        os.remove(test_filename)
\ No newline at end of file
+        os.remove(test_filename)
+
+
+def test_resolve_workspace_path(tmp_path, monkeypatch):
+    """Test that only files of the Jarvis directory, outside hidden directories, are resolved."""
+    monkeypatch.setattr(file_tools, "JARVIS_BASE_DIR", str(tmp_path / "jarvis"))
+    (tmp_path / "jarvis" / "data").mkdir(parents=True)
+    (tmp_path / "jarvis" / "data" / "sales.csv").write_text("x,y\n1,2\n")
+    (tmp_path / "jarvis" / ".env").write_text("SECRET=1\n")
+    (tmp_path / "outside.csv").write_text("x,y\n1,2\n")
+
+    assert file_tools.resolve_workspace_path("./data/sales.csv") == str(tmp_path / "jarvis" / "data" / "sales.csv")
+    for path in ["../outside.csv", str(tmp_path / "outside.csv"), ".env", "data/missing.csv", "data"]:
+        with pytest.raises(ValueError):
+            file_tools.resolve_workspace_path(path)
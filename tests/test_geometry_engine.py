@@ -0,0 +1,100 @@
+import itertools
+
+import numpy as np
+import pytest
+import shapely
+from matplotlib.figure import Figure
+
+from tools.geometry_engine import GeometryScene, draw_scene
+
+
+def random_scene(count: int, seed: int = 0) -> GeometryScene:
+    # Squares and circles of random sizes spread over a 1000 x 1000 area
+    rng = np.random.default_rng(seed)
+    centers = rng.uniform(0, 1000, (count, 2))
+    sizes = rng.uniform(1, 15, count)
+    kinds = np.where(np.arange(count) % 2 == 0, "polygon", "circle")
+    corners = np.array([(-1, -1), (1, -1), (1, 1), (-1, 1)])
+    coordinates, counts = [], []
+    for kind, center, size in zip(kinds, centers, sizes):
+        rows = center + corners * size if kind == "polygon" else center[None, :]
+        coordinates.append(rows)
+        counts.append(len(rows))
+    return GeometryScene.from_arrays(kinds, np.concatenate(coordinates), counts, sizes)
+
+
+def test_scene_measures_and_pairs():
+    """Test the vectorized measures and the pairs found through the STRtree on a small scene."""
+    scene = GeometryScene.from_arrays(
+        ["polygon", "circle", "point", "line", "polygon"],
+        [(0, 0), (4, 0), (4, 4), (0, 4), (2, 2), (2, 2), (10, 0), (10, 10), (20, 20), (21, 20), (21, 21)],
+        [4, 1, 1, 2, 3],
+        [np.nan, 1, np.nan, np.nan, np.nan],
+    )
+    assert list(scene.kinds) == ["polygon", "circle", "point", "line", "polygon"]
+    assert scene.areas()[0] == 16 and scene.areas()[1] == pytest.approx(np.pi, rel=0.01)
+    assert scene.lengths()[3] == 10 and scene.lengths()[2] == 0
+
+    left, right, overlaps = scene.intersections()
+    assert sorted(zip(left.tolist(), right.tolist())) == [(0, 1), (0, 2), (1, 2)]
+    containers, contained = scene.containments()
+    assert sorted(zip(containers.tolist(), contained.tolist())) == [(0, 1), (0, 2), (1, 2)]
+    nearest, distances = scene.nearest()
+    assert nearest[3] == 0 and distances[3] == 6  # the line x = 10 is 6 away from the square
+    assert scene.distance(3, 4) == pytest.approx(200 ** 0.5)  # from (10, 10) to (20, 20)
+
+    summary = scene.summary(max_items=2)
+    assert summary["shape_count"] == 5 and len(summary["shapes"]) == 2
+    assert summary["intersecting_pairs"] == 3 and len(summary["intersections"]) == 2
+    assert summary["union_area"] == pytest.approx(16.5)  # the circle is inside the square
+    assert summary["shapes"][0] == {"shape": 1, "kind": "polygon", "area": 16, "length": 16,
+                                    "nearest": 2, "distance_to_nearest": 0}
+
+
+def test_scene_matches_pairwise_loop():
+    """Test that the STRtree pairs and vectorized intersections match comparing every pair of shapes."""
+    scene = random_scene(400)
+    geometries = scene.geometries
+    expected = {(i, j) for i, j in itertools.combinations(range(len(scene)), 2) if geometries[i].intersects(geometries[j])}
+    left, right, overlaps = scene.intersections()
+    assert set(zip(left.tolist(), right.tolist())) == expected
+    i, j = left[0], right[0]
+    assert shapely.area(overlaps[0]) == pytest.approx(geometries[i].intersection(geometries[j]).area)
+
+    nearest, distances = scene.nearest()
+    brute = [min(geometries[i].distance(geometries[j]) for j in range(len(scene)) if j != i) for i in range(len(scene))]
+    assert np.allclose(distances, brute)
+
+
+@pytest.mark.parametrize("kinds, coordinates, counts, radii, message", [
+    ([], np.empty((0, 2)), [], None, "no shapes"),
+    (["line"], [(0, 0)], [1], None, "needs at least 2"),
+    (["circle"], [(0, 0)], [1], [0], "positive radius"),
+    (["cone"], [(0, 0)], [1], None, "Unknown shape"),
+])
+def test_scene_rejects_invalid_shapes(kinds, coordinates, counts, radii, message):
+    """Test that shapes missing coordinates, radii or a known kind are rejected."""
+    with pytest.raises(ValueError, match=message):
+        GeometryScene.from_arrays(kinds, coordinates, counts, radii)
+
+
+def test_draw_scene_uses_one_artist_per_kind():
+    """Test that a large scene is drawn with a collection per kind, not an artist per shape."""
+    scene = random_scene(2000)
+    axes = Figure().add_subplot()
+    draw_scene(axes, scene)
+    assert len(axes.collections) == 3  # squares, circles and their overlaps
+    assert not axes.lines and not axes.patches
+
+
+def test_draw_scene_reuses_the_summary_intersections(monkeypatch):
+    """Test that drawing a summarized scene does not compute the intersections again."""
+    scene = random_scene(500)
+    summary = scene.summary()
+    calls = []
+    intersection = shapely.intersection
+    monkeypatch.setattr(shapely, "intersection", lambda *args: calls.append(args) or intersection(*args))
+
+    draw_scene(Figure().add_subplot(), scene)
+    assert not calls
+    assert len(scene.overlap_areas()) == summary["intersecting_pairs"]
@@ -0,0 +1,58 @@
+import pytest
+
+from tools.geometry_grammar import parse_geometry_grammar
+
+
+def shapes(result: dict) -> list[tuple]:
+    return [(shape["kind"], [(c["x"], c["y"]) for c in shape["coordinates"]], shape["radius"])
+            for shape in result["shapes"]]
+
+
+@pytest.mark.parametrize("description, expected", [
+    ("a point at 10, 20", [("point", [(10, 20)], None)]),
+    ("a line from 0,0 to 5,5", [("line", [(0, 0), (5, 5)], None)]),
+    ("a circle with center 2,2 and radius 3", [("circle", [(2, 2)], 3)]),
+    ("a circle with radius 2 and center at the origin", [("circle", [(0, 0)], 2)]),
+    ("a square polygon with corners at (0,0), (1,0), (1,1), (0,1)", [("polygon", [(0, 0), (1, 0), (1, 1), (0, 1)], None)]),
+    ("a rectangle from 0,0 to 4,-2", [("polygon", [(0, 0), (4, 0), (4, -2), (0, -2)], None)]),
+    ("points at 1,1 and 2.5,2 and a line from 0,0 to 3,3",
+     [("point", [(1, 1)], None), ("point", [(2.5, 2)], None), ("line", [(0, 0), (3, 3)], None)]),
+    ("un cercle de centre (2; 3) et de rayon 1,5", [("circle", [(2, 3)], 1.5)]),
+    ("une ligne de (0;0) à (2,5;3)", [("line", [(0, 0), (2.5, 3)], None)]),
+    ("un círculo con centro 2,2 y diámetro 6", [("circle", [(2, 2)], 3)]),
+    ("un triángulo con vértices (0,0), (4,0) y (2,3)", [("polygon", [(0, 0), (4, 0), (2, 3)], None)]),
+    ("una línea desde 1,1 hasta 4,5", [("line", [(1, 1), (4, 5)], None)]),
+    ("Zeichne ein Dreieck mit den Ecken 0,0 4,0 und 2,3", [("polygon", [(0, 0), (4, 0), (2, 3)], None)]),
+    ("Kreis mit Mittelpunkt (1 2) und Radius 4", [("circle", [(1, 2)], 4)]),
+])
+def test_grammar_parses_common_descriptions(description, expected):
+    """Test common shape phrasings and explicit coordinate lists in English, French, Spanish and German."""
+    result = parse_geometry_grammar(description)
+    assert result["intent"] == "draw"
+    assert shapes(result) == expected
+
+
+@pytest.mark.parametrize("description, intent", [
+    ("what is the area of a circle at the origin with radius 2?", "calculate"),
+    ("distance entre le point (1; 1) et le point (4; 5)", "calculate"),
+    ("is the point 1,1 inside the triangle 0,0 4,0 2,3?", "query"),
+])
+def test_grammar_intent(description, intent):
+    """Test that measures and questions are recognized as such."""
+    assert parse_geometry_grammar(description)["intent"] == intent
+
+
+@pytest.mark.parametrize("description", [
+    "a square of side 4 at 1,1",  # a size without coordinates
+    "a circle of radius 3 tangent to the line y=5",  # a constraint
+    "rotate the square 0,0 1,1 by 45 degrees",  # a modification
+    "a point at ten, twenty",  # numbers in words
+    "a triangle with vertices 0,0 and 4,0",  # missing vertex
+    "a square from 0,0 to 4,2",  # not a square
+    "a circle at 2,2",  # no radius
+    "a line",
+    "an unknown shape",
+])
+def test_grammar_leaves_other_descriptions_to_the_llm(description):
+    """Test that anything not fully understood returns None rather than a partial figure."""
+    assert parse_geometry_grammar(description) is None
@@ -0,0 +1,116 @@
+import pytest
+from shapely.geometry import Point, Polygon, GeometryCollection
+
+import tools.geometry_tool as geometry
+from tools.geometry_tool import geometry_tool, generate_geometry, GeometryRequest
+
+
+class FakeStructuredModel:
+    """Stands in for the chat model: returns a fixed GeometryRequest and counts the calls."""
+
+    def __init__(self, request: GeometryRequest):
+        self.request = request
+        self.calls = []
+
+    def with_structured_output(self, schema):
+        assert schema is GeometryRequest
+        return self
+
+    async def ainvoke(self, prompt):
+        self.calls.append(prompt)
+        return self.request
+
+
+@pytest.fixture
+def fake_model(monkeypatch):
+    def install(request: dict) -> FakeStructuredModel:
+        model = FakeStructuredModel(GeometryRequest.model_validate(request))
+        monkeypatch.setattr(geometry, "get_geometry_model", lambda: model)
+        monkeypatch.setattr(geometry, "geometry_cache", geometry.ResultCache(max_size=8))
+        monkeypatch.setattr(geometry, "grammar_stats", geometry.GrammarStats())
+        return model
+    return install
+
+
+@pytest.mark.asyncio
+async def test_generate_geometry_builds_parsed_shapes_with_one_call(fake_model):
+    """Test that the shapes are built from the parsed coordinates, with a single LLM call per description."""
+    model = fake_model({"intent": "draw", "shapes": [
+        {"kind": "polygon", "coordinates": [{"x": 0, "y": 0}, {"x": 4, "y": 0}, {"x": 4, "y": 4}, {"x": 0, "y": 4}]},
+        {"kind": "circle", "coordinates": [{"x": 2, "y": 2}], "radius": 1},
+    ]})
+
+    result = await generate_geometry("a square of side 4 at the origin and a circle of radius 1 at its center")
+    assert result["status"] == "success"
+    assert result["intent"] == "draw"
+    assert isinstance(result["geometry_object"], GeometryCollection)
+    square, circle = result["geometry_object"].geoms
+    assert isinstance(square, Polygon) and square.area == 16
+    assert circle.centroid.equals_exact(Point(2, 2), 1e-9) and circle.area == pytest.approx(3.1416, rel=0.01)
+    assert result["plot_data"].getvalue()[:4] in (b"\x89PNG", b"RIFF", b"<?xm")
+
+    # Same description with other spacing and case: served from the cache
+    await generate_geometry("A square of side 4 at the origin and a circle of  radius 1 at its center")
+    assert len(model.calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_generate_geometry_grammar_skips_the_llm(fake_model):
+    """Test that descriptions parsed by the grammar do not call the LLM, and that the hits are counted."""
+    model = fake_model({"intent": "draw", "shapes": [{"kind": "point", "coordinates": [{"x": 0, "y": 0}]}]})
+
+    result = await generate_geometry("a circle with center 2,2 and radius 3 and a line from 0,0 to 5,5")
+    assert result["status"] == "success" and not model.calls
+    circle, line = result["geometry_object"].geoms
+    assert circle.centroid.equals_exact(Point(2, 2), 1e-9) and line.length == pytest.approx(50 ** 0.5)
+    assert result["measures"]["intersecting_pairs"] == 1
+
+    await generate_geometry("a point somewhere")
+    assert len(model.calls) == 1
+    assert geometry.grammar_stats.stats()["hit_rate"] == 0.5
+
+
+@pytest.mark.asyncio
+async def test_generate_geometry_builds_off_the_event_loop(fake_model, monkeypatch):
+    """Test that building, measuring and drawing the scene take a single thread hop."""
+    fake_model({"intent": "draw", "shapes": [{"kind": "point", "coordinates": [{"x": 0, "y": 0}]}]})
+    calls = []
+    to_thread = geometry.asyncio.to_thread
+
+    async def counting_to_thread(function, *args):
+        calls.append(function)
+        return await to_thread(function, *args)
+
+    monkeypatch.setattr(geometry.asyncio, "to_thread", counting_to_thread)
+    result = await generate_geometry("a point somewhere")
+    assert result["status"] == "success"
+    assert calls == [geometry.build_geometry]
+
+
+@pytest.mark.asyncio
+async def test_generate_geometry_rejects_incomplete_shapes(fake_model):
+    """Test that a shape without the coordinates its kind needs is reported as a failure."""
+    fake_model({"intent": "draw", "shapes": [{"kind": "line", "coordinates": [{"x": 0, "y": 0}]}]})
+    result = await generate_geometry("a line")
+    assert result["status"] == "failure"
+    assert result["plot_data"] is None
+
+
+@pytest.mark.asyncio
+async def test_geometry_tool_sends_the_figure(fake_model, monkeypatch):
+    """Test the async tool end to end with a single point: the message is sent and awaited."""
+    fake_model({"intent": "draw", "shapes": [{"kind": "point", "coordinates": [{"x": 10, "y": 20}]}]})
+    sent = []
+
+    class FakeMessage:
+        def __init__(self, content, elements):
+            self.elements = elements
+
+        async def send(self):
+            sent.append(self.elements)
+
+    monkeypatch.setattr(geometry.cl, "Message", FakeMessage)
+    monkeypatch.setattr(geometry.cl, "Image", lambda **image: image)
+    result = await geometry_tool.ainvoke({"query": "a point at 10, 20"})
+    assert result["status"] == "success"
+    assert len(sent) == 1 and sent[0][0]["mime"].startswith("image/")
@@ -1,8 +1,16 @@
 # filepath: c:\Sandbox\Git\jarvis-mk42\tests\test_math_tools.py
+import os
+import time
 import pytest
 import math
+import asyncio
+import threading
 
-from tools.math_tools import calculator_tool
+from tools.math_tools import calculator_tool, calculator_grid_tool, calculator_batch_tool, calculator_cache, evaluate_expression, canonical_key
+from tools.math_cache import PersistentResultCache
+from tools.fast_math import fast_evaluate
+from tools.numeric_solver import numeric_solver_tool, solve_numeric
+from tools.worker_pool import WorkerPool, WorkerPoolError, JobTimeoutError
 
 @pytest.mark.asyncio
 async def test_calculator_tool_basic_arithmetic():
@@ -75,3 +83,205 @@ async def test_calculator_tool_error_handling():
     result = await calculator_tool.ainvoke("1 +* 2")
     assert any(term in result.lower() for term in ["error", "syntax", "invalid"]), \
         f"Expected error message for syntax error, got: {result}"
+
+@pytest.mark.asyncio
+async def test_calculator_tool_caches_results():
+    """Test that repeated expressions are served from the result cache."""
+    hits = calculator_cache.hits
+
+    first = await calculator_tool.ainvoke("factor(x**2 - 5*x + 6)")
+    second = await calculator_tool.ainvoke("factor(x**2  -  5*x + 6)")  # same expression, different spacing
+    assert first == second, f"Expected identical results, got: {first} and {second}"
+    assert calculator_cache.hits == hits + 1, f"Expected one cache hit, got: {calculator_cache.stats()}"
+
+    # Errors are not cached
+    await calculator_tool.ainvoke("1 +* 2")
+    assert "1 +* 2" not in calculator_cache.entries
+
+def test_worker_pool_limits_and_recycling():
+    """Test that the worker pool enforces time limits, reports errors and recycles workers."""
+    pool = WorkerPool(size=1, job_timeout=5, cpu_limit=1, max_jobs_per_worker=2)
+    try:
+        # A worker is replaced after max_jobs_per_worker jobs
+        pids = [pool.run(os.getpid) for _ in range(3)]
+        assert pids[0] == pids[1] != pids[2], f"Expected the worker to be recycled, got pids: {pids}"
+
+        # Wall-clock timeout: the worker is killed and replaced
+        with pytest.raises(JobTimeoutError):
+            pool.run(time.sleep, 10, timeout=0.5)
+        assert pool.run(pow, 2, 10) == 1024
+
+        # CPU limit: the job is interrupted inside the worker
+        with pytest.raises(JobTimeoutError, match="CPU"):
+            pool.run(exec, "while True: pass")
+
+        # Errors raised by the job are reported with their type
+        with pytest.raises(WorkerPoolError, match="ValueError"):
+            pool.run(int, "not a number")
+    finally:
+        pool.shutdown()
+
+@pytest.mark.asyncio
+async def test_worker_pool_cancellation():
+    """Test that cancelling a submitted job frees its worker."""
+    pool = WorkerPool(size=1, job_timeout=30)
+    try:
+        task = asyncio.create_task(pool.submit(time.sleep, 30))
+        await asyncio.sleep(0.5)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        start = time.monotonic()
+        assert await pool.submit(pow, 3, 2) == 9
+        assert time.monotonic() - start < 10, "Expected the cancelled job's worker to be replaced quickly"
+    finally:
+        pool.shutdown()
+
+@pytest.mark.asyncio
+async def test_worker_pool_submit_uses_its_own_threads():
+    """Test that submitted jobs are waited on by one pool thread per worker, not the default executor."""
+    pool = WorkerPool(size=1, job_timeout=30)
+    threads_before = set(threading.enumerate())
+    try:
+        jobs = asyncio.gather(*(pool.submit(time.sleep, 0.2) for _ in range(4)))
+        await asyncio.sleep(0.5)
+        pool_threads = [thread for thread in set(threading.enumerate()) - threads_before if thread.name.startswith("worker-pool_")]
+        await jobs
+        assert len(pool_threads) == 1, f"Expected one waiting thread for one worker, got: {pool_threads}"
+    finally:
+        pool.shutdown()
+
+@pytest.mark.asyncio
+async def test_calculator_grid_tool():
+    """Test vectorized grid evaluation, including the mpmath fallback and CSV output."""
+    result = await calculator_grid_tool.ainvoke({"expression": "x**2 + 1", "variables": {"x": "0:1000"}})
+    lines = result.splitlines()
+    assert lines[0] == "| x | x**2 + 1 |", f"Expected a table header, got: {lines[0]}"
+    assert "| 1000 | 1000001 |" in lines, f"Expected the last point of the range, got: {lines[-1]}"
+    assert len(lines) == 2 + 1001, f"Expected 1001 rows, got {len(lines) - 2}"
+
+    # exp(800) overflows float64 and is recomputed with mpmath; sqrt(-4) leaves the real domain
+    result = await calculator_grid_tool.ainvoke({"expression": "exp(x)", "variables": {"x": "1, 800"}, "output_format": "csv"})
+    assert "800,2.72637457211257e+347" in result, f"Expected an mpmath value for exp(800), got: {result}"
+    result = await calculator_grid_tool.ainvoke({"expression": "sqrt(x) * y", "variables": {"x": "-4", "y": "1:2"}})
+    assert "| -4 | 2 | 0+4j |" in result, f"Expected a complex value, got: {result}"
+
+    result = await calculator_grid_tool.ainvoke({"expression": "x + z", "variables": {"x": "0:1"}})
+    assert result.startswith("Error"), f"Expected an error for the missing variable, got: {result}"
+
+@pytest.mark.asyncio
+async def test_calculator_batch_tool():
+    """Test that batch items can reuse named results and fail independently."""
+    result = await calculator_batch_tool.ainvoke({"expressions": ["a = sqrt(2)", "a**2", "b = 1 +* 2", "pi = 3", "expand((x - a)*(x + a))"]})
+    lines = result.splitlines()
+    assert len(lines) == 5, f"Expected one line per expression, got: {result}"
+    assert lines[1].startswith("[2] a**2 => 2.0"), f"Expected the named result to be reused exactly, got: {lines[1]}"
+    assert "Error" in lines[2] and "Error" in lines[3], f"Expected per-item errors, got: {lines[2:4]}"
+    assert lines[4].endswith("x**2 - 2"), f"Expected later items to still run, got: {lines[4]}"
+
+def test_fast_path_matches_sympy():
+    """Test that the numeric fast path agrees with SymPy and leaves symbolic work to it."""
+    for expression in ["12.5*3 + 4^2", "1/3 + 1/6", "2**64 - 1", "sqrt(144)", "log(1000, 10)", "7 // 2", "0.1 + 0.2"]:
+        fast = fast_evaluate(expression)
+        assert fast is not None, f"Expected the fast path to handle {expression}"
+        assert fast == evaluate_expression(expression), f"Fast path and SymPy differ for {expression}: {fast}"
+
+    for expression in ["x + 1", "sin(pi)", "sqrt(-4)", "1/0", "2**10**10", "factorial(5)", "2x"]:
+        assert fast_evaluate(expression) is None, f"Expected {expression} to be left to SymPy"
+
+@pytest.mark.asyncio
+async def test_numeric_solver_tool():
+    """Test root finding, minimization, curve fitting and the evaluation limit of the numeric solver."""
+    result = await numeric_solver_tool.ainvoke({"problem": "root", "expressions": ["x**2 + y**2 = 4", "exp(x) = y"],
+                                                "variables": ["x", "y"], "initial_values": [1, 1]})
+    assert "converged" in result and "x = 0.63926307" in result, f"Expected the root of the system, got: {result}"
+
+    result = await numeric_solver_tool.ainvoke({"problem": "minimize", "expressions": ["(x - 3)**2 + 1"], "variables": ["x"]})
+    assert "Minimum (converged" in result and "x = 3" in result, f"Expected the minimum at x = 3, got: {result}"
+
+    data_x = [0, 0.5, 1, 1.5, 2]
+    data_y = [2.5 * math.exp(-1.3 * x) for x in data_x]
+    result = await numeric_solver_tool.ainvoke({"problem": "fit", "expressions": ["a*exp(b*x)"], "variables": ["x"],
+                                                "data_x": data_x, "data_y": data_y})
+    assert "a = 2.5" in result and "b = -1.3" in result, f"Expected the fitted parameters, got: {result}"
+
+    result = await numeric_solver_tool.ainvoke({"problem": "ode", "expressions": ["y"], "variables": ["y"],
+                                                "initial_values": [1], "t_span": [0, 1000], "max_iterations": 50})
+    assert result.startswith("Error") and "50 evaluations" in result, f"Expected the evaluation limit to stop the ODE, got: {result}"
+
+def test_numeric_solver_edge_cases(capfd):
+    """Test derivative-free minimization, fit guess validation and a quiet ODE evaluation limit."""
+    result = solve_numeric("minimize", ["(x-1)**2 + abs(y)"], ["x", "y"])
+    assert result.startswith("Minimum") and "x = 1" in result, f"Expected the minimum at x = 1, got: {result}"
+    result = solve_numeric("minimize", ["(x-1)**2 + floor(y)**2 + y**2"], ["x", "y"])
+    assert result.startswith("Minimum (converged"), f"Expected a derivative-free minimum, got: {result}"
+
+    result = solve_numeric("fit", ["a*x + b"], ["x"], [1], data_x=[0, 1, 2], data_y=[1, 3, 5])
+    assert result.startswith("Error") and "order a, b" in result, f"Expected one guess per parameter, got: {result}"
+
+    capfd.readouterr()
+    result = solve_numeric("ode", ["y"], ["y"], [1], t_span=[0, 1000], max_iterations=50)
+    assert result.startswith("Error") and "50 evaluations" in result
+    assert "capi_return" not in capfd.readouterr().err, "LSODA callback errors should not reach stderr"
+
+@pytest.mark.asyncio
+async def test_calculator_tool_linear_algebra_backends():
+    """Test that large numeric matrices use NumPy while small or exact=True requests stay exact."""
+    result = await calculator_tool.ainvoke("inv(Matrix([[1, 2], [3, 4]]))")
+    assert result == "Matrix([[-2, 1], [3/2, -1/2]])", f"Expected an exact inverse for a small matrix, got: {result}"
+
+    result = await calculator_tool.ainvoke("det(eye(300)*1000)")
+    assert result.startswith("1.00000000000") and result.endswith("e+900"), f"Expected a NumPy determinant without overflow, got: {result}"
+
+    result = await calculator_tool.ainvoke("eigenvals(diag(5, 4, 3, 2, 1, 1, 1, 1, 1, 1, 1, 2))")
+    assert result.startswith("[1.0") and result.endswith("5.00000000000000]"), f"Expected sorted numeric eigenvalues, got: {result}"
+
+    result = await calculator_tool.ainvoke("eigenvals(diag(5, 4, 3, 2, 1, 1, 1, 1, 1, 1, 1, 2), exact=True)")
+    assert result == "[1, 1, 1, 1, 1, 1, 1, 2, 2, 3, 4, 5]", f"Expected the same list shape for exact eigenvalues, got: {result}"
+    result = await calculator_tool.ainvoke("eigenvects(Matrix([[2, 0], [0, 1]]))")
+    assert result == "([1, 2], Matrix([[0, 1], [1, 0]]))", f"Expected eigenvalues and eigenvector columns, got: {result}"
+
+    # Singular matrices give SymPy's error on both paths
+    for expression in ["inv(Matrix([[1, 2], [2, 4]]))", "inv(ones(12, 12))", "solve_linear(ones(12, 12), ones(12, 1))"]:
+        result = await calculator_tool.ainvoke(expression)
+        assert result.startswith("Error") and "not invertible" in result, f"Expected a non-invertible error, got: {result}"
+
+    # Matrix methods and negative powers use the same backend as the functions
+    result = await calculator_tool.ainvoke("(eye(300)*1000).det()")
+    assert result.endswith("e+900"), f"Expected a NumPy determinant from the det() method, got: {result}"
+    result = await calculator_tool.ainvoke("Matrix([[1, 2], [3, 4]])**-1")
+    assert result == "Matrix([[-2, 1], [3/2, -1/2]])", f"Expected an exact inverse for a small matrix, got: {result}"
+
+    # Large results are summarized instead of printed entry by entry
+    result = await calculator_tool.ainvoke("(eye(500)*4).inv()")
+    assert result.startswith("500x500 matrix") and "0.25" in result and len(result) < 2000, f"Expected a summary, got: {result[:300]}"
+
+def test_persistent_cache_canonical_keys_eviction_and_versions(tmp_path, monkeypatch):
+    """Test canonical cache keys, LRU eviction and invalidation when the SymPy version changes."""
+    assert canonical_key("integrate(2*x + x, x)") == canonical_key("integrate(3x,x)")
+    assert canonical_key("solve(x**2 - 4, x)") != canonical_key("solve(x**2 - 4, y)")
+
+    # Building a key never runs the calculation: method calls and matrix powers stay unevaluated
+    start = time.monotonic()
+    canonical_key("(x**5*exp(x)*sin(x)).integrate(x)")
+    canonical_key("Integral(x**5*exp(x)*sin(x), x).doit()")
+    canonical_key("Matrix([[1, 2], [3, 4]])**-1 * eye(2)")
+    assert time.monotonic() - start < 0.5, "Expected cache keys to be built without integrating"
+
+    path = str(tmp_path / "cache.sqlite3")
+    cache = PersistentResultCache(path, max_entries=10, version="1.0")
+    for i in range(20):
+        cache.put(f"key{i}", str(i))
+    assert cache.get("key19") == "19", "Expected the most recent entry to be kept"
+    assert cache.get("key0") is None, "Expected the least recently used entries to be evicted"
+
+    # Shared through the file with other processes, and cleared when written by another version
+    assert PersistentResultCache(path, max_entries=10, version="1.0").get("key19") == "19"
+    assert PersistentResultCache(path, max_entries=10, version="2.0").get("key19") is None
+
+    # Entries formatted by a previous schema (CACHE_SCHEMA_VERSION) are not served either
+    import tools.math_cache as math_cache
+    PersistentResultCache(path, max_entries=10, version="2.0").put("key", "old format")
+    monkeypatch.setattr(math_cache, "CACHE_SCHEMA_VERSION", math_cache.CACHE_SCHEMA_VERSION + 1)
+    assert PersistentResultCache(path, max_entries=10, version="2.0").get("key") is None
@@ -5,8 +5,13 @@ import matplotlib
 # Use a non-interactive backend for testing to avoid Tkinter dependency
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt
+import numpy as np
 
-from tools.plotting import plot_tool, generate_plot
+import asyncio
+from matplotlib.figure import Figure
+
+from tools.plotting import plot_tool, generate_plot, sample_expression, render_data_plot_image
+from tools.image_encoding import encode_figure, sniff_format, EXTENSIONS
 
 @pytest.mark.asyncio
 async def test_plot_tool_with_markdown_table():
@@ -80,6 +85,7 @@ def test_generate_plot_function():
         
         # Verify that a matplotlib figure was returned
         assert plt_obj is not None, f"generate_plot should return a plot object for {plot_type}"
+        assert isinstance(plt_obj, Figure), "generate_plot should not use the global pyplot figure"
         
         # Clean up the plot to avoid memory issues
         plt.close()
@@ -112,3 +118,306 @@ async def test_plot_tool_error_handling():
     })
     
     assert result == "ko", "plot_tool should return 'ko' for invalid plot type"
+
+@pytest.mark.asyncio
+async def test_plot_tool_with_expressions():
+    """Test that plot_tool plots expressions without data, and rejects invalid ones."""
+    result = await plot_tool.ainvoke({
+        "expressions": ["sin(x)", "tan(x)", "x^2/10"],
+        "x_range": "-2*pi:2*pi",
+        "title": "Functions",
+        "x_label": "x",
+        "y_label": "y"
+    })
+    assert result == "ok", "plot_tool should return 'ok' for expressions"
+
+    result = await plot_tool.ainvoke({"expressions": ["sin(x"], "x_range": "0:1"})
+    assert result == "ko", "plot_tool should return 'ko' for an invalid expression"
+
+    result = await plot_tool.ainvoke({"expressions": ["x*y"], "x_range": "0:1"})
+    assert result == "ko", "plot_tool should return 'ko' for an expression with other variables"
+
+    result = await plot_tool.ainvoke({"expressions": ["x"], "x_range": "1:0"})
+    assert result == "ko", "plot_tool should return 'ko' for an empty range"
+
+def test_sample_expression_refines_and_breaks_discontinuities():
+    """Test adaptive sampling: smooth curves stay connected, poles and steps are broken."""
+    x, y = sample_expression("x**2", -1, 1, samples=101)
+    assert len(x) >= 101 and not np.isnan(y).any()
+
+    # 1/x has a single pole at 0: the line is broken once, samples are added around it
+    x, y = sample_expression("1/x", -1, 1, samples=100)
+    assert len(x) > 100
+    assert np.isnan(y).sum() == 1
+    assert x[np.isnan(y)][0] == pytest.approx(0, abs=1e-3)
+
+    # floor(x) on [0, 3.5] jumps at 1, 2 and 3
+    x, y = sample_expression("floor(x)", 0, 3.5)
+    assert np.isnan(y).sum() == 3
+
+    # Outside the real domain nothing is drawn
+    x, y = sample_expression("sqrt(x)", -1, 1, samples=101)
+    assert np.isnan(y[x < 0]).all() and not np.isnan(y[x >= 0]).any()
+
+def test_render_data_plot_image():
+    """Test the function run by the plot workers: encoded image bytes, or an error for invalid input."""
+    png = render_data_plot_image("x,y\n1,10\n2,20", "bar", "Test", "X", "Y", image_format="png")
+    assert png.startswith(b"\x89PNG"), "render_data_plot_image should return PNG bytes"
+
+    with pytest.raises(ValueError):
+        render_data_plot_image("x,y\n1,10", "pie", "Test", "X", "Y")
+
+@pytest.mark.asyncio
+async def test_plot_tool_concurrent_requests():
+    """Test that concurrent plot_tool calls are all rendered by the worker pool."""
+    requests = [
+        {"data": f"x,y\n1,{i}\n2,{i * 2}\n3,{i * 3}", "plot_type": "line", "title": f"Plot {i}"}
+        for i in range(6)
+    ] + [{"expressions": ["sin(x)", f"x/{i + 1}"], "x_range": "-5:5"} for i in range(2)]
+
+    results = await asyncio.gather(*(plot_tool.ainvoke(request) for request in requests))
+    assert results == ["ok"] * len(requests), "every concurrent plot should be rendered"
+
+@pytest.mark.asyncio
+async def test_plot_tool_serves_repeated_plots_from_cache(tmp_path, monkeypatch):
+    """Test that a repeated plot request is served from the image cache without rendering."""
+    import tools.plotting as plotting
+    from tools.plot_cache import PlotCache
+
+    monkeypatch.setattr(plotting, "plot_cache", PlotCache(str(tmp_path)))
+    request = {"data": "x,y\n1,10\n2,20\n3,15", "plot_type": "bar", "title": "Cached"}
+    assert await plot_tool.ainvoke(request) == "ok"
+    assert len(list(tmp_path.rglob("*.img"))) == 1
+
+    renders = []
+    async def render(function, *args, **kwargs):
+        renders.append(args)
+        return b"\x89PNG"
+    monkeypatch.setattr(plotting.plot_pool, "submit", render)
+
+    # Same table with other line endings and spacing: same image
+    assert await plot_tool.ainvoke({**request, "data": "  x,y\r\n1,10\r\n\r\n2,20\r\n3,15\n"}) == "ok"
+    assert plotting.plot_cache.stats()["hits"] == 1
+    assert renders == [], "a cached plot should not be rendered again"
+
+    # A different title is a different image
+    assert await plot_tool.ainvoke({**request, "title": "Other"}) == "ok"
+    assert len(renders) == 1
+
+def test_plot_cache_evicts_least_recently_used(tmp_path):
+    """Test that the plot cache stays under its size limit, evicting the oldest images first."""
+    import os
+    from tools.plot_cache import PlotCache
+
+    cache = PlotCache(str(tmp_path), max_bytes=2500)
+    keys = [PlotCache.make_key("plot", i) for i in range(3)]
+    for i, key in enumerate(keys[:2]):
+        cache.put(key, bytes(1000))
+        os.utime(cache._path(key), (i, i))
+    assert cache.get(keys[0]) == bytes(1000)  # now the most recently used
+
+    cache.put(keys[2], bytes(1000))
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None and cache.get(keys[2]) is not None
+
+def test_large_series_are_downsampled():
+    """Test that long lines are reduced with LTTB and dense scatters drawn as hexbin, with a note."""
+    from tools.downsampling import downsample_line
+    import tools.plotting as plotting
+
+    count = plotting.PLOT_MAX_POINTS * 4
+    x = np.arange(count, dtype=float)
+    y = np.sin(x / 500)
+    y[count // 3] = 10  # a single spike must survive the reduction
+
+    indices = downsample_line(x, y, 1000)
+    assert len(indices) == 1000
+    assert indices[0] == 0 and indices[-1] == count - 1 and count // 3 in indices
+    assert np.all(np.diff(indices) > 0)
+
+    df = pd.DataFrame({"x": x, "y": y})
+    figure = generate_plot(df, "line", "Line", "x", "y")
+    line = figure.axes[0].lines[0]
+    assert len(line.get_xdata()) == plotting.PLOT_DOWNSAMPLE_POINTS
+    assert max(line.get_ydata()) == 10
+    assert any("downsampled" in text.get_text() for text in figure.axes[0].texts)
+
+    figure = generate_plot(df, "scatter", "Scatter", "x", "y")
+    assert any("hexbin" in text.get_text() for text in figure.axes[0].texts)
+
+    # Small tables are drawn as they are
+    figure = generate_plot(df.head(100), "line", "Line", "x", "y")
+    assert len(figure.axes[0].lines[0].get_xdata()) == 100 and not figure.axes[0].texts
+
+@pytest.mark.parametrize("use_pyarrow", [True, False])
+def test_read_table_infers_formatted_columns(use_pyarrow, monkeypatch):
+    """Test table ingest of markdown and CSV with thousands separators, percentages and dates."""
+    import tools.table_ingest as table_ingest
+    if not use_pyarrow:
+        monkeypatch.setattr(table_ingest, "pyarrow", None)
+    elif table_ingest.pyarrow is None:
+        pytest.skip("pyarrow is not installed")
+
+    markdown_table = """
+| Month | Sales   | Growth | Closing    |
+|-------|--------:|--------|------------|
+| Jan   | 1,200   | 12.5%  | 2024-01-31 |
+| Feb   | 1,500.5 | -3%    | 2024-02-29 |
+| Mar   | 900     |        | 2024-03-31 |
+"""
+    df = table_ingest.read_table(markdown_table)
+    assert list(df.columns) == ["Month", "Sales", "Growth", "Closing"]
+    assert df["Month"].tolist() == ["Jan", "Feb", "Mar"]
+    assert df["Sales"].tolist() == [1200, 1500.5, 900]
+    assert df["Growth"].tolist()[:2] == [12.5, -3] and np.isnan(df["Growth"].iloc[2])
+    assert pd.api.types.is_datetime64_any_dtype(df["Closing"])
+
+    df = table_ingest.read_table('x,amount,label\n1,"$1,000",a\n2,"$2,500.25",b\n')
+    assert df["amount"].tolist() == [1000, 2500.25]
+
+    # European decimal commas are not thousands separators: the column stays text
+    df = table_ingest.read_table('x,y\n1,"1,5"\n')
+    assert df["y"].dtype == object
+
+    with pytest.raises(ValueError):
+        table_ingest.read_table("This is not valid data for plotting")
+
+def test_read_table_dtypes_do_not_depend_on_pyarrow(monkeypatch):
+    """Test that the pyarrow and pandas parsers give the same column types."""
+    import tools.table_ingest as table_ingest
+    if table_ingest.pyarrow is None:
+        pytest.skip("pyarrow is not installed")
+
+    csv = ('date,count,value,label,amount,share,missing\n'
+           '2024-01-01 10:00,1,1.5,north,"$1,200",5%,1\n'
+           '2024-01-02 11:00,2,2.5,south,"$2,500",20%,\n')
+    markdown = "| a | b | c |\n|---|---|---|\n| 1 | 1,200 | x |\n| 2 | 2,500 | y |\n"
+    for text in (csv, markdown):
+        with_pyarrow = table_ingest.read_table(text).dtypes
+        monkeypatch.setattr(table_ingest, "pyarrow", None)
+        without_pyarrow = table_ingest.read_table(text).dtypes
+        monkeypatch.undo()
+        assert with_pyarrow.to_dict() == without_pyarrow.to_dict()
+
+
+@pytest.mark.parametrize("dates, expected", [
+    # Month first for the whole column, as guessed from the first value
+    (["12/01/2024", "01/13/2024", "03/01/2024"], ["2024-12-01", "2024-01-13", "2024-03-01"]),
+    # Day first for the whole column
+    (["13/01/2024", "01/02/2024"], ["2024-01-13", "2024-02-01"]),
+    # Mixed conventions stay text
+    (["12/01/2024", "13/01/2024"], None),
+])
+def test_read_table_ambiguous_dates_do_not_depend_on_pyarrow(monkeypatch, dates, expected):
+    """Test that day/month dates are read with one format per column by both parsers."""
+    import tools.table_ingest as table_ingest
+    if table_ingest.pyarrow is None:
+        pytest.skip("pyarrow is not installed")
+
+    csv = "date\n" + "\n".join(dates) + "\n"
+    with_pyarrow = table_ingest.read_table(csv)["date"]
+    monkeypatch.setattr(table_ingest, "pyarrow", None)
+    without_pyarrow = table_ingest.read_table(csv)["date"]
+    monkeypatch.undo()
+
+    for column in (with_pyarrow, without_pyarrow):
+        if expected is None:
+            assert column.tolist() == dates
+        else:
+            assert column.tolist() == list(pd.to_datetime(expected))
+    assert with_pyarrow.dtype == without_pyarrow.dtype
+
+
+@pytest.mark.parametrize("image_format, magic", [("png", b"\x89PNG"), ("png8", b"\x89PNG"), ("webp", b"RIFF"), ("svg", b"<?xml")])
+def test_encode_figure_formats(image_format, magic):
+    """Test that each chart image format is encoded and recognized from its bytes."""
+    figure = generate_plot(data="x,y\n1,10\n2,20\n3,15", plot_type="line", title="Test", x_label="X", y_label="Y")
+    image = encode_figure(figure, image_format, "small", max_bytes=0)
+
+    assert image.data.startswith(magic)
+    assert sniff_format(image.data) == EXTENSIONS[image.format]
+    if image_format != "svg":
+        assert (image.width, image.height) == (512, 307), "the small preset is 6.4x3.84 inches at 80 dpi"
+
+
+def test_encode_figure_size_budget():
+    """Test that auto keeps the smallest encoding and lowers the resolution to fit the budget."""
+    rng = np.random.default_rng(0)
+    data = {"x": rng.normal(size=5000), "y": rng.normal(size=5000)}
+    figure = generate_plot(data=data, plot_type="scatter", title="Test", x_label="X", y_label="Y")
+
+    default = encode_figure(figure, "png", "large", max_bytes=0)
+    image = encode_figure(figure, "auto", "large", max_bytes=40_000)
+
+    assert image.format in ("png8", "webp"), "a chart with thousands of markers should not be sent as SVG"
+    assert len(image.data) <= 40_000 < len(default.data)
+    assert image.width < default.width
+
+    with pytest.raises(ValueError):
+        encode_figure(figure, "gif")
+
+
+def test_simple_plots_are_drawn_without_seaborn(monkeypatch):
+    """Test that plots of numbers are drawn by the fast renderer and aggregated data by seaborn."""
+    import tools.plotting as plotting
+    seaborn_calls = []
+    monkeypatch.setattr(plotting, "_draw_seaborn", lambda axes, data, plot_type: seaborn_calls.append(plot_type))
+
+    for plot_type in ["line", "bar", "scatter", "histogram"]:
+        figure = generate_plot(data="x,y\n1,10\n2,20\n3,15\n4,30", plot_type=plot_type, title="Test", x_label="X", y_label="Y")
+        assert isinstance(figure, Figure), f"generate_plot should draw a {plot_type} plot"
+    assert seaborn_calls == []
+
+    generate_plot(data="x,y\n1,10\n1,12\n2,20\n2,18", plot_type="line", title="Test", x_label="X", y_label="Y")
+    assert seaborn_calls == ["line"], "repeated x values should be aggregated by seaborn"
+
+
+@pytest.mark.parametrize("use_pyarrow", [True, False])
+def test_read_table_file_selects_filters_and_aggregates(use_pyarrow, tmp_path, monkeypatch):
+    """Test reading plot columns from a CSV file with filters and aggregation."""
+    import tools.table_ingest as table_ingest
+    if not use_pyarrow:
+        monkeypatch.setattr(table_ingest, "pyarrow", None)
+        monkeypatch.setattr(table_ingest, "CHUNK_ROWS", 2)
+    elif table_ingest.pyarrow is None:
+        pytest.skip("pyarrow is not installed")
+
+    path = tmp_path / "sales.csv"
+    path.write_text(
+        "date,region,product,sales\n"
+        "2024-01-05,north,a,100\n2024-01-20,south,b,200\n2024-02-03,north,b,150\n"
+        "2024-02-11,north,a,50\n2024-03-02,south,a,300\n"
+    )
+
+    data = table_ingest.read_table_file(str(path), ["product", "sales"], ["region == north"], "sum")
+    assert data.to_dict("list") == {"product": ["a", "b"], "sales": [150, 150]}
+
+    data = table_ingest.read_table_file(str(path), ["date", "sales"], ["sales >= 150", "date < '2024-03-01'"])
+    assert pd.api.types.is_datetime64_any_dtype(data["date"])
+    assert data["sales"].tolist() == [200, 150]
+
+    assert table_ingest.read_table_file(str(path), ["region"], aggregate="count")["count"].tolist() == [3, 2]
+    for columns, filters in [(["month", "sales"], None), (["date", "sales"], ["sales ~ 3"])]:
+        with pytest.raises(ValueError):
+            table_ingest.read_table_file(str(path), columns, filters)
+
+    # Formatted numbers are compared as numbers, not as their text
+    path.write_text('x,y,share,note\n1,"1,200",5%,a\n2,"2,500",20%,b\n3,900,100%,c\n')
+    assert table_ingest.read_table_file(str(path), ["x", "y"], ["y > 1500"])["x"].tolist() == [2]
+    assert table_ingest.read_table_file(str(path), ["x", "y"], ["share >= 20"])["x"].tolist() == [2, 3]
+    with pytest.raises(ValueError, match="holds text"):
+        table_ingest.read_table_file(str(path), ["x", "y"], ["note > 1"])
+
+
+@pytest.mark.asyncio
+async def test_plot_tool_from_workspace_file(tmp_path, monkeypatch):
+    """Test that plot_tool plots a file of the Jarvis directory and refuses paths outside it."""
+    import tools.file_tools as file_tools
+    monkeypatch.setattr(file_tools, "JARVIS_BASE_DIR", str(tmp_path))
+    (tmp_path / "sales.csv").write_text("month,region,sales\n1,north,100\n1,south,80\n2,north,150\n2,south,60\n")
+
+    request = {"file": "sales.csv", "columns": ["month", "sales"], "aggregate": "sum", "plot_type": "bar", "title": "Sales"}
+    assert await plot_tool.ainvoke(request) == "ok"
+    assert await plot_tool.ainvoke({**request, "filters": ["region == north"]}) == "ok"
+    assert await plot_tool.ainvoke({**request, "file": "../sales.csv"}) == "ko"
+    assert await plot_tool.ainvoke({**request, "columns": ["month", "profit"]}) == "ko"
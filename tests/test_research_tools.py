@@ -1,7 +1,16 @@
 import pytest
 import os
+import asyncio
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch, MagicMock
 
-from tools.research_tools import google_search_tool, advanced_research_tool
+from tools.research_tools import google_search_tool, advanced_research_tool, fetch_url_content, multi_webpage_research_tool, webpage_research_tool, FETCH_TOTAL_TIMEOUT, TRUNCATION_MARKER, focus_page_content
+from tools.research_memory import research_memory, research_memory_tool, ThreadMemory, MemoryDocument, DEFAULT_THREAD_ID
+from tools.passage_ranking import rank_passages, estimate_tokens, split_passages
+from tools.perplexity_client import PerplexityClient, PerplexityError, CircuitBreaker, CircuitOpenError
 
 @pytest.mark.asyncio
 async def test_google_search_tool():
@@ -50,3 +59,316 @@ async def test_advanced_research_tool():
     
     # Check if result is reasonably long (indicative of a thorough response)
     assert len(result) > 100, "Result should be a reasonably long response"
+
+
+def _mock_streamed_response(chunks, content_type="text/html"):
+    """Build a requests-like streamed response yielding the given byte chunks."""
+    response = MagicMock()
+    response.__enter__.return_value = response
+    response.headers = {"Content-Type": content_type} if content_type else {}
+    response.iter_content.return_value = iter(chunks)
+    return response
+
+
+def test_fetch_url_content_truncates_at_max_bytes():
+    """Test that fetch_url_content stops reading once the byte cap is reached."""
+    chunks = [b"<html><body><p>" + b"a" * 1000] + [b"b" * 1000 for _ in range(100)]
+    response = _mock_streamed_response(chunks)
+
+    with patch("tools.research_tools.requests.get", return_value=response) as mock_get:
+        result = fetch_url_content("https://example.com/big", max_bytes=2500)
+
+    assert mock_get.call_args.kwargs["stream"] is True, "Download should be streamed"
+    assert "Content truncated" in result, f"Expected truncation marker, got: {result[-200:]}"
+    assert result.count("b") <= 2500, "No more than max_bytes should be decoded"
+    assert response.iter_content.return_value.__length_hint__() > 0, "Remaining chunks should not be read"
+
+
+def test_fetch_url_content_truncation_reason():
+    """Test that a body of exactly max_bytes is complete, and that a deadline cut is reported as such."""
+    response = _mock_streamed_response([b"<p>" + b"a" * 997])  # 1000 bytes
+    with patch("tools.research_tools.requests.get", return_value=response):
+        result = fetch_url_content("https://example.com/exact", max_bytes=1000)
+    assert "Content truncated" not in result, f"A body of exactly max_bytes is not truncated, got: {result[-200:]}"
+
+    response = _mock_streamed_response([b"<p>" + b"a" * 100] * 3)
+    with patch("tools.research_tools.requests.get", return_value=response), \
+            patch("tools.research_tools.time.monotonic", side_effect=[0, 1000, 1000, 1000]):
+        result = fetch_url_content("https://example.com/slow", max_bytes=10_000)
+    assert "the download took too long, only the first 103 bytes" in result, f"Expected the deadline reason, got: {result[-200:]}"
+    assert "10000 bytes" not in result
+
+
+def test_fetch_url_content_rejects_binary_content_type():
+    """Test that non-text downloads are refused before reading the body."""
+    response = _mock_streamed_response([b"%PDF-1.7"], content_type="application/pdf")
+
+    with patch("tools.research_tools.requests.get", return_value=response):
+        result = fetch_url_content("https://example.com/report.pdf")
+
+    assert "unsupported content type" in result, f"Expected content type error, got: {result}"
+    response.iter_content.assert_not_called()
+
+
+def test_fetch_url_content_decodes_declared_charset():
+    """Test that the page is decoded with the charset declared by the page itself."""
+    html = '<html><head><meta charset="iso-8859-1"></head><body><p>Café crème</p></body></html>'
+    encoded = html.encode("iso-8859-1")
+    response = _mock_streamed_response([encoded[:60], encoded[60:]], content_type="text/html")
+
+    with patch("tools.research_tools.requests.get", return_value=response):
+        result = fetch_url_content("https://example.com/fr")
+
+    assert "Café crème" in result, f"Expected correctly decoded text, got: {result}"
+
+
+@pytest.mark.asyncio
+async def test_multi_webpage_research_tool_tolerates_failures():
+    """Test that multi_webpage_research_tool returns every page even when one fails."""
+    def fake_fetch(url, timeout):
+        if "broken" in url:
+            raise RuntimeError("connection reset")
+        return f"content of {url}"
+
+    urls = ["https://example.com/a", "https://example.com/broken", "https://example.com/b", "https://example.com/a"]
+    with patch("tools.research_tools.fetch_url_content", side_effect=fake_fetch) as mock_fetch:
+        result = await multi_webpage_research_tool.ainvoke({"urls": urls})
+
+    assert mock_fetch.call_count == 3, "Duplicate URLs should only be fetched once"
+    assert "content of https://example.com/a" in result
+    assert "content of https://example.com/b" in result
+    assert "Error processing URL 'https://example.com/broken'" in result, f"Expected failure to be reported, got: {result}"
+
+
+@pytest.mark.asyncio
+async def test_multi_webpage_research_tool_bounds_the_download_itself():
+    """Test that the per-URL timeout is clamped and handed to the worker, which stops the download itself."""
+    with patch("tools.research_tools.fetch_url_content", return_value="page") as mock_fetch:
+        await multi_webpage_research_tool.ainvoke({"urls": ["https://example.com/a"], "timeout": 10_000})
+        await multi_webpage_research_tool.ainvoke({"urls": ["https://example.com/b"], "timeout": -5})
+    assert [call.kwargs["timeout"] for call in mock_fetch.call_args_list] == [FETCH_TOTAL_TIMEOUT, 1]
+
+    response = _mock_streamed_response([b"<p>page</p>"])
+    with patch("tools.research_tools.requests.get", return_value=response) as mock_get:
+        fetch_url_content("https://example.com/c", timeout=2)
+    assert mock_get.call_args.kwargs["timeout"] == 2, "Socket reads should not outlast the deadline"
+
+
+def test_rank_passages_keeps_relevant_passages_within_budget():
+    """Test that rank_passages returns the matching passages and respects the token budget."""
+    filler = "\n".join(f"Paragraph {i} talks about gardening, weather and cooking recipes." for i in range(400))
+    relevant = "The Eiffel Tower is 330 metres tall and was completed in 1889."
+    text = filler + "\n" + relevant + "\n" + filler
+
+    result = rank_passages(text, "How tall is the Eiffel Tower?", top_k=3, token_budget=300)
+
+    assert "330 metres" in result, f"Expected the relevant passage to be kept, got: {result[:300]}"
+    assert estimate_tokens(result) <= 350, "Result should stay close to the token budget"
+    assert estimate_tokens(result) < estimate_tokens(text) / 10, "Result should be much smaller than the page"
+
+
+def test_fetched_page_is_indexed_once():
+    """Test that the passage index built when a page is remembered is reused to rank it, for every query."""
+    research_memory.clear(DEFAULT_THREAD_ID)
+    page = "\n".join(f"Paragraph {i} about the history of lighthouses and their keepers." for i in range(300))
+    page += "\nThe Fastnet lighthouse stands 54 metres tall." + TRUNCATION_MARKER.format(reason="test")
+
+    with patch("tools.research_tools.fetch_url_content", return_value=page), \
+            patch("tools.passage_ranking.split_passages", wraps=split_passages) as mock_split:
+        first = webpage_research_tool.invoke({"url": "https://example.com/fastnet", "query": "How tall is Fastnet?"})
+        second = focus_page_content(page, "Who were the keepers?")
+
+    assert mock_split.call_count == 1, "The page should be split and indexed once"
+    assert "54 metres" in first and "Content truncated" in first and "keepers" in second
+    research_memory.clear(DEFAULT_THREAD_ID)
+
+
+def test_research_memory_ingests_pages_and_evicts():
+    """Test that fetched pages are stored per thread, retrievable, and evicted beyond the size limit."""
+    research_memory.clear(DEFAULT_THREAD_ID)
+    page = "The Eiffel Tower is 330 metres tall.\nIt was completed in 1889 for the World's Fair."
+
+    with patch("tools.research_tools.fetch_url_content", return_value=page):
+        webpage_research_tool.invoke({"url": "https://example.com/eiffel"})
+
+    result = research_memory_tool.invoke({"query": "When was the Eiffel Tower completed?"})
+    assert "1889" in result and "https://example.com/eiffel" in result, f"Expected stored page, got: {result}"
+
+    thread_memory = ThreadMemory(max_documents=2)
+    for i in range(3):
+        thread_memory.add(MemoryDocument(source=f"https://example.com/{i}", text=f"document number {i}"))
+    assert list(thread_memory.documents) == ["https://example.com/1", "https://example.com/2"], \
+        "Oldest document should be evicted first"
+
+    research_memory.clear(DEFAULT_THREAD_ID)
+
+
+def test_search_snippet_does_not_replace_fetched_page():
+    """Test that a later search snippet for an already fetched URL keeps the full page in memory."""
+    thread_memory = ThreadMemory()
+    thread_memory.add(MemoryDocument(source="https://example.com/eiffel", text="The full page about the Eiffel Tower, completed in 1889."))
+    thread_memory.add(MemoryDocument(source="https://example.com/eiffel", text="Eiffel Tower - snippet", kind="search"))
+
+    document = thread_memory.documents["https://example.com/eiffel"]
+    assert document.kind == "page"
+    assert thread_memory.search("completed 1889", top_k=1, token_budget=2000)
+
+
+def test_research_memory_tool_registered_once():
+    """Test that tools imported by another tools module are not registered twice."""
+    from agent_management import get_all_tools
+
+    names = [tool.name for tool in get_all_tools(None, "test")]
+    assert names.count("research_memory_tool") == 1
+    assert len(names) == len(set(names)), f"Duplicate tools: {names}"
+
+
+class _StubPerplexityHandler(BaseHTTPRequestHandler):
+    """Local stand-in for the Perplexity API replaying the responses scripted on the server."""
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.server.request_count += 1
+        status, body, delay = self.server.script.pop(0) if self.server.script else (200, _sse(["ok"]), 0)
+        time.sleep(delay)
+        self.send_response(status)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _sse(tokens, citations=None):
+    events = [json.dumps({"choices": [{"delta": {"content": token}}], "citations": citations or []}) for token in tokens]
+    return "".join(f"data: {event}\n\n" for event in events) + "data: [DONE]\n\n"
+
+
+@pytest.fixture
+def perplexity_stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubPerplexityHandler)
+    server.script = []
+    server.request_count = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _stub_client(server, **kwargs):
+    return PerplexityClient(api_key="test", base_url=f"http://127.0.0.1:{server.server_address[1]}",
+                            backoff_base=0.01, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_perplexity_client_streams_and_retries(perplexity_stub):
+    """Test that the client retries a 429/503, then streams tokens to the callback as they arrive."""
+    perplexity_stub.script = [
+        (429, "", 0),
+        (503, "", 0),
+        (200, _sse(["Python ", "is ", "great."], citations=["https://python.org"]), 0),
+    ]
+    client = _stub_client(perplexity_stub)
+    tokens = []
+
+    async def on_token(token):
+        tokens.append(token)
+
+    answer = await client.chat([{"role": "user", "content": "Is Python great?"}], on_token=on_token)
+
+    assert perplexity_stub.request_count == 3, "Two retryable failures should be retried"
+    assert tokens == ["Python ", "is ", "great."], f"Tokens should be forwarded as they arrive, got: {tokens}"
+    assert answer.startswith("Python is great.") and "https://python.org" in answer, f"Unexpected answer: {answer}"
+
+
+@pytest.mark.asyncio
+async def test_perplexity_client_read_timeout(perplexity_stub):
+    """Test that a hung upstream fails on the read timeout instead of pinning the caller."""
+    perplexity_stub.script = [(200, _sse(["late"]), 1.0)]
+    client = _stub_client(perplexity_stub, read_timeout=0.2, max_retries=0)
+
+    start = time.monotonic()
+    with pytest.raises(PerplexityError):
+        await client.chat([{"role": "user", "content": "hello"}])
+    assert time.monotonic() - start < 0.9, "The read timeout should cut the request short"
+
+
+@pytest.mark.asyncio
+async def test_perplexity_client_circuit_breaker_fails_fast(perplexity_stub):
+    """Test that the circuit opens after repeated failures and then rejects calls without hitting the server."""
+    perplexity_stub.script = [(500, "", 0)] * 4
+    client = _stub_client(perplexity_stub, max_retries=1, breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60))
+
+    for _ in range(2):
+        with pytest.raises(PerplexityError):
+            await client.chat([{"role": "user", "content": "hello"}])
+    assert perplexity_stub.request_count == 4
+
+    with pytest.raises(CircuitOpenError):
+        await client.chat([{"role": "user", "content": "hello"}])
+    assert perplexity_stub.request_count == 4, "An open circuit should not call the provider"
+
+
+@pytest.mark.asyncio
+async def test_perplexity_client_cancelled_trial_releases_the_circuit(perplexity_stub):
+    """Test that a half-open trial cancelled by the caller lets the next request through."""
+    perplexity_stub.script = [(200, _sse(["late"]), 1.0), (200, _sse(["ok"]), 0)]
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    client = _stub_client(perplexity_stub, breaker=breaker)
+
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(client.chat([{"role": "user", "content": "hello"}]), 0.2)
+    assert breaker.state == CircuitBreaker.HALF_OPEN and not breaker.trial_in_flight
+
+    assert await client.chat([{"role": "user", "content": "hello"}]) == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_perplexity_client_local_errors_do_not_open_the_circuit(perplexity_stub):
+    """Test that malformed chunks and on_token errors are raised without counting as provider failures."""
+    perplexity_stub.script = [(200, "data: {not json\n\n", 0), (200, _sse(["ok"]), 0)]
+    client = _stub_client(perplexity_stub, max_retries=0, breaker=CircuitBreaker(failure_threshold=1, reset_timeout=60))
+
+    with pytest.raises(PerplexityError, match="Malformed"):
+        await client.chat([{"role": "user", "content": "hello"}])
+
+    async def on_token(token):
+        raise RuntimeError("client went away")
+
+    with pytest.raises(RuntimeError):
+        await client.chat([{"role": "user", "content": "hello"}], on_token=on_token)
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_perplexity_client_client_errors_leave_the_circuit_unchanged(perplexity_stub):
+    """Test that a 4xx response is raised without a retry and without resetting the failure count."""
+    perplexity_stub.script = [(401, "unauthorized", 0)]
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    client = _stub_client(perplexity_stub, breaker=breaker)
+
+    with pytest.raises(PerplexityError, match="HTTP 401"):
+        await client.chat([{"role": "user", "content": "hello"}])
+    assert perplexity_stub.request_count == 1, "A 4xx response should not be retried"
+    assert breaker.failures == 1 and breaker.state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_perplexity_client_reuses_its_http_client(perplexity_stub):
+    """Test that all requests share one connection pool until the client is closed."""
+    client = _stub_client(perplexity_stub)
+
+    assert await client.chat([{"role": "user", "content": "hello"}]) == "ok"
+    http_client = client._client
+    assert await client.chat([{"role": "user", "content": "hello"}]) == "ok"
+    assert client._client is http_client, "Requests should reuse the same httpx client"
+
+    await client.aclose()
+    assert http_client.is_closed
+    assert await client.chat([{"role": "user", "content": "hello"}]) == "ok", "A closed client should reopen on use"
+    await client.aclose()
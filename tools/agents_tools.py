@@ -1,3 +1,5 @@
+import logging
+
 from langchain_core.messages import HumanMessage, AIMessage
 from langchain_core.tools import tool
 from langgraph.graph.graph import CompiledGraph
@@ -5,6 +7,8 @@ from langgraph.graph.graph import CompiledGraph
 from agents.coding_agent import get_coding_agent
 from agents.reasoning_agent import get_reasoning_agent
 from agents.research_agent import get_research_agent
+from agents.research_planner import run_research_pipeline
+from config import RESEARCH_MODE
 
 import chainlit as cl
 
@@ -25,13 +29,21 @@ async def research_tool(query: str) -> str:
         str: Detailed research findings including facts, analysis, and source citations.
         
     Implementation Details:
-        - Creates a new research agent instance for each invocation
-        - Formats the query as a HumanMessage for the agent
-        - Extracts and returns the final response from the agent's output
+        - With RESEARCH_MODE=pipeline (default), the question is decomposed into sub-queries
+          in one planning call, all searches, Perplexity answers and page reads run
+          concurrently, and the merged evidence is synthesized in one call
+        - With RESEARCH_MODE=agent, or if the pipeline fails, creates a new research agent
+          instance, formats the query as a HumanMessage and returns the agent's final response
         
     Example:
         result = await research_tool("What are the latest developments in quantum computing?")
     """
+    if RESEARCH_MODE == "pipeline":
+        try:
+            return await run_research_pipeline(query)
+        except Exception as e:
+            logging.error(f"Research pipeline failed, falling back to the research agent: {e}")
+
     agent:CompiledGraph = await get_research_agent()
     inputs = {"messages": [HumanMessage(content=query)]}
 
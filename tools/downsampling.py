@@ -0,0 +1,72 @@
+import numpy as np
+
+
+def minmax_indices(y: np.ndarray, buckets: int) -> np.ndarray:
+    """
+    Indices of the minimum and maximum of `y` in each of `buckets` equal slices, in order.
+
+    Keeping both extremes of every slice preserves the envelope of the series (peaks are
+    never lost), which is what a line plot shows once points are denser than pixels.
+    Assumes no NaN in `y`.
+    """
+    count = len(y)
+    if count <= 2 * buckets:
+        return np.arange(count)
+
+    # Equal-sized slices: the tail that does not fill a slice is its own bucket
+    size = count // buckets
+    body = y[:size * buckets].reshape(buckets, size)
+    offsets = np.arange(buckets) * size
+    indices = [offsets + body.argmin(axis=1), offsets + body.argmax(axis=1)]
+    if size * buckets < count:
+        tail = y[size * buckets:]
+        indices.append(np.array([size * buckets + tail.argmin(), size * buckets + tail.argmax()]))
+    return np.unique(np.concatenate(indices + [np.array([0, count - 1])]))
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: indices of `threshold` points that best keep the shape of y(x).
+
+    The first and last points are kept; in each bucket in between, the point forming the
+    largest triangle with the previously kept point and the mean of the next bucket is
+    kept. The loop runs once per output point, the work inside each bucket is vectorized.
+    Assumes `x` sorted and no NaN.
+    """
+    count = len(x)
+    if threshold >= count or threshold < 3:
+        return np.arange(count)
+
+    edges = np.linspace(1, count - 1, threshold - 1).astype(int)
+    selected = np.empty(threshold, dtype=int)
+    selected[0], selected[-1] = 0, count - 1
+    previous = 0
+
+    for bucket in range(threshold - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        next_start, next_stop = stop, edges[bucket + 2] if bucket + 2 < len(edges) else count
+        mean_x = x[next_start:next_stop].mean()
+        mean_y = y[next_start:next_stop].mean()
+
+        # Twice the triangle areas, the factor does not change the argmax
+        areas = np.abs(
+            (x[previous] - mean_x) * (y[start:stop] - y[previous])
+            - (x[previous] - x[start:stop]) * (mean_y - y[previous])
+        )
+        previous = start + int(areas.argmax())
+        selected[bucket + 1] = previous
+
+    return selected
+
+
+def downsample_line(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    """
+    Indices of about `points` samples that keep the visual shape of a line y(x).
+
+    Very long series are first reduced to the min/max of 2 * `points` buckets (vectorized),
+    then LTTB picks the final points among them. Assumes `x` sorted and no NaN.
+    """
+    if len(x) <= points:
+        return np.arange(len(x))
+    candidates = minmax_indices(y, 2 * points) if len(x) > 8 * points else np.arange(len(x))
+    return candidates[lttb_indices(x[candidates], y[candidates], points)]
@@ -0,0 +1,176 @@
+import ast
+import math
+import operator
+from fractions import Fraction
+
+import sympy
+
+
+FAST_MAX_LENGTH = 300  # longer expressions go straight to SymPy
+FAST_MAX_NODES = 200
+FAST_MAX_EXPONENT = 1024
+FAST_MAX_BITS = 4096  # size limit of exact intermediate numerators/denominators
+FAST_MIN_INEXACT = 1e-10  # inexact (float) results closer to zero are left to SymPy, which may find an exact 0
+
+
+class _Unsupported(Exception):
+    # Raised for anything the fast path does not handle: the caller then uses SymPy
+    pass
+
+
+def _exact_sqrt(value: Fraction):
+    if value >= 0:
+        numerator, denominator = math.isqrt(value.numerator), math.isqrt(value.denominator)
+        if numerator * numerator == value.numerator and denominator * denominator == value.denominator:
+            return Fraction(numerator, denominator)
+    return math.sqrt(value)
+
+
+def _log(value, base=None):
+    if value <= 0 or (base is not None and (base <= 0 or base == 1)):
+        raise _Unsupported()
+    return math.log(value) if base is None else math.log(value, base)
+
+
+def _float_function(function):
+    def wrapper(value):
+        return function(float(value))
+    return wrapper
+
+
+# Numeric functions of the calculator namespace with a direct float (or exact) equivalent
+FUNCTIONS = {
+    "sqrt": _exact_sqrt,
+    "abs": abs, "Abs": abs,
+    "exp": _float_function(math.exp),
+    "log": _log, "ln": _log,
+    "sin": _float_function(math.sin), "cos": _float_function(math.cos), "tan": _float_function(math.tan),
+    "asin": _float_function(math.asin), "acos": _float_function(math.acos), "atan": _float_function(math.atan),
+    "sinh": _float_function(math.sinh), "cosh": _float_function(math.cosh), "tanh": _float_function(math.tanh),
+}
+
+CONSTANTS = {"pi": math.pi, "E": math.e}
+
+# Trigonometric functions have exact values at rational multiples of pi (sin(pi) is 0, not 1.2e-16)
+PI_SENSITIVE_FUNCTIONS = {"sin", "cos", "tan"}
+
+
+def _check_size(value):
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            raise _Unsupported()
+    elif value.numerator.bit_length() > FAST_MAX_BITS or value.denominator.bit_length() > FAST_MAX_BITS:
+        raise _Unsupported()
+    return value
+
+
+def _contains_pi(node: ast.AST) -> bool:
+    return any(isinstance(child, ast.Name) and child.id == "pi" for child in ast.walk(node))
+
+
+def _power(base, exponent):
+    if isinstance(exponent, Fraction) and exponent.denominator == 1:
+        if abs(exponent) > FAST_MAX_EXPONENT:
+            raise _Unsupported()
+        if isinstance(base, Fraction):
+            if base == 0 and exponent < 0:
+                raise _Unsupported()
+            # Bound the size of exact results before computing them
+            if max(base.numerator.bit_length(), base.denominator.bit_length()) * abs(exponent) > FAST_MAX_BITS:
+                raise _Unsupported()
+        return base ** int(exponent)
+
+    if base < 0:
+        raise _Unsupported()  # complex result
+    if isinstance(base, Fraction) and isinstance(exponent, Fraction) and exponent.denominator == 2:
+        root = _exact_sqrt(base)
+        if isinstance(root, Fraction):
+            return _power(root, Fraction(exponent.numerator))
+    return float(base) ** float(exponent)
+
+
+BINARY_OPERATORS = {
+    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv, ast.Mod: operator.mod, ast.Pow: _power,
+}
+
+
+def _evaluate(node: ast.AST):
+    if isinstance(node, ast.Expression):
+        return _evaluate(node.body)
+
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        # Float literals are read exactly ('0.1' is 1/10), like SymPy's parser does
+        return Fraction(repr(node.value)) if isinstance(node.value, float) else Fraction(node.value)
+
+    if isinstance(node, ast.Name) and node.id in CONSTANTS:
+        return CONSTANTS[node.id]
+
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.UAdd, ast.USub)):
+        value = _evaluate(node.operand)
+        return -value if isinstance(node.op, ast.USub) else value
+
+    if isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPERATORS:
+        left, right = _evaluate(node.left), _evaluate(node.right)
+        if isinstance(node.op, (ast.Div, ast.FloorDiv, ast.Mod)) and right == 0:
+            raise _Unsupported()  # SymPy answers zoo/nan
+        if not isinstance(node.op, ast.Pow) and (isinstance(left, float) or isinstance(right, float)):
+            left, right = float(left), float(right)
+        result = BINARY_OPERATORS[type(node.op)](left, right)
+        # Fraction // Fraction is an int
+        return _check_size(Fraction(result) if isinstance(result, int) else result)
+
+    if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in FUNCTIONS
+            and not node.keywords and 1 <= len(node.args) <= 2):
+        name = node.func.id
+        if name in PI_SENSITIVE_FUNCTIONS and _contains_pi(node):
+            raise _Unsupported()
+        if len(node.args) == 2 and name not in ("log", "ln"):
+            raise _Unsupported()
+        args = [_evaluate(arg) for arg in node.args]
+        try:
+            return _check_size(FUNCTIONS[name](*args))
+        except (ValueError, OverflowError):
+            raise _Unsupported()  # out of the real domain or range: SymPy gives complex/exact answers
+
+    raise _Unsupported()
+
+
+def format_result(value) -> str:
+    """
+    Formats a fast-path result the way calculator_tool formats SymPy results (str of N()).
+    """
+    if isinstance(value, Fraction):
+        return str(sympy.N(sympy.Rational(value.numerator, value.denominator)))
+    return str(sympy.Float(value, 15))
+
+
+def fast_evaluate(expression: str) -> str | None:
+    """
+    Evaluates purely numeric expressions without SymPy.
+
+    Only numbers, pi and E, the arithmetic operators (with '^' as power) and a small
+    table of real functions are accepted. Arithmetic is exact (Fraction) until a
+    function or a fractional power needs floats. Anything else (symbols, other
+    functions, complex or undefined results, huge numbers) returns None and is left
+    to SymPy.
+
+    Args:
+        expression (str): The calculator expression.
+
+    Returns:
+        str | None: The result formatted like calculator_tool results, or None.
+    """
+    if len(expression) > FAST_MAX_LENGTH:
+        return None
+    try:
+        tree = ast.parse(expression.replace("^", "**"), mode="eval")
+        if sum(1 for _ in ast.walk(tree)) > FAST_MAX_NODES:
+            return None
+        value = _evaluate(tree)
+    except (_Unsupported, SyntaxError, ValueError, ZeroDivisionError, OverflowError, RecursionError):
+        return None
+
+    if isinstance(value, float) and abs(value) < FAST_MIN_INEXACT:
+        return None
+    return format_result(value)
@@ -0,0 +1,144 @@
+import colorsys
+
+import numpy as np
+import pandas as pd
+from matplotlib import rc_context
+from matplotlib.colors import LinearSegmentedColormap, to_rgb
+from matplotlib.figure import Figure
+
+
+# The seaborn "darkgrid" style (sns.axes_style("darkgrid")), applied without importing seaborn
+PLOT_STYLE = {
+    "figure.facecolor": "white",
+    "axes.facecolor": "#EAEAF2",
+    "axes.edgecolor": "white",
+    "axes.labelcolor": ".15",
+    "axes.grid": True,
+    "axes.axisbelow": True,
+    "grid.color": "white",
+    "grid.linestyle": "-",
+    "text.color": ".15",
+    "xtick.color": ".15",
+    "ytick.color": ".15",
+    "xtick.direction": "out",
+    "ytick.direction": "out",
+    "xtick.bottom": False,
+    "ytick.left": False,
+    "xtick.top": False,
+    "ytick.right": False,
+    "font.family": ["sans-serif"],
+    "font.sans-serif": ["Arial", "DejaVu Sans", "Liberation Sans", "Bitstream Vera Sans", "sans-serif"],
+    "lines.solid_capstyle": "round",
+    "patch.edgecolor": "w",
+    "patch.force_edgecolor": True,
+}
+
+BAR_SATURATION = 0.75  # seaborn desaturates the bar color by this factor
+BAR_MAX_LABELS = 50  # beyond, every n-th category is labelled: laying out thousands of labels takes seconds
+# Light to dark ramp of the first palette color, as seaborn colors a bivariate histogram
+HISTOGRAM_COLORMAP = LinearSegmentedColormap.from_list(
+    'histogram', ['#acc9ee', '#70b3f4', '#2c9cea', '#2f84c4', '#3a6c99', '#3d546e']
+)
+
+
+def styled_figure(figsize: tuple[float, float] = (10, 6)) -> tuple[Figure, object]:
+    """
+    Creates a figure with one set of axes in the PLOT_STYLE style.
+
+    Args:
+        figsize (tuple[float, float], optional): Size in inches. Defaults to (10, 6).
+
+    Returns:
+        tuple[Figure, Axes]: The figure and its axes.
+    """
+    with rc_context(PLOT_STYLE):
+        figure = Figure(figsize=figsize)
+        axes = figure.add_subplot()
+    return figure, axes
+
+
+def _is_continuous(column: pd.Series) -> bool:
+    return pd.api.types.is_numeric_dtype(column) or pd.api.types.is_datetime64_any_dtype(column)
+
+
+def can_draw_fast(data: pd.DataFrame, plot_type: str) -> bool:
+    """
+    Whether a plot can be drawn by draw_fast, or needs seaborn's statistics.
+
+    Seaborn is needed when repeated x values are aggregated (line and bar plots show their
+    mean and confidence interval) and for columns that are not numbers or dates.
+
+    Args:
+        data (pd.DataFrame): Table with x in the first column and y in the second.
+        plot_type (str): line, bar, scatter or histogram.
+
+    Returns:
+        bool: True if draw_fast can draw the plot.
+    """
+    if len(data.columns) < 2:
+        return False
+    x, y = data[data.columns[0]], data[data.columns[1]]
+    if not pd.api.types.is_numeric_dtype(y):
+        return False
+    if plot_type == 'line':
+        return _is_continuous(x) and x.dropna().is_unique
+    if plot_type == 'bar':
+        return x.notna().all() and x.is_unique
+    if plot_type == 'scatter':
+        return _is_continuous(x)
+    if plot_type == 'histogram':
+        return pd.api.types.is_numeric_dtype(x)
+    return False
+
+
+def _desaturate(color: str, factor: float) -> tuple[float, float, float]:
+    hue, lightness, saturation = colorsys.rgb_to_hls(*to_rgb(color))
+    return colorsys.hls_to_rgb(hue, lightness, saturation * factor)
+
+
+def draw_fast(axes, data: pd.DataFrame, plot_type: str):
+    """
+    Draws a plot that can_draw_fast accepts with matplotlib artists directly, as seaborn
+    would draw it, without its data preparation and statistics.
+
+    Args:
+        axes (Axes): Axes created by styled_figure.
+        data (pd.DataFrame): Table with x in the first column and y in the second.
+        plot_type (str): line, bar, scatter or histogram.
+
+    Raises:
+        ValueError: If the plot type is not supported.
+    """
+    x_column, y_column = data.columns[0], data.columns[1]
+    frame = data[[x_column, y_column]].dropna()
+    x, y = frame[x_column].to_numpy(), frame[y_column].to_numpy(dtype=float)
+
+    if plot_type == 'line':
+        order = np.argsort(x, kind='stable')
+        axes.plot(x[order], y[order], color='C0')
+    elif plot_type == 'bar':
+        # Categories at 0..n-1 like seaborn: numbers sorted, text in order of appearance
+        if pd.api.types.is_numeric_dtype(frame[x_column]):
+            order = np.argsort(x, kind='stable')
+            x, y = x[order], y[order]
+        positions = np.arange(len(x))
+        axes.bar(positions, y, width=0.8, color=_desaturate('C0', BAR_SATURATION))
+        step = -(-len(x) // BAR_MAX_LABELS)
+        axes.set_xticks(positions[::step], [str(value) for value in x[::step]])
+        axes.set_xlim(-0.5, len(x) - 0.5)
+        axes.xaxis.grid(False)
+    elif plot_type == 'scatter':
+        axes.scatter(x, y, s=36, color='C0', edgecolor='w', linewidth=0.48)
+    elif plot_type == 'histogram':
+        # Bivariate histogram with empty cells left blank, like seaborn's histplot(x=..., y=...)
+        x = x.astype(float)
+        counts, x_edges, y_edges = np.histogram2d(
+            x, y, bins=[np.histogram_bin_edges(x, 'auto'), np.histogram_bin_edges(y, 'auto')]
+        )
+        mesh = axes.pcolormesh(x_edges, y_edges, np.ma.masked_equal(counts.T, 0), cmap=HISTOGRAM_COLORMAP, vmin=0)
+        # Margins around the cells, as around other plots
+        mesh.sticky_edges.x[:] = []
+        mesh.sticky_edges.y[:] = []
+        axes.autoscale_view()
+    else:
+        raise ValueError(f"Unsupported plot type: {plot_type}")
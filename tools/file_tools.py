@@ -110,6 +110,32 @@ import os # Assuming standard Python environment for the tool's execution
 # This might be configured differently depending on the actual deployment.
 JARVIS_BASE_DIR = "." # Or adjust as needed
 
+
+def resolve_workspace_path(filepath: str) -> str:
+    """
+    Resolves a path relative to the Jarvis directory to an existing file inside it.
+
+    Args:
+        filepath (str): Relative path of the file, e.g. "data/sales.csv" or "./data/sales.csv".
+
+    Returns:
+        str: The absolute path of the file, symbolic links resolved.
+
+    Raises:
+        ValueError: If the path leaves the Jarvis directory, goes through a hidden file or
+                    directory (e.g. .env), or is not an existing file.
+    """
+    base = os.path.realpath(JARVIS_BASE_DIR)
+    full_path = os.path.realpath(os.path.join(base, filepath))
+    if os.path.commonpath([base, full_path]) != base:
+        raise ValueError(f"'{filepath}' is outside the Jarvis directory")
+    if any(part.startswith('.') for part in os.path.relpath(full_path, base).split(os.sep)):
+        raise ValueError(f"'{filepath}' is a hidden file or in a hidden directory")
+    if not os.path.isfile(full_path):
+        raise ValueError(f"'{filepath}' is not a file")
+    return full_path
+
+
 @tool
 async def write_file_tool(
     filename: str,
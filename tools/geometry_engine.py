@@ -0,0 +1,270 @@
+import os
+import functools
+
+import numpy as np
+import shapely
+from matplotlib.collections import LineCollection, PolyCollection
+
+GEOMETRY_MAX_SHAPES = int(os.getenv("GEOMETRY_MAX_SHAPES", 20_000))
+GEOMETRY_SUMMARY_ITEMS = 20  # shapes and pairs listed in a summary, the totals cover all of them
+SHAPE_KINDS = ("point", "line", "polygon", "circle")
+MIN_COORDINATES = {"point": 1, "line": 2, "polygon": 3, "circle": 1}
+CIRCLE_SEGMENTS = 16  # per quarter circle, as Shapely's default buffer
+
+_COLORS = {"point": "red", "line": "blue", "polygon": "green", "circle": "purple"}
+
+
+def _round(value) -> float:
+    return round(float(value), 6)
+
+
+class GeometryScene:
+    """
+    The shapes of a figure as one Shapely 2 array, with vectorized measures and an STRtree
+    spatial index for pairwise queries (intersections, containment, nearest shapes), so
+    that scenes of thousands of primitives never compare every pair of shapes.
+    """
+
+    def __init__(self, kinds: np.ndarray, geometries: np.ndarray):
+        self.kinds = kinds
+        self.geometries = geometries
+        shapely.prepare(self.geometries)  # predicates against the tree reuse prepared geometries
+        self.tree = shapely.STRtree(self.geometries)
+
+    @classmethod
+    def from_arrays(cls, kinds, coordinates: np.ndarray, counts, radii=None) -> "GeometryScene":
+        """
+        Builds a scene with one vectorized Shapely call per kind of shape.
+
+        Args:
+            kinds: Kind of each shape (see SHAPE_KINDS).
+            coordinates (np.ndarray): (x, y) rows of every shape, one shape after the other.
+            counts: Number of coordinate rows of each shape.
+            radii (optional): Radius of each shape, used by circles.
+
+        Returns:
+            GeometryScene: The scene.
+
+        Raises:
+            ValueError: If there are no shapes or too many, or a shape lacks coordinates.
+        """
+        kinds = np.asarray(kinds, dtype=object)
+        counts = np.asarray(counts, dtype=int)
+        coordinates = np.asarray(coordinates, dtype=float).reshape(-1, 2)
+        radii = np.full(len(kinds), np.nan) if radii is None else np.asarray(radii, dtype=float)
+        if len(kinds) == 0:
+            raise ValueError("The scene has no shapes.")
+        if len(kinds) > GEOMETRY_MAX_SHAPES:
+            raise ValueError(f"The scene has {len(kinds)} shapes, the limit is {GEOMETRY_MAX_SHAPES}.")
+        unknown = set(kinds) - set(SHAPE_KINDS)
+        if unknown:
+            raise ValueError(f"Unknown shape kind(s): {', '.join(sorted(map(str, unknown)))}.")
+        needed = np.array([MIN_COORDINATES[kind] for kind in kinds])
+        short = np.flatnonzero(counts < needed)
+        if len(short):
+            i = short[0]
+            raise ValueError(f"Shape {i + 1} ({kinds[i]}) needs at least {needed[i]} coordinate(s), got {counts[i]}.")
+        circles = kinds == "circle"
+        if not (radii[circles] > 0).all():
+            raise ValueError("A circle needs a positive radius.")
+
+        owner = np.repeat(np.arange(len(kinds)), counts)
+        first = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        geometries = np.empty(len(kinds), dtype=object)
+        for kind in SHAPE_KINDS:
+            selected = np.flatnonzero(kinds == kind)
+            if not len(selected):
+                continue
+            if kind == "point":
+                geometries[selected] = shapely.points(coordinates[first[selected]])
+            elif kind == "circle":
+                geometries[selected] = shapely.buffer(shapely.points(coordinates[first[selected]]), radii[selected],
+                                                      quad_segs=CIRCLE_SEGMENTS)
+            else:
+                rows = kinds[owner] == kind
+                # indices must be sorted and contiguous: rank of each row's shape among the selected ones
+                indices = np.searchsorted(selected, owner[rows])
+                if kind == "line":
+                    geometries[selected] = shapely.linestrings(coordinates[rows], indices=indices)
+                else:
+                    geometries[selected] = shapely.polygons(shapely.linearrings(coordinates[rows], indices=indices))
+        return cls(kinds, geometries)
+
+    @classmethod
+    def from_shapes(cls, shapes) -> "GeometryScene":
+        """
+        Builds a scene from parsed shapes (objects with kind, coordinates of x and y, and radius).
+        """
+        return cls.from_arrays(
+            [shape.kind for shape in shapes],
+            [(c.x, c.y) for shape in shapes for c in shape.coordinates],
+            [len(shape.coordinates) for shape in shapes],
+            [shape.radius if shape.radius is not None else np.nan for shape in shapes],
+        )
+
+    def __len__(self) -> int:
+        return len(self.geometries)
+
+    @property
+    def collection(self):
+        """The single shape, or a GeometryCollection of all shapes."""
+        return self.geometries[0] if len(self) == 1 else shapely.geometrycollections(self.geometries)
+
+    def areas(self) -> np.ndarray:
+        return shapely.area(self.geometries)
+
+    def lengths(self) -> np.ndarray:
+        """Length of lines, perimeter of polygons and circles, 0 for points."""
+        return shapely.length(self.geometries)
+
+    def union(self):
+        """Union of all shapes (overlapping areas are counted once)."""
+        return shapely.union_all(self.geometries)
+
+    @functools.cached_property
+    def _intersecting(self) -> tuple[np.ndarray, np.ndarray]:
+        # One STRtree query for every pairwise measure, each pair once
+        left, right = self.tree.query(self.geometries, predicate="intersects")
+        keep = left < right
+        return left[keep], right[keep]
+
+    @functools.cached_property
+    def _overlaps(self) -> tuple[np.ndarray, np.ndarray]:
+        # The intersections and their areas, computed once for the summary and the drawing of the scene
+        left, right = self._intersecting
+        overlaps = shapely.intersection(self.geometries[left], self.geometries[right])
+        return overlaps, shapely.area(overlaps)
+
+    def intersections(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Pairs of intersecting shapes, each pair once, found through the STRtree.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray]: First shapes, second shapes and their intersections.
+        """
+        left, right = self._intersecting
+        return left, right, self._overlaps[0]
+
+    def overlap_areas(self) -> np.ndarray:
+        """Areas of the intersections, in the order of `intersections`."""
+        return self._overlaps[1]
+
+    def containments(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Pairs (container, contained) of distinct shapes, tested on the intersecting pairs only
+        (a "contains" tree query would also test every shape against itself).
+        """
+        left, right = self._intersecting
+        first, second = self.geometries[left], self.geometries[right]
+        forward, backward = shapely.contains(first, second), shapely.contains(second, first)
+        return np.concatenate((left[forward], right[backward])), np.concatenate((right[forward], left[backward]))
+
+    def nearest(self, shapes=None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Nearest other shape of each shape and the distance to it, 0 when they touch.
+
+        Args:
+            shapes (optional): Indices of the shapes to look up. Defaults to all of them.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Index of the nearest shape (-1 when alone) and the distance.
+        """
+        shapes = np.arange(len(self)) if shapes is None else np.asarray(shapes, dtype=int)
+        nearest, distance = np.full(len(shapes), -1), np.full(len(shapes), np.nan)
+        if len(self) == 1 or not len(shapes):
+            return nearest, distance
+        (source, target), distances = self.tree.query_nearest(
+            self.geometries[shapes], return_distance=True, exclusive=True, all_matches=False
+        )
+        # exclusive only skips equal geometries: a shape is never its own neighbour, duplicates are at 0
+        nearest[source], distance[source] = target, distances
+        return nearest, distance
+
+    def distance(self, first: int, second: int) -> float:
+        return float(shapely.distance(self.geometries[first], self.geometries[second]))
+
+    def summary(self, max_items: int = GEOMETRY_SUMMARY_ITEMS) -> dict:
+        """
+        Measures of the scene for the model: per shape (the first max_items), totals, and the
+        first max_items intersecting and containing pairs. Shapes are numbered from 1.
+        """
+        areas, lengths = self.areas(), self.lengths()
+        left, right, _ = self.intersections()
+        containers, contained = self.containments()
+        listed = min(len(self), max_items)
+        nearest, distances = self.nearest(np.arange(listed))  # the nearest searches dominate: only listed shapes
+        overlap_areas = self.overlap_areas()
+        return {
+            "shapes": [
+                {"shape": i + 1, "kind": self.kinds[i], "area": _round(areas[i]), "length": _round(lengths[i]),
+                 "nearest": int(nearest[i]) + 1 if nearest[i] >= 0 else None,
+                 "distance_to_nearest": _round(distances[i]) if nearest[i] >= 0 else None}
+                for i in range(listed)
+            ],
+            "shape_count": len(self),
+            "total_area": _round(areas.sum()),
+            "union_area": _round(shapely.area(self.union())),
+            "intersecting_pairs": len(left),
+            "intersections": [
+                {"shapes": [int(a) + 1, int(b) + 1], "area": _round(area)}
+                for a, b, area in zip(left[:max_items], right[:max_items], overlap_areas[:max_items])
+            ],
+            "containing_pairs": len(containers),
+            "containments": [
+                {"container": int(a) + 1, "contained": int(b) + 1}
+                for a, b in zip(containers[:max_items], contained[:max_items])
+            ],
+        }
+
+
+def _rings(geometries: np.ndarray) -> list[np.ndarray]:
+    # Exterior rings of polygons (and of the parts of multipolygons) as vertex arrays
+    exteriors = shapely.get_exterior_ring(shapely.get_parts(geometries))
+    return _split_coordinates(exteriors)
+
+
+def _split_coordinates(geometries: np.ndarray) -> list[np.ndarray]:
+    coordinates, index = shapely.get_coordinates(geometries, return_index=True)
+    if not len(coordinates):
+        return []
+    return np.split(coordinates, np.flatnonzero(np.diff(index)) + 1)
+
+
+def draw_scene(axes, scene: GeometryScene, show_intersections: bool = True):
+    """
+    Draws a scene with one matplotlib collection per kind of shape (instead of one artist
+    per shape), the overlaps of intersecting areas highlighted, and equal axis scales.
+
+    Args:
+        axes (Axes): The axes to draw on.
+        scene (GeometryScene): The scene.
+        show_intersections (bool, optional): Highlights overlapping areas. Defaults to True.
+    """
+    axes.set_aspect('equal')  # Ensure equal aspect ratio for accurate representation
+    for kind in ("polygon", "circle"):
+        selected = scene.geometries[scene.kinds == kind]
+        if len(selected):
+            filled = kind == "polygon"
+            axes.add_collection(PolyCollection(
+                _rings(selected), facecolors=_COLORS[kind] if filled else "none", alpha=0.5 if filled else 1,
+                edgecolors="black" if filled else _COLORS[kind], linewidths=1,
+            ))
+    lines = scene.geometries[scene.kinds == "line"]
+    if len(lines):
+        axes.add_collection(LineCollection(_split_coordinates(lines), colors=_COLORS["line"], linewidths=1.5))
+    points = scene.geometries[scene.kinds == "point"]
+    if len(points):
+        x, y = shapely.get_coordinates(points).T
+        axes.scatter(x, y, color=_COLORS["point"], s=20 if len(points) < 1000 else 4, zorder=3)
+
+    if show_intersections:
+        # The intersections measured by the summary are reused, not computed again
+        _, _, overlaps = scene.intersections()
+        overlaps = overlaps[scene.overlap_areas() > 0]
+        if len(overlaps):
+            axes.add_collection(PolyCollection(_rings(overlaps), facecolors="orange", alpha=0.6, edgecolors="none"))
+
+    x_min, y_min, x_max, y_max = shapely.total_bounds(scene.geometries)
+    margin = max(1.0, 0.05 * max(x_max - x_min, y_max - y_min))
+    axes.set_xlim(x_min - margin, x_max + margin)
+    axes.set_ylim(y_min - margin, y_max + margin)
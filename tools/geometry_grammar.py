@@ -0,0 +1,216 @@
+import re
+import unicodedata
+
+
+# Shape words (English, French, Spanish, German, without accents) and the kind of shape they start
+_KIND_WORDS = {
+    **dict.fromkeys(["point", "points", "dot", "dots", "punto", "puntos", "punkt", "punkte", "punkten"], "point"),
+    **dict.fromkeys(["line", "segment", "polyline", "path", "ligne", "polyligne", "linea", "segmento", "polilinea",
+                     "linie", "strecke", "streckenzug", "polylinie"], "line"),
+    **dict.fromkeys(["circle", "disk", "disc", "cercle", "disque", "circulo", "circunferencia", "kreis"], "circle"),
+    **dict.fromkeys(["polygon", "polygone", "poligono", "vieleck", "triangle", "triangulo", "dreieck",
+                     "quadrilateral", "quadrilatere", "cuadrilatero", "viereck", "square", "carre", "cuadrado",
+                     "quadrat", "rectangle", "rectangulo", "rechteck", "pentagon", "pentagone", "pentagono",
+                     "funfeck", "hexagon", "hexagone", "hexagono", "sechseck"], "polygon"),
+}
+_VERTEX_COUNTS = {
+    **dict.fromkeys(["triangle", "triangulo", "dreieck"], 3),
+    **dict.fromkeys(["quadrilateral", "quadrilatere", "cuadrilatero", "viereck"], 4),
+    **dict.fromkeys(["pentagon", "pentagone", "pentagono", "funfeck"], 5),
+    **dict.fromkeys(["hexagon", "hexagone", "hexagono", "sechseck"], 6),
+}
+# Axis-aligned shapes that may be given by two opposite corners
+_SQUARE_WORDS = {"square", "carre", "cuadrado", "quadrat"}
+_RECTANGLE_WORDS = {"rectangle", "rectangulo", "rechteck"} | _SQUARE_WORDS
+_ORIGIN_WORDS = {"origin", "origine", "origen", "ursprung", "nullpunkt"}
+_CALCULATE_WORDS = {
+    "area", "perimeter", "length", "distance", "intersection", "union", "calculate", "compute", "measure",
+    "aire", "surface", "perimetre", "longueur", "calcule", "calculer", "mesure",
+    "superficie", "perimetro", "longitud", "distancia", "interseccion", "calcula", "calcular",
+    "flache", "umfang", "lange", "abstand", "schnittmenge", "berechne", "berechnen",
+}
+_QUERY_WORDS = {
+    "what", "which", "how", "does", "do", "inside", "contains", "contain", "intersect", "intersects", "overlap",
+    "overlaps", "quel", "quelle", "quels", "combien", "dans", "contient", "cual", "cuales", "cuanto", "dentro",
+    "contiene", "was", "welche", "welcher", "wie", "innerhalb", "enthalt", "schneidet",
+}
+# Words that carry no information for the shapes: anything else sends the description to the LLM
+_FILLER_WORDS = {
+    # English
+    "a", "an", "the", "at", "from", "to", "through", "via", "with", "and", "of", "on", "in", "is", "are", "its",
+    "it", "has", "having", "whose", "then", "also", "plus", "another", "draw", "plot", "show", "create", "make",
+    "sketch", "please", "me", "center", "centre", "centered", "centred", "vertex", "vertices", "corner", "corners",
+    "coordinates", "coords", "located", "placed", "positioned", "going", "passing", "connecting", "joining",
+    "between", "by", "be", "there", "both", "all", "them", "these", "those", "each", "other", "shapes",
+    # French
+    "un", "une", "le", "la", "les", "l", "de", "du", "des", "d", "en", "au", "aux", "a", "et", "avec", "puis",
+    "par", "passant", "reliant", "dessine", "dessiner", "trace", "tracer", "affiche", "montre", "sommet",
+    "sommets", "coin", "coins", "est", "sont", "son", "sa", "ses", "centree", "situe", "entre",
+    # Spanish
+    "uno", "una", "unos", "unas", "el", "los", "las", "al", "del", "desde", "hasta", "y", "con", "por", "dibuja",
+    "dibujar", "traza", "trazar", "muestra", "centro", "centrado", "vertice", "vertices", "esquina", "esquinas",
+    "su", "sus", "es", "son", "entre",
+    # German
+    "ein", "eine", "einen", "einem", "einer", "der", "die", "das", "den", "dem", "des", "bei", "von", "nach",
+    "bis", "und", "mit", "durch", "zeichne", "zeichnen", "zeige", "mittelpunkt", "zentrum", "ecke", "ecken",
+    "eckpunkt", "eckpunkte", "eckpunkten", "ist", "sind", "sein", "seine", "zwischen", "um", "im",
+}
+_SIZE_WORDS = {"radius": 1, "rayon": 1, "radio": 1, "r": 1,
+               "diameter": 2, "diametre": 2, "diametro": 2, "durchmesser": 2}
+
+_NUMBER = r"[-+]?\d+(?:\.\d+)?"
+_DECIMAL_COMMA_NUMBER = r"[-+]?\d+(?:[.,]\d+)?"
+_TOKEN_PATTERN = re.compile(rf"""
+    (?P<size>\b(?P<size_word>{'|'.join(_SIZE_WORDS)})\b
+        (?:\s+(?:of|de|von|is|est|es|ist|egal\s+a|equal\s+to|gleich))?\s*[=:]?\s*(?P<size_value>{_DECIMAL_COMMA_NUMBER}))
+  | \(\s*(?P<semicolon_x>{_DECIMAL_COMMA_NUMBER})\s*;\s*(?P<semicolon_y>{_DECIMAL_COMMA_NUMBER})\s*\)
+  | [(\[]\s*(?P<bracket_x>{_NUMBER})\s*,?\s*(?P<bracket_y>{_NUMBER})\s*[)\]]
+  | (?<![\w.])(?P<x>{_NUMBER})\s*[,;]\s*(?P<y>{_NUMBER})(?![\w.])
+  | (?P<number>\d)
+  | (?P<word>[a-z]+)
+  | (?P<question>\?)
+""", re.VERBOSE)
+
+
+class _Unsupported(Exception):
+    # Raised for anything the grammar does not handle: the caller then asks the LLM
+    pass
+
+
+def _normalize(description: str) -> str:
+    # Lower case without accents (Fläche -> flache, círculo -> circulo), unicode minus signs as '-'
+    text = unicodedata.normalize("NFKD", description.lower().replace("−", "-"))
+    return "".join(character for character in text if not unicodedata.combining(character))
+
+
+def _tokens(text: str):
+    for match in _TOKEN_PATTERN.finditer(text):
+        groups = match.groupdict()
+        if groups["size"]:
+            yield "size", float(groups["size_value"].replace(",", ".")) / _SIZE_WORDS[groups["size_word"]]
+        elif groups["semicolon_x"]:
+            yield "pair", (float(groups["semicolon_x"].replace(",", ".")), float(groups["semicolon_y"].replace(",", ".")))
+        elif groups["bracket_x"]:
+            yield "pair", (float(groups["bracket_x"]), float(groups["bracket_y"]))
+        elif groups["x"]:
+            yield "pair", (float(groups["x"]), float(groups["y"]))
+        elif groups["number"]:
+            raise _Unsupported()  # a number that is not part of a coordinate or a size
+        elif groups["word"]:
+            yield "word", groups["word"]
+        else:
+            yield "question", "?"
+
+
+def _finish(shape: dict) -> list[dict]:
+    kind, word, pairs, radius = shape["kind"], shape["word"], shape["pairs"], shape["radius"]
+    if kind == "point":
+        if not pairs:
+            raise _Unsupported()
+        return [{"kind": "point", "coordinates": [pair]} for pair in pairs]  # "points at 1,1 and 2,2"
+    if kind == "line":
+        if len(pairs) < 2:
+            raise _Unsupported()
+    elif kind == "circle":
+        if len(pairs) != 1 or radius is None or radius <= 0:
+            raise _Unsupported()
+    elif word in _RECTANGLE_WORDS and len(pairs) == 2:
+        (x0, y0), (x1, y1) = pairs
+        if x0 == x1 or y0 == y1 or (word in _SQUARE_WORDS and abs(x1 - x0) != abs(y1 - y0)):
+            raise _Unsupported()
+        pairs = [(x0, y0), (x1, y0), (x1, y1), (x0, y1)]
+    else:
+        expected = _VERTEX_COUNTS.get(word, 4 if word in _RECTANGLE_WORDS else None)
+        if len(pairs) < 3 or (expected is not None and len(pairs) != expected):
+            raise _Unsupported()
+    return [{"kind": kind, "coordinates": pairs, "radius": radius}]
+
+
+def parse_geometry_grammar(description: str) -> dict | None:
+    """
+    Parses common descriptions of shapes with explicit coordinates without the LLM.
+
+    Recognized: points, lines and polylines, polygons (triangles, squares, ... by their
+    vertices; squares and rectangles also by two opposite corners) and circles by their
+    center and radius or diameter, in English, French, Spanish or German, e.g. "a line from
+    0,0 to 5,5", "un cercle de centre (2; 3) et de rayon 1,5", "Dreieck mit den Ecken 0,0
+    4,0 und 2,3". Every word and number must be understood: anything else (a size without
+    coordinates, a constraint, a modification, numbers in words...) returns None and is
+    left to the LLM.
+
+    Args:
+        description (str): A textual description of the geometric figure.
+
+    Returns:
+        dict | None: The intent and the shapes, as GeometryRequest fields, or None.
+    """
+    shapes, current = [], None
+    calculate = query = False
+    try:
+        for token, value in _tokens(_normalize(description)):
+            if token == "pair" or (token == "word" and value in _ORIGIN_WORDS):
+                if current is None:
+                    raise _Unsupported()
+                current["pairs"].append(value if token == "pair" else (0.0, 0.0))
+            elif token == "size":
+                if current is None or current["kind"] != "circle" or current["radius"] is not None:
+                    raise _Unsupported()
+                current["radius"] = value
+            elif token == "question":
+                query = True
+            elif value in _KIND_WORDS:
+                # "a polygon with the points ...": point words name the vertices of a shape still without any
+                if _KIND_WORDS[value] == "point" and current and current["kind"] != "point" and not current["pairs"]:
+                    continue
+                # "a square polygon": one shape, named by its most specific word
+                if current and current["kind"] == _KIND_WORDS[value] and not current["pairs"]:
+                    if value in _VERTEX_COUNTS or value in _RECTANGLE_WORDS:
+                        current["word"] = value
+                    continue
+                current = {"kind": _KIND_WORDS[value], "word": value, "pairs": [], "radius": None}
+                shapes.append(current)
+            elif value in _CALCULATE_WORDS:
+                calculate = True
+            elif value in _QUERY_WORDS:
+                query = True
+            elif value not in _FILLER_WORDS:
+                raise _Unsupported()
+        shapes = [finished for shape in shapes for finished in _finish(shape)]
+    except _Unsupported:
+        return None
+    if not shapes:
+        return None
+
+    return {
+        "intent": "calculate" if calculate else "query" if query else "draw",
+        "shapes": [
+            {"kind": shape["kind"], "coordinates": [{"x": x, "y": y} for x, y in shape["coordinates"]],
+             "radius": shape.get("radius")}
+            for shape in shapes
+        ],
+    }
+
+
+class GrammarStats:
+    """Counts descriptions parsed by the grammar and estimates the LLM time they saved."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.llm_calls = 0
+        self.llm_seconds = 0.0
+
+    def record_llm_call(self, seconds: float):
+        self.llm_calls += 1
+        self.llm_seconds += seconds
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        # Saved time is estimated with the mean latency of the LLM calls made so far
+        mean = self.llm_seconds / self.llm_calls if self.llm_calls else None
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "llm_seconds_saved": self.hits * mean if mean is not None else None,
+        }
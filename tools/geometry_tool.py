@@ -1,256 +1,231 @@
-from shapely.geometry import Point, LineString, Polygon
-from shapely.affinity import scale
-import matplotlib.pyplot as plt
-from matplotlib.patches import Polygon as mplPolygon, Circle as mplCircle
+from matplotlib.figure import Figure
 import io
+import os
+import time
+import asyncio
+import functools
 import chainlit as cl
-from PIL import Image  # Ensure you have Pillow installed: pip install Pillow
-from langchain_openai import ChatOpenAI  # Or your preferred Chat model
-from langchain.prompts import ChatPromptTemplate
-from typing import Dict, Any
+from langchain_core.tools import tool
+from pydantic import BaseModel, Field
+from typing import Dict, Any, Literal
 import logging
 
 from models.models import get_google_model
+from tools.geometry_engine import GeometryScene, draw_scene
+from tools.geometry_grammar import parse_geometry_grammar, GrammarStats
+from tools.image_encoding import encode_figure, sniff_format, MIME_TYPES, EXTENSIONS
+from tools.math_tools import ResultCache
+from utils import load_prompt
 
-# Initialize LLM (replace with your actual model and API key)
-llm = get_google_model(streaming=False)
+GEOMETRY_CACHE_SIZE = int(os.getenv("GEOMETRY_CACHE_SIZE", 256))  # parsed descriptions kept in memory
 
-def generate_geometry(description: str, visualization_backend: str = 'matplotlib') -> Dict[str, Any]:
+
+class Coordinate(BaseModel):
+    x: float
+    y: float
+
+
+class GeometryShape(BaseModel):
+    """One shape of a geometric figure, with its actual coordinates."""
+    kind: Literal["point", "line", "polygon", "circle"]
+    coordinates: list[Coordinate] = Field(
+        description="The point; the line vertices in order; the polygon vertices in order; or the circle center"
+    )
+    radius: float | None = Field(default=None, description="Radius of a circle, otherwise null")
+
+
+class GeometryRequest(BaseModel):
+    """What the user wants done with a geometric figure, and its shapes."""
+    intent: Literal["draw", "modify", "calculate", "query"]
+    shapes: list[GeometryShape] = Field(description="Every shape of the figure, in the order they are described")
+
+
+@functools.lru_cache(maxsize=1)
+def get_geometry_model():
+    # Created on first use: importing the tool does not need model credentials
+    return get_google_model(streaming=False)
+
+
+geometry_cache = ResultCache(max_size=GEOMETRY_CACHE_SIZE)
+grammar_stats = GrammarStats()
+
+
+async def parse_geometry_description(description: str) -> GeometryRequest:
     """
-    Generates geometric objects using Shapely and visualizes them with Matplotlib,
-    leveraging LLMs for NLU.
+    Parses a description into its intent and shapes.
+
+    Common phrasings with explicit coordinates are parsed by a grammar (see
+    parse_geometry_grammar), without the LLM. Other descriptions take a single
+    structured-output LLM call; repeated ones (ignoring case and spacing) are served
+    from geometry_cache.
 
     Args:
         description (str): A textual description of the geometric figure.
-        visualization_backend (str): 'matplotlib' or 'plotly'. Specifies the visualization library.
 
     Returns:
-        Dict[str, Any]: A dictionary containing the status, message, Shapely geometry object, and plot data as an io.BytesIO object.
-    """
-    print(f"Received description: {description}")
-    print(f"Visualization backend: {visualization_backend}")
-
-    if visualization_backend not in ['matplotlib', 'plotly']:
-        return {'status': 'failure', 'message': f'Invalid visualization backend: {visualization_backend}. Must be "matplotlib" or "plotly".', 'geometry_object': None, 'plot_data': None}
-
-    # 1. Intent Detection (LLM)
-    try:
-        intent_prompt_template = ChatPromptTemplate.from_template(
-            "Classify the intent of the following user input: '{user_input}'. "
-            "Possible intents: draw, modify, calculate, query. "
-            "Return ONLY the intent name."
-        )
-        intent_prompt = intent_prompt_template.format_messages(user_input=description)
-        intent = llm.invoke(intent_prompt).content.strip()
-        print(f"LLM Intent: {intent}")
-    except Exception as e:
-        logging.error(f"Error during intent detection: {e}")
-        return {'status': 'failure', 'message': f'Failed to detect intent: {e}', 'geometry_object': None, 'plot_data': None}
+        GeometryRequest: The intent and the shapes with their coordinates.
 
-    # 2. Entity Extraction (LLM)
-    try:
-        entity_prompt_template = ChatPromptTemplate.from_template(
-            "Extract the key entities from the following geometric description: '{user_input}'. "
-            "Entities to extract: shape, dimensions, position, relationship, equation. "
-            "Return a JSON object with the extracted entities."
-        )
-        entity_prompt = entity_prompt_template.format_messages(user_input=description)
-        entities_json = llm.invoke(entity_prompt).content.strip()
-        print(f"LLM Entities JSON: {entities_json}")
+    Raises:
+        ValueError: If the model returned no shapes.
+    """
+    start = time.perf_counter()
+    parsed = parse_geometry_grammar(description)
+    if parsed is not None:
+        grammar_stats.hits += 1
+        logging.info(f"Geometry description parsed by the grammar in {(time.perf_counter() - start) * 1000:.2f}ms"
+                     f" - {grammar_stats.stats()}")
+        return GeometryRequest.model_validate(parsed)
+    grammar_stats.misses += 1
+
+    key = " ".join(description.lower().split())
+    request = geometry_cache.get(key)
+    if request is not None:
+        logging.debug(f"Geometry description served from cache - {geometry_cache.stats()}")
+        return request
+
+    start = time.perf_counter()
+    model = get_geometry_model().with_structured_output(GeometryRequest)
+    request = await model.ainvoke(load_prompt("geometry", description=description))
+    seconds = time.perf_counter() - start
+    grammar_stats.record_llm_call(seconds)
+    logging.info(f"Geometry description parsed by the LLM in {seconds:.2f}s - {grammar_stats.stats()}")
+    if request is None or not request.shapes:
+        raise ValueError("No shape found in the description.")
+
+    geometry_cache.put(key, request)
+    return request
+
+
+def render_geometry(scene: GeometryScene, title: str) -> bytes:
+    """
+    Draws the whole scene on one figure (see draw_scene), without pyplot so that it can run
+    in a thread, and encodes the image (see encode_figure).
+    """
+    figure = Figure()
+    ax = figure.add_subplot()
+    draw_scene(ax, scene)
+    ax.set_title(f"Plot of: {title}")
+    return encode_figure(figure).data
 
-        # Parse the JSON (you'll need to handle potential JSON parsing errors)
-        import json
-        entities = json.loads(entities_json)
 
-    except Exception as e:
-        logging.error(f"Error during entity extraction: {e}")
-        return {'status': 'failure', 'message': f'Failed to extract entities: {e}', 'geometry_object': None, 'plot_data': None}
+def build_geometry(request: GeometryRequest, title: str) -> Dict[str, Any]:
+    """
+    Creates the shapes of a parsed request, measures them (see GeometryScene.summary) and
+    draws them (see render_geometry). Runs in a thread: building the STRtree, the pairwise
+    measures and the figure are all CPU-bound, and the figure reuses the measured intersections.
 
-    # 3.  Basic Parsing based on LLM output (can be improved)
-    parsed_info = {}
-    try:
-        print("Step 1: Parsing description (LLM-assisted)...")
-        # Simulate extracting some basic info based on keywords - THIS IS NOT REAL NLU
-        if "shape" in entities and entities["shape"] == "point":
-            parsed_info = {'type': 'point', 'coords': [(0, 0)]} # Dummy data
-        elif "shape" in entities and entities["shape"] == "line":
-            parsed_info = {'type': 'line', 'coords': [(0, 0), (1, 1)]} # Dummy data
-        elif "shape" in entities and entities["shape"] == "polygon":
-             parsed_info = {'type': 'polygon', 'coords': [(0, 0), (1, 0), (1, 1), (0,1)]} # Dummy data
-        elif "shape" in entities and entities["shape"] == "circle":
-             parsed_info = {'type': 'circle', 'center': (0,0), 'radius': 1} # Dummy data
-        else:
-             raise ValueError("Could not determine figure type from description.")
-        print(f"Parsed Info (Simulated): {parsed_info}")
-        # --- End NLU Placeholder ---
-    except Exception as e:
-        logging.error(f"Error during parsing placeholder: {e}")
-        return {'status': 'failure', 'message': f'Failed to parse description: {e}', 'geometry_object': None, 'plot_data': None}
+    Args:
+        request (GeometryRequest): The parsed description.
+        title (str): The description, used as the figure title.
 
-     # 4. Creating geometric objects (Shapely)
-    geometry_object = None
+    Returns:
+        Dict[str, Any]: The result of generate_geometry.
+    """
+    # 2. Creating geometric objects and measuring them (Shapely arrays, STRtree for pairs)
     try:
-        # --- Shapely Implementation ---
-        print("Step 2: Creating geometry object (Shapely)...")
-        if parsed_info:
-            if parsed_info['type'] == 'point':
-                geometry_object = Point(parsed_info['coords'][0])
-            elif parsed_info['type'] == 'line':
-                geometry_object = LineString(parsed_info['coords'])
-            elif parsed_info['type'] == 'polygon':
-                geometry_object = Polygon(parsed_info['coords'])
-            elif parsed_info['type'] == 'circle':
-                # Shapely doesn't have a native Circle type, represent as a buffered Point
-                center_point = Point(parsed_info['center'])
-                geometry_object = center_point.buffer(parsed_info['radius'])
-            else:
-                raise ValueError("Unsupported geometry type.")
-
-            print(f"Geometry Object (Shapely): {geometry_object}")
-        else:
-            raise ValueError("Parsing step did not yield results.")
-        # --- End Shapely Implementation ---
+        scene = GeometryScene.from_shapes(request.shapes)
+        geometry_object = scene.collection
+        measures = scene.summary()
     except Exception as e:
         logging.error(f"Error during geometry creation: {e}")
         return {'status': 'failure', 'message': f'Failed to create geometry object: {e}', 'geometry_object': None, 'plot_data': None}
 
-    # 5. Generating a plot (matplotlib)
-    plot_data = None
+    # 3. Generating a plot (matplotlib)
     try:
-        # --- Matplotlib Implementation ---
-        print("Step 3: Generating plot details using Matplotlib...")
-        if geometry_object:
-            fig, ax = plt.subplots()
-            ax.set_aspect('equal')  # Ensure equal aspect ratio for accurate representation
-
-            if isinstance(geometry_object, Point):
-                x, y = geometry_object.x, geometry_object.y
-                ax.plot(x, y, 'o', color='red')
-            elif isinstance(geometry_object, LineString):
-                x, y = geometry_object.xy
-                ax.plot(x, y, color='blue')
-            elif isinstance(geometry_object, Polygon):
-                x, y = geometry_object.exterior.xy
-                ax.fill(x, y, alpha=0.5, fc='green', ec='black')
-            elif hasattr(geometry_object, 'exterior'):  # Handle circles (buffered points)
-                x, y = geometry_object.exterior.xy
-                ax.plot(x, y, color='purple')
-                # Alternative for circle:
-                # circle = mplCircle(Point(parsed_info['center']).coords[0], radius=parsed_info['radius'], alpha=0.3, fc='lightblue', ec='blue')
-                # ax.add_patch(circle)
-
-            # Set plot limits (crude, but functional)
-            bounds = geometry_object.bounds
-            x_min, y_min, x_max, y_max = bounds
-            x_range = [x_min - 1, x_max + 1]
-            y_range = [y_min - 1, y_max + 1]
-            ax.set_xlim(x_range)
-            ax.set_ylim(y_range)
-
-            ax.set_title(f"Plot of: {description}")
-
-            # Save the plot to a BytesIO object
-            buf = io.BytesIO()
-            plt.savefig(buf, format='png')
-            buf.seek(0)
-            plot_data = buf  # Store the BytesIO object itself
-            plt.close(fig) # close the figure
-
-            print(f"Plot Details (Matplotlib): Plot saved to BytesIO object")
-        else:
-             raise ValueError("Geometry object not created.")
-        # --- End Matplotlib Implementation ---
+        image = render_geometry(scene, title)
     except Exception as e:
         logging.error(f"Error during plotting: {e}")
-        return {'status': 'warning', 'message': f'Geometry created, but failed to generate plot: {e}', 'geometry_object': geometry_object, 'plot_data': None}
+        return {'status': 'warning', 'message': f'Geometry created, but failed to generate plot: {e}', 'geometry_object': geometry_object, 'measures': measures, 'plot_data': None}
 
-    # 6. Return success
-    print("Processing complete.")
     return {
         'status': 'success',
         'message': f'Geometry structure outlined and processed successfully using Shapely and Matplotlib.',
+        'intent': request.intent,
         'geometry_object': geometry_object,
-        'plot_data': plot_data,  # Return the BytesIO object
+        'measures': measures,
+        'plot_data': io.BytesIO(image),
     }
 
 
-def geometry_tool(query: str) -> dict:
+async def generate_geometry(description: str, visualization_backend: str = 'matplotlib') -> Dict[str, Any]:
     """
-    Generates and sends a geometric figure as a Chainlit message based on a user query.
+    Generates geometric objects using Shapely and visualizes them with Matplotlib,
+    parsing the description with a grammar or, failing that, a single structured LLM call.
 
     Args:
-        query (str): The user's query describing the desired geometric figure.
+        description (str): A textual description of the geometric figure.
+        visualization_backend (str): 'matplotlib' or 'plotly'. Specifies the visualization library.
 
     Returns:
-        dict: A dictionary containing the status and message.
+        Dict[str, Any]: A dictionary containing the status, message, intent, Shapely geometry object
+                        (a GeometryCollection when there are several shapes), the measures of the scene
+                        (see GeometryScene.summary), and plot data as an io.BytesIO object.
     """
-    result = generate_geometry(query)
-
-    if result['status'] == 'success':
-        plot_data = result['plot_data']
-        if isinstance(plot_data, io.BytesIO):
-            try:
-                # Create a Chainlit image element from the BytesIO object
-                img = Image.open(plot_data)  # Open the image using Pillow
-                img_byte_arr = io.BytesIO()
-                img.save(img_byte_arr, format='PNG')  # Save to BytesIO in PNG format
-                img_byte_arr = img_byte_arr.getvalue()  # Get the byte array
-
-                cl_image = cl.Image(
-                    content=img_byte_arr,
-                    name="geometry_plot",
-                    display="inline",  # Or "side" for a smaller image
-                )
-
-                # Send the image element in a Chainlit message
-                cl.Message(content=f"Here's the plot for: {query}", elements=[cl_image]).send()
-
-                print("Chainlit message sent successfully.")
-                return {'status': 'success', 'message': 'Geometry plotted and sent as Chainlit message.'}
-            except Exception as e:
-                logging.error(f"Error creating image: {e}")
-                return {'status': 'failure', 'message': f'Failed to create image: {e}'}
-        else:
-            logging.error("Plot data is not a BytesIO object")
-            return {'status': 'failure', 'message': 'Plot data is not a BytesIO object.'}
-    else:
-        logging.error(f"Plot generation failed: {result['message']}")
-        return {'status': 'failure', 'message': result['message']}
+    if visualization_backend not in ['matplotlib', 'plotly']:
+        return {'status': 'failure', 'message': f'Invalid visualization backend: {visualization_backend}. Must be "matplotlib" or "plotly".', 'geometry_object': None, 'plot_data': None}
 
-# Example Usage (for testing the structure)
-if __name__ == '__main__':
-    import asyncio
-    async def test():
-        description1 = "a point at 10, 20"
-        result1 = geometry_tool(description1)
-        print("\nResult 1:")
-        print(result1)
+    # 1. Intent and shapes with their coordinates (grammar, or one LLM call with typed output)
+    try:
+        request = await parse_geometry_description(description)
+    except Exception as e:
+        logging.error(f"Error during geometry parsing: {e}")
+        return {'status': 'failure', 'message': f'Failed to parse description: {e}', 'geometry_object': None, 'plot_data': None}
 
-        print("-" * 20)
+    # 2. and 3. Measuring and drawing the shapes, in one call off the event loop
+    return await asyncio.to_thread(build_geometry, request, description)
 
-        description2 = "a line from 0,0 to 5,5"
-        result2 = geometry_tool(description2)
-        print("\nResult 2:")
-        print(result2)
 
-        print("-" * 20)
+@tool
+async def geometry_tool(query: str) -> dict:
+    """
+    Generates and sends a geometric figure as a Chainlit message based on a user query.
 
-        description3 = "a square polygon with corners at (0,0), (1,0), (1,1), (0,1)"
-        result3 = geometry_tool(description3)
-        print("\nResult 3:")
-        print(result3)
+    Args:
+        query (str): The user's query describing the desired geometric figure, with its
+                     coordinates, e.g. "a circle with center 2,2 and radius 3 and a line from 0,0 to 5,5".
 
-        print("-" * 20)
+    Returns:
+        dict: A dictionary containing the status, message, and the measures of the shapes
+              (areas, lengths, nearest shapes, intersecting and containing pairs).
+    """
+    result = await generate_geometry(query)
 
-        description4 = "a circle with center at 2,2 and radius 3"
-        result4 = geometry_tool(description4)
-        print("\nResult 4:")
-        print(result4)
+    if result['status'] != 'success':
+        logging.error(f"Plot generation failed: {result['message']}")
+        return {'status': 'failure', 'message': result['message']}
 
-        print("-" * 20)
+    try:
+        # Create a Chainlit image element from the encoded bytes, sent as they are
+        image_bytes = result['plot_data'].getvalue()
+        encoding = sniff_format(image_bytes)
+        logging.info(f"geometry_tool chart payload: {len(image_bytes)} bytes ({encoding})")
+
+        cl_image = cl.Image(
+            content=image_bytes,
+            name=f"geometry_plot.{EXTENSIONS[encoding]}",
+            mime=MIME_TYPES[encoding],
+            display="inline",  # Or "side" for a smaller image
+        )
+
+        # Send the image element in a Chainlit message
+        await cl.Message(content=f"Here's the plot for: {query}", elements=[cl_image]).send()
+        return {'status': 'success', 'message': 'Geometry plotted and sent as Chainlit message.',
+                'measures': result['measures']}
+    except Exception as e:
+        logging.error(f"Error creating image: {e}")
+        return {'status': 'failure', 'message': f'Failed to create image: {e}'}
 
-        description5 = "an unknown shape"
-        result5 = geometry_tool(description5)
-        print("\nResult 5:")
-        print(result5)
+# Example Usage (for testing the structure)
+if __name__ == '__main__':
+    async def test():
+        for description in [
+            "a point at 10, 20",
+            "a line from 0,0 to 5,5",
+            "a square polygon with corners at (0,0), (1,0), (1,1), (0,1)",
+            "a circle with center at 2,2 and radius 3",
+            "an unknown shape",
+        ]:
+            print(f"\n{description}:")
+            print(await geometry_tool.ainvoke({"query": description}))
+            print("-" * 20)
     asyncio.run(test())
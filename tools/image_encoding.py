@@ -0,0 +1,168 @@
+import io
+import os
+import logging
+from dataclasses import dataclass
+
+import numpy as np
+import matplotlib
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from PIL import Image
+
+
+# Output of charts sent to the chat (and persisted by the Chainlit data layer)
+IMAGE_FORMATS = ("auto", "png", "png8", "webp", "svg")
+IMAGE_PRESETS = {
+    # name: (width, height in inches, dots per inch)
+    "small": (6.4, 3.84, 80),
+    "medium": (8, 4.8, 100),
+    "large": (10, 6, 100),
+    "hires": (10, 6, 200),
+}
+CHART_IMAGE_FORMAT = os.getenv("CHART_IMAGE_FORMAT", "auto")
+CHART_IMAGE_PRESET = os.getenv("CHART_IMAGE_PRESET", "large")
+CHART_IMAGE_MAX_BYTES = int(os.getenv("CHART_IMAGE_MAX_BYTES", 150_000))  # 0 for no budget
+
+WEBP_QUALITY = 90
+SVG_MAX_VERTICES = 5000  # charts with more drawn vertices are not offered as SVG by "auto"
+MIN_DPI = 50  # the budget never lowers the resolution below this
+DPI_STEP = 0.75
+
+MIME_TYPES = {"png": "image/png", "png8": "image/png", "webp": "image/webp", "svg": "image/svg+xml"}
+EXTENSIONS = {"png": "png", "png8": "png", "webp": "webp", "svg": "svg"}
+
+
+@dataclass
+class EncodedImage:
+    """An encoded chart and what is needed to send it."""
+    data: bytes
+    format: str
+    width: int
+    height: int
+
+    @property
+    def mime(self) -> str:
+        return MIME_TYPES[self.format]
+
+    @property
+    def extension(self) -> str:
+        return EXTENSIONS[self.format]
+
+
+def sniff_format(data: bytes) -> str:
+    """Format of encoded image bytes (png, webp or svg), e.g. to send a cached image."""
+    if data.startswith(b"\x89PNG"):
+        return "png"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp"
+    if data.lstrip()[:5] in (b"<?xml", b"<svg "):
+        return "svg"
+    raise ValueError("unknown image format")
+
+
+def vector_complexity(figure: Figure) -> int | None:
+    """
+    Number of vertices SVG output would contain, or None if the figure has raster content.
+    """
+    vertices = 0
+    for axes in figure.axes:
+        if axes.images:
+            return None
+        vertices += sum(len(line.get_xydata()) for line in axes.lines)
+        vertices += sum(len(patch.get_path().vertices) for patch in axes.patches)
+        for collection in axes.collections:
+            paths = collection.get_paths()
+            offsets = len(collection.get_offsets())
+            if len(paths) == 1 and offsets > 1:
+                vertices += len(paths[0].vertices) * offsets  # markers and hexagons repeat one path at every offset
+            else:
+                vertices += sum(len(path.vertices) for path in paths)
+    return vertices
+
+
+def _raster(figure: Figure, dpi: float) -> Image.Image:
+    figure.set_dpi(dpi)
+    canvas = FigureCanvasAgg(figure)
+    canvas.draw()
+    # Charts have an opaque background: RGB encodes smaller than RGBA
+    return Image.fromarray(np.asarray(canvas.buffer_rgba())).convert("RGB")
+
+
+def _encode_raster(image: Image.Image, image_format: str) -> bytes:
+    buf = io.BytesIO()
+    if image_format == "png":
+        image.save(buf, format="PNG", optimize=True)
+    elif image_format == "png8":
+        # Charts use few colors: a 256-color palette is visually identical and much smaller
+        image.quantize(colors=256, method=Image.Quantize.FASTOCTREE).save(buf, format="PNG", optimize=True)
+    elif image_format == "webp":
+        image.save(buf, format="WEBP", quality=WEBP_QUALITY, method=4)
+    else:
+        raise ValueError(f"Unsupported raster format: {image_format}")
+    return buf.getvalue()
+
+
+def _encode_svg(figure: Figure) -> bytes:
+    buf = io.BytesIO()
+    # Text kept as text instead of glyph outlines: smaller, and still selectable
+    with matplotlib.rc_context({"svg.fonttype": "none"}):
+        figure.savefig(buf, format="svg")
+    return buf.getvalue()
+
+
+def encode_figure(figure: Figure, image_format: str = CHART_IMAGE_FORMAT, preset: str = CHART_IMAGE_PRESET,
+                  max_bytes: int = CHART_IMAGE_MAX_BYTES) -> EncodedImage:
+    """
+    Encodes a chart in a compact format within a size budget.
+
+    The figure is resized to the preset, drawn once per resolution, and encoded in the
+    requested format. With "auto", the smallest of a palette PNG, a WebP and, for simple
+    vector charts, an SVG is kept. When the result exceeds `max_bytes`, the resolution is
+    lowered step by step (not below MIN_DPI) and the smallest encoding is returned.
+
+    Args:
+        figure (Figure): The chart.
+        image_format (str, optional): One of IMAGE_FORMATS. Defaults to CHART_IMAGE_FORMAT.
+        preset (str, optional): One of IMAGE_PRESETS. Defaults to CHART_IMAGE_PRESET.
+        max_bytes (int, optional): Size budget, 0 for none. Defaults to CHART_IMAGE_MAX_BYTES.
+
+    Returns:
+        EncodedImage: The encoded chart.
+
+    Raises:
+        ValueError: If the format or preset is unknown.
+    """
+    if image_format not in IMAGE_FORMATS:
+        raise ValueError(f"Unsupported image format '{image_format}', expected one of {', '.join(IMAGE_FORMATS)}")
+    if preset not in IMAGE_PRESETS:
+        raise ValueError(f"Unknown size preset '{preset}', expected one of {', '.join(IMAGE_PRESETS)}")
+
+    width, height, dpi = IMAGE_PRESETS[preset]
+    if tuple(figure.get_size_inches()) != (width, height):
+        figure.set_size_inches(width, height)
+        if figure.get_layout_engine() is None:
+            figure.tight_layout()
+
+    candidates = []
+    if image_format == "svg":
+        return EncodedImage(_encode_svg(figure), "svg", int(width * dpi), int(height * dpi))
+    if image_format == "auto":
+        complexity = vector_complexity(figure)
+        if complexity is not None and complexity <= SVG_MAX_VERTICES:
+            candidates.append(EncodedImage(_encode_svg(figure), "svg", int(width * dpi), int(height * dpi)))
+
+    raster_formats = ["png8", "webp"] if image_format == "auto" else [image_format]
+    while True:
+        image = _raster(figure, dpi)
+        candidates.extend(
+            EncodedImage(_encode_raster(image, name), name, image.width, image.height) for name in raster_formats
+        )
+        best = min(candidates, key=lambda candidate: len(candidate.data))
+        if not max_bytes or len(best.data) <= max_bytes or dpi * DPI_STEP < MIN_DPI:
+            break
+        dpi *= DPI_STEP
+        candidates = [candidate for candidate in candidates if candidate.format == "svg"]
+
+    if max_bytes and len(best.data) > max_bytes:
+        logging.warning(f"Chart image of {len(best.data)} bytes exceeds the {max_bytes} bytes budget at {dpi:.0f} dpi")
+    return best
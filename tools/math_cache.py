@@ -0,0 +1,118 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+
+
+# Bump whenever the stored results would change: the table layout, and also the formatting of
+# results (e.g. 2: summarized large matrices and NumPy matrix results, 3: eigenvalues always as
+# lists), or old entries keep being served
+CACHE_SCHEMA_VERSION = 3
+EVICTION_INTERVAL = 100  # inserts between two eviction passes
+
+
+class PersistentResultCache:
+    """
+    Size-bounded SQLite store of calculator results, shared by every worker process.
+
+    Entries are keyed by a hash that already includes the SymPy version; the store also
+    records the version it was written with and empties itself when it changes, so an
+    upgrade never serves results computed by another SymPy. Least recently used entries
+    are evicted beyond `max_entries`. Storage errors are logged and never raised: the
+    cache must not break a calculation.
+    """
+
+    def __init__(self, path: str, max_entries: int = 100_000, version: str = ""):
+        self.path = path
+        self.max_entries = max_entries
+        self.version = f"{CACHE_SCHEMA_VERSION}:{version}"
+        self.connection: sqlite3.Connection | None = None
+        self.connection_pid = None
+        self.lock = threading.Lock()
+        self.inserts = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        # A connection must not be shared with forked or spawned processes: reopen per process
+        if self.connection is not None and self.connection_pid == os.getpid():
+            return self.connection
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        with connection:
+            connection.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, result TEXT NOT NULL, "
+                "created REAL NOT NULL, last_used REAL NOT NULL, hits INTEGER NOT NULL DEFAULT 0)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)")
+            row = connection.execute("SELECT value FROM meta WHERE name = 'version'").fetchone()
+            if row is None or row[0] != self.version:
+                if row is not None:
+                    logging.info(f"Calculator cache written by version {row[0]}, clearing it for {self.version}")
+                connection.execute("DELETE FROM results")
+                connection.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('version', ?)", (self.version,))
+
+        self.connection = connection
+        self.connection_pid = os.getpid()
+        return connection
+
+    def get(self, key: str) -> str | None:
+        try:
+            with self.lock:
+                connection = self._connect()
+                row = connection.execute("SELECT result FROM results WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                with connection:
+                    connection.execute("UPDATE results SET last_used = ?, hits = hits + 1 WHERE key = ?", (time.time(), key))
+                self.hits += 1
+                return row[0]
+        except sqlite3.Error as e:
+            logging.error(f"Error reading the calculator cache {self.path}: {e}")
+            return None
+
+    def put(self, key: str, result: str):
+        try:
+            with self.lock:
+                connection = self._connect()
+                now = time.time()
+                with connection:
+                    connection.execute(
+                        "INSERT OR REPLACE INTO results (key, result, created, last_used) VALUES (?, ?, ?, ?)",
+                        (key, result, now, now),
+                    )
+                self.inserts += 1
+                if self.inserts % max(1, min(EVICTION_INTERVAL, self.max_entries // 10)) == 0:
+                    self._evict(connection)
+        except sqlite3.Error as e:
+            logging.error(f"Error writing the calculator cache {self.path}: {e}")
+
+    def _evict(self, connection: sqlite3.Connection):
+        count = connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        if count > self.max_entries:
+            with connection:
+                connection.execute(
+                    "DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY last_used LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+
+    def clear(self):
+        try:
+            with self.lock:
+                connection = self._connect()
+                with connection:
+                    connection.execute("DELETE FROM results")
+        except sqlite3.Error as e:
+            logging.error(f"Error clearing the calculator cache {self.path}: {e}")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / lookups if lookups else 0.0}
@@ -1,132 +1,320 @@
+import os
+import io
+import re
+import csv
+import types
+import hashlib
+import builtins
+import logging
+from collections import OrderedDict
+
 import sympy
 import numpy as np  # Although not directly exposed, sympy might use it internally
-import scipy.optimize # Kept for potential future extensions, but nsolve is preferred
 import math
-import logging
+import mpmath
 
 from langchain_core.tools import tool
 from sympy.parsing.sympy_parser import (
     parse_expr, standard_transformations,
-    implicit_multiplication_application, function_exponentiation
+    implicit_multiplication_application, function_exponentiation, convert_xor
 )
 from sympy.utilities.lambdify import lambdify
 
+from tools import matrix_backend
+from tools.math_cache import PersistentResultCache
+from tools.fast_math import fast_evaluate
+from tools.worker_pool import WorkerPool, WorkerPoolError, JobTimeoutError, JobMemoryError, PoolBusyError
 
-@tool
-async def calculator_tool(expression: str) -> str:
+
+CALCULATOR_CACHE_SIZE = int(os.getenv("CALCULATOR_CACHE_SIZE", 1024))
+# Results persisted on disk and shared by all workers and users, keyed by canonical form (empty path to disable)
+CALCULATOR_CACHE_PATH = os.getenv("CALCULATOR_CACHE_PATH", ".cache/calculator_cache.sqlite3")
+CALCULATOR_DISK_CACHE_MAX_ENTRIES = int(os.getenv("CALCULATOR_DISK_CACHE_MAX_ENTRIES", 100_000))
+
+# Calculations run in a pool of worker processes so that a runaway solve/integrate cannot block the event loop
+CALCULATOR_WORKERS = int(os.getenv("CALCULATOR_WORKERS", 2))
+CALCULATOR_TIMEOUT = float(os.getenv("CALCULATOR_TIMEOUT", 30))  # wall-clock seconds per calculation
+CALCULATOR_CPU_LIMIT = float(os.getenv("CALCULATOR_CPU_LIMIT", 20))  # CPU seconds per calculation (POSIX only)
+CALCULATOR_MEMORY_LIMIT_MB = int(os.getenv("CALCULATOR_MEMORY_LIMIT_MB", 1024))  # per worker (POSIX only)
+CALCULATOR_MAX_JOBS_PER_WORKER = int(os.getenv("CALCULATOR_MAX_JOBS_PER_WORKER", 200))
+
+# Grid evaluation limits
+GRID_MAX_POINTS = int(os.getenv("GRID_MAX_POINTS", 100_000))  # evaluated points (product of all variable sizes)
+GRID_MAX_ROWS = int(os.getenv("GRID_MAX_ROWS", 2000))  # rows returned to the LLM
+GRID_MAX_FALLBACKS = 10_000  # points re-evaluated with mpmath when the NumPy result is not finite
+
+
+def _build_namespace() -> dict:
     """
-    Performs calculations including arithmetic, symbolic math, and equation solving
-    using the SymPy library.
+    Builds the functions, constants and classes exposed to calculator expressions.
+
+    Using SymPy's versions ensures compatibility within the symbolic framework.
+    """
+    return {
+        # Solvers
+        "solve": sympy.solve,
+        "nsolve": sympy.nsolve, # Numerical solver
+
+        # Equation/Relationals
+        "Eq": sympy.Eq, "Ne": sympy.Ne, "Lt": sympy.Lt, "Le": sympy.Le, "Gt": sympy.Gt, "Ge": sympy.Ge,
+
+        # Calculus
+        "diff": sympy.diff, "Derivative": sympy.Derivative,
+        "integrate": sympy.integrate, "Integral": sympy.Integral,
+        "limit": sympy.limit, "Limit": sympy.Limit,
+
+        # Simplification/Manipulation
+        "simplify": sympy.simplify, "expand": sympy.expand, "factor": sympy.factor,
+        "collect": sympy.collect, "cancel": sympy.cancel, "apart": sympy.apart,
+        "trigsimp": sympy.trigsimp, "expand_trig": sympy.expand_trig,
+
+        # Evaluation
+        "N": sympy.N, "evalf": sympy.N, # Numerical evaluation
+
+        # Basic Functions (Trigonometric, Hyperbolic, Exponential, Logarithmic)
+        "sin": sympy.sin, "cos": sympy.cos, "tan": sympy.tan,
+        "asin": sympy.asin, "acos": sympy.acos, "atan": sympy.atan, "atan2": sympy.atan2,
+        "sinh": sympy.sinh, "cosh": sympy.cosh, "tanh": sympy.tanh,
+        "asinh": sympy.asinh, "acosh": sympy.acosh, "atanh": sympy.atanh,
+        "log": sympy.log, "ln": sympy.log, # ln is alias for natural log
+        "exp": sympy.exp,
+        "sqrt": sympy.sqrt,
+        "Abs": sympy.Abs, "abs": sympy.Abs, # abs is alias
+        "sign": sympy.sign,
+        "conjugate": sympy.conjugate,
+        "re": sympy.re, "im": sympy.im,
+        "arg": sympy.arg,
+
+        # Constants
+        "pi": sympy.pi,
+        "E": sympy.E, # Euler's number
+        "I": sympy.I, # Imaginary unit
+        "oo": sympy.oo, # Infinity
+        "zoo": sympy.zoo, # Complex infinity
+        "nan": sympy.nan, # Not a number
+
+        # Combinatorics
+        "factorial": sympy.factorial, "binomial": sympy.binomial,
+
+        # Number Theory
+        "gcd": sympy.gcd, "lcm": sympy.lcm, "isprime": sympy.isprime,
+        "prime": sympy.prime, "primerange": sympy.primerange, "nextprime": sympy.nextprime,
+
+        # Logic
+        "And": sympy.And, "Or": sympy.Or, "Not": sympy.Not, "Xor": sympy.Xor,
+        "true": sympy.true, "false": sympy.false,
+
+        # Matrix operations (Basic): their det(), inv() and negative powers also use the backend below
+        "Matrix": matrix_backend.Matrix,
+        "eye": matrix_backend.Matrix.eye,
+        "zeros": matrix_backend.Matrix.zeros,
+        "ones": matrix_backend.Matrix.ones,
+        "diag": matrix_backend.Matrix.diag,
+
+        # Linear algebra: large numeric matrices are computed with NumPy/LAPACK, exact=True keeps SymPy
+        "det": matrix_backend.det, "inv": matrix_backend.inv, "solve_linear": matrix_backend.solve_linear,
+        "eigenvals": matrix_backend.eigenvals, "eigenvects": matrix_backend.eigenvects, "svd": matrix_backend.svd,
+
+        # Note: Exposing full numpy (np) or scipy is generally avoided
+        # here to rely on SymPy's integrated environment, but specific
+        # functions could be added carefully if needed.
+    }
+
+
+def _build_global_namespace() -> dict:
+    """
+    Builds the same global namespace parse_expr creates on every call when none is given
+    (``from sympy import *`` plus the builtin functions), once.
+    """
+    global_dict = {}
+    exec('from sympy import *', global_dict)
+    for name, obj in vars(builtins).items():
+        if isinstance(obj, types.BuiltinFunctionType):
+            global_dict[name] = obj
+    global_dict['max'] = sympy.Max
+    global_dict['min'] = sympy.Min
+    return global_dict
+
+
+# Operations kept unevaluated when computing cache keys: they can be slow, and their arguments
+# are enough to identify the calculation. Matrix constructors are inert too, so that matrix
+# products and powers (M**-1) are not computed either
+INERT_FUNCTIONS = (
+    "solve", "nsolve", "diff", "integrate", "limit", "simplify", "expand", "factor", "collect", "cancel",
+    "apart", "trigsimp", "expand_trig", "N", "evalf", "factorial", "binomial", "gcd", "lcm", "isprime",
+    "prime", "primerange", "nextprime", "det", "inv", "solve_linear", "eigenvals", "eigenvects", "svd",
+    "Matrix", "eye", "zeros", "ones", "diag",
+)
+
+# Longer expressions (e.g. large literal matrices) are keyed by their text: parsing them takes longer than it saves
+CANONICAL_KEY_MAX_LENGTH = 1000
+# A method call such as '(x*exp(x)).integrate(x)' or 'Integral(...).doit()': methods cannot be made inert
+_METHOD_CALL_PATTERN = re.compile(r"[\w)\]]\s*\.\s*[A-Za-z_]\w*\s*\(")
+
+
+def _inert(name: str):
+    function = sympy.Function(name)
+
+    def call(*args):
+        return function(*(sympy.Tuple(*arg) if isinstance(arg, (list, tuple)) else arg for arg in args))
+    return call
+
+
+def _build_inert_namespace() -> dict:
+    """
+    Builds the calculator namespace in which the expensive operations stay unevaluated.
+    """
+    namespace = _build_namespace()
+    for name in INERT_FUNCTIONS:
+        namespace[name] = _inert(name)
+    return namespace
+
+
+# Built once at import time and shared by every calculation
+CALCULATOR_NAMESPACE = _build_namespace()
+CALCULATOR_INERT_NAMESPACE = _build_inert_namespace()
+CALCULATOR_GLOBALS = _build_global_namespace()
+
+# Parsing transformations: allows implicit multiplication ('2x'), function exponentiation ('sin**2(x)'), '^' as power etc.
+CALCULATOR_TRANSFORMATIONS = standard_transformations + (implicit_multiplication_application, function_exponentiation, convert_xor)
+
+
+class ResultCache:
+    """
+    Bounded LRU cache of calculator results keyed by the normalized expression, with hit metrics.
+    """
+
+    def __init__(self, max_size: int = CALCULATOR_CACHE_SIZE):
+        self.max_size = max_size
+        self.entries: OrderedDict[str, str] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> str | None:
+        result = self.entries.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return result
+
+    def put(self, key: str, result: str):
+        self.entries[key] = result
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self.entries),
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+calculator_cache = ResultCache()
+
+persistent_cache = PersistentResultCache(
+    CALCULATOR_CACHE_PATH, max_entries=CALCULATOR_DISK_CACHE_MAX_ENTRIES, version=sympy.__version__
+) if CALCULATOR_CACHE_PATH else None
+
+calculator_pool = WorkerPool(
+    size=CALCULATOR_WORKERS,
+    job_timeout=CALCULATOR_TIMEOUT,
+    cpu_limit=CALCULATOR_CPU_LIMIT,
+    memory_limit_mb=CALCULATOR_MEMORY_LIMIT_MB,
+    max_jobs_per_worker=CALCULATOR_MAX_JOBS_PER_WORKER,
+    warm_modules=("tools.math_tools", "tools.numeric_solver"),
+)
+
+
+def normalize_expression(expression: str) -> str:
+    """
+    Normalizes an expression for cache lookups by collapsing whitespace.
+
+    Whitespace is not removed entirely because it is meaningful with implicit
+    multiplication ('x y' is x*y while 'xy' is a single symbol).
+    """
+    return " ".join(expression.split())
+
+
+def canonical_key(expression: str) -> str:
+    """
+    Computes the persistent cache key of an expression.
+
+    The expression is parsed with the expensive operations left inert, so SymPy's automatic
+    simplifications give equivalent surface forms the same tree ('integrate(2*x + x, x)' and
+    'integrate(3x, x)'). The key hashes the SymPy version with the srepr of that tree, or with
+    the normalized text when the expression cannot be parsed that way, calls a method (which
+    parsing would run in full) or is longer than CANONICAL_KEY_MAX_LENGTH.
 
     Args:
-        expression: A string containing the mathematical expression or equation to evaluate.
-                    The expression should use standard Python/SymPy syntax.
-                    Examples:
-                      '1 + 2 * 3 / 4'
-                      'sqrt(16)'
-                      'sin(pi/2) + cos(0)'
-                      'E**(I*pi)' # Euler's identity
-                      'simplify(cos(x)**2 + sin(x)**2)'
-                      'expand((x+y)**3'
-                      'factor(x**2 - 2*x + 1)'
-                      'diff(x**4 / tan(x), x)'
-                      'integrate(x**2 * exp(x), x)' # Indefinite integral
-                      'integrate(1/(x**2+1), (x, -oo, oo))' # Definite integral
-                      'limit(sin(x)/x, x, 0)'
-                      'solve(Eq(x**2, 9), x)' # Solve equation symbolically
-                      'solve(x**2 + 2*x + 5, x)' # Solve polynomial for roots
-                      'solve([Eq(x + y, 5), Eq(x - y, 1)], [x, y])' # Solve system of linear equations
-                      'nsolve(Eq(cos(x), x), x, 0.5)' # Solve equation numerically (requires initial guess)
-                      'N(pi, 50)' # Evaluate pi to 50 decimal places
-                      'log(1000, 10)' # Log base 10
-                      'isprime(17)'
-                      'factorial(5)'
+        expression (str): The calculator expression.
 
     Returns:
-        A string representing the result of the calculation or an error message.
+        str: The hexadecimal SHA-256 key.
     """
-    try:
-        # 1. Preprocessing (SymPy parser handles most cases like ^ vs **)
-        # expression = expression.replace('^', '**') # Usually not needed with parse_expr
-
-        # 2. Define allowed functions, constants, and classes for parsing
-        # Using SymPy's versions ensures compatibility within the symbolic framework.
-        local_dict = {
-            # Solvers
-            "solve": sympy.solve,
-            "nsolve": sympy.nsolve, # Numerical solver
-
-            # Equation/Relationals
-            "Eq": sympy.Eq, "Ne": sympy.Ne, "Lt": sympy.Lt, "Le": sympy.Le, "Gt": sympy.Gt, "Ge": sympy.Ge,
-
-            # Calculus
-            "diff": sympy.diff, "Derivative": sympy.Derivative,
-            "integrate": sympy.integrate, "Integral": sympy.Integral,
-            "limit": sympy.limit, "Limit": sympy.Limit,
-
-            # Simplification/Manipulation
-            "simplify": sympy.simplify, "expand": sympy.expand, "factor": sympy.factor,
-            "collect": sympy.collect, "cancel": sympy.cancel, "apart": sympy.apart,
-            "trigsimp": sympy.trigsimp, "expand_trig": sympy.expand_trig,
-
-            # Evaluation
-            "N": sympy.N, "evalf": sympy.N, # Numerical evaluation
-
-            # Basic Functions (Trigonometric, Hyperbolic, Exponential, Logarithmic)
-            "sin": sympy.sin, "cos": sympy.cos, "tan": sympy.tan,
-            "asin": sympy.asin, "acos": sympy.acos, "atan": sympy.atan, "atan2": sympy.atan2,
-            "sinh": sympy.sinh, "cosh": sympy.cosh, "tanh": sympy.tanh,
-            "asinh": sympy.asinh, "acosh": sympy.acosh, "atanh": sympy.atanh,
-            "log": sympy.log, "ln": sympy.log, # ln is alias for natural log
-            "exp": sympy.exp,
-            "sqrt": sympy.sqrt,
-            "Abs": sympy.Abs, "abs": sympy.Abs, # abs is alias
-            "sign": sympy.sign,
-            "conjugate": sympy.conjugate,
-            "re": sympy.re, "im": sympy.im,
-            "arg": sympy.arg,
-
-            # Constants
-            "pi": sympy.pi,
-            "E": sympy.E, # Euler's number
-            "I": sympy.I, # Imaginary unit
-            "oo": sympy.oo, # Infinity
-            "zoo": sympy.zoo, # Complex infinity
-            "nan": sympy.nan, # Not a number
-
-            # Combinatorics
-            "factorial": sympy.factorial, "binomial": sympy.binomial,
-
-            # Number Theory
-            "gcd": sympy.gcd, "lcm": sympy.lcm, "isprime": sympy.isprime,
-            "prime": sympy.prime, "primerange": sympy.primerange, "nextprime": sympy.nextprime,
-
-            # Logic
-            "And": sympy.And, "Or": sympy.Or, "Not": sympy.Not, "Xor": sympy.Xor,
-            "true": sympy.true, "false": sympy.false,
-
-            # Matrix operations (Basic)
-            "Matrix": sympy.Matrix,
-            "eye": sympy.eye,
-            "zeros": sympy.zeros,
-            "ones": sympy.ones,
-            "diag": sympy.diag,
-
-            # Note: Exposing full numpy (np) or scipy is generally avoided
-            # here to rely on SymPy's integrated environment, but specific
-            # functions could be added carefully if needed.
-        }
+    canonical = "text:" + normalize_expression(expression)
+    if len(expression) <= CANONICAL_KEY_MAX_LENGTH and not _METHOD_CALL_PATTERN.search(expression):
+        try:
+            canonical = sympy.srepr(parse_calculator_expression(expression, CALCULATOR_INERT_NAMESPACE))
+        except Exception:
+            pass
+    return hashlib.sha256(f"{sympy.__version__}\0{canonical}".encode()).hexdigest()
+
+
+def parse_calculator_expression(expression: str, namespace: dict | None = None):
+    """
+    Parses (and evaluates) an expression with the calculator namespace and transformations.
+
+    Args:
+        expression (str): The expression to parse.
+        namespace (dict, optional): Namespace to parse with, e.g. one holding the named
+                                    results of a batch. Defaults to a copy of CALCULATOR_NAMESPACE.
+
+    Returns:
+        The SymPy object (or Python value) produced by the expression.
+    """
+    # The namespace is copied so that an expression can never alter the shared one.
+    # evaluate=True attempts to perform basic simplifications and evaluations during parsing.
+    # For example, '1+2' will become sympy.Integer(3) directly.
+    return parse_expr(expression, local_dict=dict(CALCULATOR_NAMESPACE if namespace is None else namespace),
+                      global_dict=CALCULATOR_GLOBALS, transformations=CALCULATOR_TRANSFORMATIONS, evaluate=True)
+
 
-        # 3. Set up parsing transformations for flexibility
-        # Allows implicit multiplication ('2x'), function exponentiation ('sin**2(x)') etc.
-        transformations = standard_transformations + (implicit_multiplication_application, function_exponentiation)
+def _format_result(result) -> str:
+    # Large matrices (e.g. a 500x500 inverse), also inside the tuples returned by svd and eigenvects, are summarized
+    if isinstance(result, sympy.MatrixBase):
+        return matrix_backend.format_matrix(result)
+    if isinstance(result, tuple) and any(isinstance(item, sympy.MatrixBase) for item in result):
+        return "(" + ", ".join(_format_result(item) for item in result) + ")"
+    return str(result)
 
-        # 4. Parse the expression using SymPy's parser
-        # evaluate=True attempts to perform basic simplifications and evaluations during parsing.
-        # For example, '1+2' will become sympy.Integer(3) directly.
-        parsed_expr = parse_expr(expression, local_dict=local_dict, transformations=transformations, evaluate=True)
 
-        # 5. Evaluate the parsed expression if it's evaluatable
+def evaluate_expression(expression: str, namespace: dict | None = None, bind_to: str | None = None) -> str:
+    """
+    Parses and evaluates a calculator expression.
+
+    Args:
+        expression (str): The mathematical expression or equation to evaluate.
+        namespace (dict, optional): Namespace to parse with, see parse_calculator_expression.
+        bind_to (str, optional): Name under which the exact (not numerically evaluated) result
+                                 is stored in `namespace`, so later expressions can use it.
+
+    Returns:
+        str: The result of the calculation, or an error message starting with "Error" or
+             "An unexpected error occurred".
+    """
+    try:
+        # 1. Parse the expression using SymPy's parser
+        parsed_expr = parse_calculator_expression(expression, namespace)
+        if bind_to is not None:
+            namespace[bind_to] = parsed_expr
+
+        # 2. Evaluate the parsed expression if it's evaluatable
         # Check if it still contains symbols. If not, evaluate numerically.
         # Results from solve(), diff(), integrate() might be lists or symbolic expressions.
         result = parsed_expr
@@ -148,10 +336,10 @@ async def calculator_tool(expression: str) -> str:
                 pass
 
 
-        # 6. Convert the final result to a string
-        return str(result)
+        # 3. Convert the final result to a string
+        return _format_result(result)
 
-    # 7. Error Handling
+    # 4. Error Handling
     except (SyntaxError, TypeError, ValueError) as e:
         logging.error(f"Error in calculator_tool: {type(e).__name__}: {e}")
         return f"Error: Invalid expression, syntax, or function argument - {type(e).__name__}: {e}"
@@ -171,6 +359,329 @@ async def calculator_tool(expression: str) -> str:
         logging.error(f"Unexpected error in calculator_tool: {type(e).__name__} - {e}")
         return f"An unexpected error occurred: {type(e).__name__} - {e}"
 
+
+@tool
+async def calculator_tool(expression: str) -> str:
+    """
+    Performs calculations including arithmetic, symbolic math, and equation solving
+    using the SymPy library.
+
+    Args:
+        expression: A string containing the mathematical expression or equation to evaluate.
+                    The expression should use standard Python/SymPy syntax.
+                    Examples:
+                      '1 + 2 * 3 / 4'
+                      'sqrt(16)'
+                      'sin(pi/2) + cos(0)'
+                      'E**(I*pi)' # Euler's identity
+                      'simplify(cos(x)**2 + sin(x)**2)'
+                      'expand((x+y)**3'
+                      'factor(x**2 - 2*x + 1)'
+                      'diff(x**4 / tan(x), x)'
+                      'integrate(x**2 * exp(x), x)' # Indefinite integral
+                      'integrate(1/(x**2+1), (x, -oo, oo))' # Definite integral
+                      'limit(sin(x)/x, x, 0)'
+                      'solve(Eq(x**2, 9), x)' # Solve equation symbolically
+                      'solve(x**2 + 2*x + 5, x)' # Solve polynomial for roots
+                      'solve([Eq(x + y, 5), Eq(x - y, 1)], [x, y])' # Solve system of linear equations
+                      'det(Matrix([[1, 2], [3, 4]]))' # Also inv, solve_linear(A, b), eigenvals, eigenvects, svd;
+                                                      # numeric matrices from 10x10 use NumPy, add exact=True for SymPy;
+                                                      # A.det(), A.inv() and A**-1 work the same way;
+                                                      # matrices over 400 entries are summarized, not printed
+                      'nsolve(Eq(cos(x), x), x, 0.5)' # Solve equation numerically (requires initial guess)
+                      'N(pi, 50)' # Evaluate pi to 50 decimal places
+                      'log(1000, 10)' # Log base 10
+                      'isprime(17)'
+                      'factorial(5)'
+
+    Returns:
+        A string representing the result of the calculation or an error message.
+    """
+    key = normalize_expression(expression)
+    cached = calculator_cache.get(key)
+    if cached is not None:
+        logging.debug(f"calculator_tool cache hit for '{key}' - {calculator_cache.stats()}")
+        return cached
+
+    # Plain arithmetic is answered in-process without SymPy
+    result = fast_evaluate(key)
+    if result is not None:
+        calculator_cache.put(key, result)
+        return result
+
+    try:
+        result = await calculator_pool.submit(evaluate_cached, key)
+    except JobTimeoutError as e:
+        logging.error(f"Error in calculator_tool: {e} for '{key}'")
+        return f"Error: Calculation took too long and was stopped ({e}). Try a simpler expression or a numerical method such as nsolve or N."
+    except JobMemoryError as e:
+        logging.error(f"Error in calculator_tool: {e} for '{key}'")
+        return f"Error: Calculation used too much memory and was stopped ({e})"
+    except PoolBusyError as e:
+        logging.error(f"Error in calculator_tool: {e}")
+        return "Error: The calculator is busy, try again in a moment"
+    except WorkerPoolError as e:
+        logging.error(f"Error in calculator_tool: {type(e).__name__} - {e}")
+        return f"An unexpected error occurred: {type(e).__name__} - {e}"
+
+    if not result.startswith(("Error", "An unexpected error occurred")):
+        calculator_cache.put(key, result)
+    return result
+
+
+def evaluate_cached(expression: str) -> str:
+    """
+    Evaluates an expression through the persistent cache (runs in the worker processes).
+
+    Args:
+        expression (str): The calculator expression.
+
+    Returns:
+        str: The result or error message, see evaluate_expression. Errors are not cached.
+    """
+    if persistent_cache is None:
+        return evaluate_expression(expression)
+
+    key = canonical_key(expression)
+    cached = persistent_cache.get(key)
+    if cached is not None:
+        return cached
+
+    result = evaluate_expression(expression)
+    if not result.startswith(("Error", "An unexpected error occurred")):
+        persistent_cache.put(key, result)
+    return result
+
+
+CALCULATOR_BATCH_MAX_ITEMS = 50
+
+_ASSIGNMENT_PATTERN = re.compile(r"^\s*([A-Za-z_]\w*)\s*=(?!=)\s*(.+)$", re.DOTALL)
+
+
+def evaluate_batch(expressions: list[str]) -> list[str]:
+    """
+    Evaluates an ordered list of expressions in one shared namespace.
+
+    An item written 'name = expression' stores its exact result under `name` for the
+    following items. A failing item only produces an error for itself; items referring
+    to its name then see an undefined symbol.
+
+    Args:
+        expressions (list[str]): The expressions, in evaluation order.
+
+    Returns:
+        list[str]: One result or error message per expression.
+    """
+    namespace = dict(CALCULATOR_NAMESPACE)
+    results = []
+    for expression in expressions:
+        match = _ASSIGNMENT_PATTERN.match(expression)
+        if match is None:
+            results.append(evaluate_expression(expression, namespace))
+            continue
+
+        name, value = match.group(1), match.group(2)
+        if name in CALCULATOR_NAMESPACE or name in CALCULATOR_GLOBALS:
+            results.append(f"Error: '{name}' is a calculator function or constant and cannot be redefined")
+            continue
+        results.append(evaluate_expression(value, namespace, bind_to=name))
+    return results
+
+
+@tool
+async def calculator_batch_tool(expressions: list[str]) -> str:
+    """
+    Evaluates several calculator expressions in order in a single call. Use it for multi-step
+    calculations instead of calling `calculator_tool` repeatedly.
+
+    Args:
+        expressions: The expressions, in the same syntax as `calculator_tool`. Write an item as
+                     'name = expression' to reuse its exact result in the following items, e.g.
+                       ["r = 6371", "c = 2*pi*r", "c / 24", "solve(Eq(x**2, c), x)"]
+                     Names of calculator functions and constants (pi, E, sin, N...) cannot be reused.
+
+    Returns:
+        One line per expression with its result or error message.
+    """
+    if not expressions:
+        return "Error: No expressions given"
+    if len(expressions) > CALCULATOR_BATCH_MAX_ITEMS:
+        return f"Error: {len(expressions)} expressions given, the limit is {CALCULATOR_BATCH_MAX_ITEMS} per call"
+
+    try:
+        results = await calculator_pool.submit(evaluate_batch, list(expressions))
+    except JobTimeoutError as e:
+        logging.error(f"Error in calculator_batch_tool: {e}")
+        return f"Error: Calculation took too long and was stopped ({e}). Split the batch or simplify the expressions."
+    except JobMemoryError as e:
+        logging.error(f"Error in calculator_batch_tool: {e}")
+        return f"Error: Calculation used too much memory and was stopped ({e})"
+    except PoolBusyError as e:
+        logging.error(f"Error in calculator_batch_tool: {e}")
+        return "Error: The calculator is busy, try again in a moment"
+    except WorkerPoolError as e:
+        logging.error(f"Error in calculator_batch_tool: {type(e).__name__} - {e}")
+        return f"An unexpected error occurred: {type(e).__name__} - {e}"
+
+    return "\n".join(f"[{i}] {expression.strip()} => {result}" for i, (expression, result) in enumerate(zip(expressions, results), 1))
+
+
+def parse_grid_values(spec: str) -> np.ndarray:
+    """
+    Parses the values of one grid variable.
+
+    Args:
+        spec (str): Either an inclusive range 'start:stop' or 'start:stop:step' (step defaults
+                    to 1), or a comma-separated list of numbers such as '1, 2.5, 10'.
+
+    Returns:
+        np.ndarray: The values, as a float array.
+
+    Raises:
+        ValueError: If the specification is invalid or has more than GRID_MAX_POINTS values.
+    """
+    spec = spec.strip()
+    if ":" in spec:
+        parts = [float(part) for part in spec.split(":")]
+        if len(parts) not in (2, 3):
+            raise ValueError(f"invalid range '{spec}', expected 'start:stop' or 'start:stop:step'")
+        start, stop = parts[0], parts[1]
+        step = parts[2] if len(parts) == 3 else 1.0
+        if step == 0 or (stop - start) * step < 0:
+            raise ValueError(f"invalid range '{spec}', the step does not lead from start to stop")
+        count = int(math.floor((stop - start) / step + 1e-9)) + 1
+        if count > GRID_MAX_POINTS:
+            raise ValueError(f"range '{spec}' has {count} values, the limit is {GRID_MAX_POINTS}")
+        # start + i * step rather than np.arange accumulation, so that the stop value is exact
+        return start + step * np.arange(count)
+
+    values = [float(value) for value in spec.replace(";", ",").split(",") if value.strip()]
+    if not values:
+        raise ValueError("empty list of values")
+    if len(values) > GRID_MAX_POINTS:
+        raise ValueError(f"{len(values)} values given, the limit is {GRID_MAX_POINTS}")
+    return np.array(values, dtype=float)
+
+
+def _format_grid_value(value) -> str:
+    if isinstance(value, (complex, np.complexfloating, mpmath.mpc)):
+        if value.imag == 0:
+            return _format_grid_value(value.real)
+        return f"{_format_grid_value(value.real)}{'+' if value.imag >= 0 else '-'}{_format_grid_value(abs(value.imag))}j"
+    if isinstance(value, mpmath.mpf) and not abs(value) < 1e300:
+        return mpmath.nstr(value, 15)
+    return format(float(value), ".15g")
+
+
+def evaluate_grid(expression: str, variables: dict[str, str], output_format: str = "table") -> str:
+    """
+    Evaluates an expression over a grid of variable values in one vectorized NumPy call.
+
+    The expression is compiled once with lambdify. Points where NumPy overflows or leaves
+    its real domain (inf/nan results) are re-evaluated individually with mpmath.
+
+    Args:
+        expression (str): The expression, in calculator syntax.
+        variables (dict[str, str]): Values of each variable, see parse_grid_values. With
+                                    several variables, every combination is evaluated.
+        output_format (str, optional): 'table' (markdown) or 'csv'. Defaults to 'table'.
+
+    Returns:
+        str: The table of values, or an error message starting with "Error".
+    """
+    try:
+        if not variables:
+            return "Error: No grid variables given"
+        if output_format not in ("table", "csv"):
+            return f"Error: Unknown output format '{output_format}', use 'table' or 'csv'"
+
+        names = list(variables)
+        grids = [parse_grid_values(str(variables[name])) for name in names]
+        total_points = math.prod(len(grid) for grid in grids)
+        if total_points > GRID_MAX_POINTS:
+            return f"Error: The grid has {total_points} points, the limit is {GRID_MAX_POINTS}"
+
+        parsed_expr = sympy.sympify(parse_calculator_expression(expression))
+        symbols = [sympy.Symbol(name) for name in names]
+        unknown = parsed_expr.free_symbols - set(symbols)
+        if unknown:
+            return f"Error: No values given for {', '.join(sorted(str(symbol) for symbol in unknown))}"
+
+        columns = [column.ravel() for column in np.meshgrid(*grids, indexing="ij")]
+        numpy_function = lambdify(symbols, parsed_expr, modules="numpy")
+        with np.errstate(all="ignore"):
+            values = np.broadcast_to(np.asarray(numpy_function(*columns)), columns[0].shape)
+        values = values.astype(complex) if np.iscomplexobj(values) else values.astype(float)
+        results: list = values.tolist()
+
+        # Overflowing or out-of-domain points: exact retry with mpmath (arbitrary exponent range, complex results)
+        not_finite = np.flatnonzero(~np.isfinite(values))
+        if len(not_finite):
+            mpmath_function = lambdify(symbols, parsed_expr, modules="mpmath")
+            for index in not_finite[:GRID_MAX_FALLBACKS]:
+                try:
+                    results[index] = mpmath_function(*(mpmath.mpf(column[index]) for column in columns))
+                except (ZeroDivisionError, ValueError, OverflowError):
+                    pass
+
+        rows = [[_format_grid_value(column[i]) for column in columns] + [_format_grid_value(results[i])]
+                for i in range(min(total_points, GRID_MAX_ROWS))]
+        header = names + [expression]
+        note = f"\n[{total_points - GRID_MAX_ROWS} more rows not shown, the limit is {GRID_MAX_ROWS}]" if total_points > GRID_MAX_ROWS else ""
+
+        if output_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer, lineterminator="\n")
+            writer.writerow(header)
+            writer.writerows(rows)
+            return buffer.getvalue().rstrip("\n") + note
+
+        lines = ["| " + " | ".join(header) + " |", "|" + "---|" * len(header)]
+        lines += ["| " + " | ".join(row) + " |" for row in rows]
+        return "\n".join(lines) + note
+
+    except (SyntaxError, TypeError, ValueError, sympy.SympifyError) as e:
+        logging.error(f"Error in calculator_grid_tool: {type(e).__name__}: {e}")
+        return f"Error: Invalid expression or grid - {type(e).__name__}: {e}"
+    except Exception as e:
+        logging.error(f"Unexpected error in calculator_grid_tool: {type(e).__name__} - {e}")
+        return f"An unexpected error occurred: {type(e).__name__} - {e}"
+
+
+@tool
+async def calculator_grid_tool(expression: str, variables: dict[str, str], output_format: str = "table") -> str:
+    """
+    Evaluates a mathematical expression for many values at once and returns a table of values.
+    Use this instead of calling `calculator_tool` once per point.
+
+    Args:
+        expression: The expression to tabulate, in the same syntax as `calculator_tool`, e.g. 'x**2 + sin(x)'.
+        variables: The values of each variable in the expression, as:
+                     - an inclusive range 'start:stop' or 'start:stop:step', e.g. {"x": "0:1000"} or {"x": "0:1:0.1"}
+                     - a comma-separated list, e.g. {"x": "1, 2.5, 10"}
+                   With several variables, every combination is evaluated, e.g. {"x": "0:10", "y": "1, 2"}.
+        output_format: 'table' for a markdown table (default) or 'csv'.
+
+    Returns:
+        A table with one row per point and the value of the expression in the last column,
+        or an error message.
+    """
+    try:
+        return await calculator_pool.submit(evaluate_grid, expression, variables, output_format)
+    except JobTimeoutError as e:
+        logging.error(f"Error in calculator_grid_tool: {e} for '{expression}'")
+        return f"Error: Calculation took too long and was stopped ({e}). Try a smaller grid."
+    except JobMemoryError as e:
+        logging.error(f"Error in calculator_grid_tool: {e} for '{expression}'")
+        return f"Error: Calculation used too much memory and was stopped ({e}). Try a smaller grid."
+    except PoolBusyError as e:
+        logging.error(f"Error in calculator_grid_tool: {e}")
+        return "Error: The calculator is busy, try again in a moment"
+    except WorkerPoolError as e:
+        logging.error(f"Error in calculator_grid_tool: {type(e).__name__} - {e}")
+        return f"An unexpected error occurred: {type(e).__name__} - {e}"
+
+
 # Example usage (for demonstration):
 # print(f"'1+2*3': {calculate('1+2*3')}")
 # print(f"'sin(pi/2)': {calculate('sin(pi/2)')}")
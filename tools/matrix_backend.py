@@ -0,0 +1,224 @@
+import os
+import contextlib
+
+import numpy as np
+import sympy
+from sympy.matrices.exceptions import NonInvertibleMatrixError
+
+
+# Numeric matrices from this size up are computed with NumPy/LAPACK instead of SymPy's pure Python algorithms
+MATRIX_NUMPY_THRESHOLD = int(os.getenv("MATRIX_NUMPY_THRESHOLD", 10))
+# Matrices with more entries are summarized in calculator results instead of printed in full
+MATRIX_MAX_OUTPUT_ENTRIES = int(os.getenv("MATRIX_MAX_OUTPUT_ENTRIES", 400))
+MATRIX_PREVIEW_SIZE = 6  # rows and columns of the block shown in a summary
+
+
+class Matrix(sympy.MutableDenseMatrix):
+    """
+    SymPy matrix whose det(), inv() and negative integer powers go through this backend.
+
+    The calculator builds its matrices with this class (SymPy keeps it through arithmetic,
+    slicing and transposition), so 'Matrix(...).inv()' and 'A**-1' get the same NumPy path
+    as 'inv(A)'. Calls with SymPy options (e.g. det(method="berkowitz")) stay on SymPy.
+    """
+
+    def det(self, *args, exact: bool = False, **kwargs):
+        if args or kwargs:
+            return super().det(*args, **kwargs)
+        return det(self, exact=exact)
+
+    def inv(self, *args, exact: bool = False, **kwargs):
+        if args or kwargs:
+            return super().inv(*args, **kwargs)
+        return inv(self, exact=exact)
+
+    def __pow__(self, exponent):
+        return power(self, exponent)
+
+
+def _as_matrix(value) -> sympy.Matrix:
+    if isinstance(value, sympy.MatrixBase):
+        return value
+    return sympy.Matrix(value)
+
+
+def to_numpy(matrix: sympy.MatrixBase) -> np.ndarray | None:
+    """
+    Converts a symbol-free matrix to a float (or complex) NumPy array.
+
+    Returns:
+        np.ndarray | None: The array, or None if the matrix has symbols or non-numeric entries.
+    """
+    representation = getattr(matrix, "_rep", None)  # SymPy's internal DomainMatrix
+    if representation is not None and (representation.domain.is_ZZ or representation.domain.is_QQ):
+        # Integer/rational matrices convert without going through SymPy objects
+        return np.array(representation.to_list(), dtype=float)
+
+    # Other matrices hold SymPy expressions: float() fails on symbols
+    values = matrix.tolist()
+    try:
+        return np.array(values, dtype=float)
+    except TypeError:
+        try:
+            return np.array(values, dtype=complex)
+        except TypeError:
+            return None
+
+
+def use_numpy(matrix: sympy.MatrixBase, exact: bool) -> np.ndarray | None:
+    """
+    Decides whether a matrix operation runs on NumPy.
+
+    Numeric matrices go to NumPy when they are at least MATRIX_NUMPY_THRESHOLD in one
+    dimension or already hold floating point entries, unless exact results are requested.
+
+    Returns:
+        np.ndarray | None: The NumPy array to compute with, or None to use SymPy.
+    """
+    if exact:
+        return None
+    if max(matrix.shape) < MATRIX_NUMPY_THRESHOLD and not matrix.has(sympy.Float):
+        return None  # small exact matrices: SymPy is fast enough and keeps exact results
+    return to_numpy(matrix)
+
+
+def _from_numpy(array: np.ndarray) -> sympy.Matrix:
+    rows, columns = array.shape[0], (array.shape[1] if array.ndim > 1 else 1)
+    if np.iscomplexobj(array) and np.any(array.imag != 0):
+        return Matrix(rows, columns, [_scalar(value) for value in array.ravel().tolist()])
+    # Building the entries directly is about twice as fast as sympy.Matrix(array)
+    return Matrix(rows, columns, [sympy.Float(value) for value in np.real(array).ravel().tolist()])
+
+
+def _scalar(value):
+    value = complex(value)
+    if value.imag == 0:
+        return sympy.Float(value.real)
+    return sympy.Float(value.real) + sympy.I * sympy.Float(value.imag)
+
+
+def det(matrix, exact: bool = False):
+    """Determinant. Numeric matrices of size >= MATRIX_NUMPY_THRESHOLD use LAPACK unless exact=True."""
+    matrix = _as_matrix(matrix)
+    array = use_numpy(matrix, exact)
+    if array is None:
+        return sympy.MatrixBase.det(matrix)
+    # slogdet does not overflow for large matrices, the result is rebuilt as an arbitrary precision Float
+    sign, log_determinant = np.linalg.slogdet(array)
+    if sign == 0:
+        return sympy.Float(0)
+    return sympy.N(_scalar(sign) * sympy.exp(sympy.Float(log_determinant)))
+
+
+def inv(matrix, exact: bool = False):
+    """Inverse. Numeric matrices of size >= MATRIX_NUMPY_THRESHOLD use LAPACK unless exact=True."""
+    matrix = _as_matrix(matrix)
+    array = use_numpy(matrix, exact)
+    if array is None:
+        return sympy.MatrixBase.inv(matrix)
+    with _not_invertible():
+        return _from_numpy(np.linalg.inv(array))
+
+
+def power(matrix, exponent, exact: bool = False):
+    """
+    Matrix power. Integer powers (negative ones through the inverse) of numeric matrices of
+    size >= MATRIX_NUMPY_THRESHOLD use NumPy unless exact=True.
+    """
+    matrix = _as_matrix(matrix)
+    array = use_numpy(matrix, exact) if isinstance(exponent, (int, sympy.Integer)) and matrix.is_square else None
+    if array is None:
+        return sympy.MatrixBase.__pow__(matrix, exponent)
+    with _not_invertible():
+        return _from_numpy(np.linalg.matrix_power(array, int(exponent)))
+
+
+def solve_linear(matrix, rhs, exact: bool = False):
+    """Solution x of matrix * x = rhs. Numeric systems of size >= MATRIX_NUMPY_THRESHOLD use LAPACK unless exact=True."""
+    matrix, rhs = _as_matrix(matrix), _as_matrix(rhs)
+    array = use_numpy(matrix, exact)
+    rhs_array = to_numpy(rhs) if array is not None else None
+    if array is None or rhs_array is None:
+        return matrix.LUsolve(rhs)
+    with _not_invertible():
+        return _from_numpy(np.linalg.solve(array, rhs_array))
+
+
+def _value_order(value):
+    # Numbers by real then imaginary part, symbolic eigenvalues after them in SymPy's canonical order
+    try:
+        number = complex(value)
+        return 0, number.real, number.imag, ()
+    except TypeError:
+        return 1, 0.0, 0.0, sympy.default_sort_key(value)
+
+
+def eigenvals(matrix, exact: bool = False):
+    """
+    Eigenvalues, as a list sorted by value in which each eigenvalue appears as many times as its
+    multiplicity. Numeric matrices of size >= MATRIX_NUMPY_THRESHOLD use LAPACK unless exact=True.
+    """
+    matrix = _as_matrix(matrix)
+    array = use_numpy(matrix, exact)
+    if array is None:
+        values = [value for value, multiplicity in matrix.eigenvals().items() for _ in range(multiplicity)]
+        return sorted(values, key=_value_order)
+    values = np.linalg.eigvalsh(array) if np.allclose(array, array.conj().T) else np.linalg.eigvals(array)
+    return [_scalar(value) for value in sorted(values, key=lambda z: (z.real, z.imag))]
+
+
+def eigenvects(matrix, exact: bool = False):
+    """
+    Eigen-decomposition: (eigenvalues sorted by value, matrix of the matching eigenvectors as
+    columns). Numeric matrices of size >= MATRIX_NUMPY_THRESHOLD use LAPACK unless exact=True and
+    give unit eigenvectors; SymPy's are exact, and a defective matrix has fewer columns than rows.
+    """
+    matrix = _as_matrix(matrix)
+    array = use_numpy(matrix, exact)
+    if array is None:
+        pairs = sorted(((value, vector) for value, _, vectors in matrix.eigenvects() for vector in vectors),
+                       key=lambda pair: _value_order(pair[0]))
+        return [value for value, _ in pairs], Matrix.hstack(*(vector for _, vector in pairs))
+    if np.allclose(array, array.conj().T):
+        values, vectors = np.linalg.eigh(array)
+    else:
+        values, vectors = np.linalg.eig(array)
+    order = sorted(range(len(values)), key=lambda i: (values[i].real, values[i].imag))
+    return [_scalar(values[i]) for i in order], _from_numpy(vectors[:, order])
+
+
+def svd(matrix, exact: bool = False):
+    """
+    Singular value decomposition (U, S, V) with matrix = U * diag(S) * V.H. Numeric matrices of
+    size >= MATRIX_NUMPY_THRESHOLD use LAPACK unless exact=True.
+    """
+    matrix = _as_matrix(matrix)
+    array = use_numpy(matrix, exact)
+    if array is None:
+        return matrix.singular_value_decomposition()
+    u, s, vh = np.linalg.svd(array, full_matrices=False)
+    return _from_numpy(u), _from_numpy(np.diag(s)), _from_numpy(vh.conj().T)
+
+
+def format_matrix(matrix: sympy.MatrixBase) -> str:
+    """
+    Prints a matrix, or summarizes it when it has more than MATRIX_MAX_OUTPUT_ENTRIES entries:
+    its shape, its top-left block and, for real numeric matrices, its smallest and largest entries.
+    """
+    if matrix.rows * matrix.cols <= MATRIX_MAX_OUTPUT_ENTRIES:
+        return str(matrix)
+    block = matrix[:MATRIX_PREVIEW_SIZE, :MATRIX_PREVIEW_SIZE]
+    summary = f"{matrix.rows}x{matrix.cols} matrix (too large to print), top-left {block.rows}x{block.cols} block: {block}"
+    array = to_numpy(matrix)
+    if array is not None and not np.iscomplexobj(array):
+        summary += f", entries from {array.min():.12g} to {array.max():.12g}"
+    return summary
+
+
+@contextlib.contextmanager
+def _not_invertible():
+    # LAPACK reports singular matrices as LinAlgError: raise SymPy's error for them instead
+    try:
+        yield
+    except np.linalg.LinAlgError as e:
+        raise NonInvertibleMatrixError("Matrix det == 0; not invertible.") from e
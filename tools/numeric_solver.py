@@ -0,0 +1,318 @@
+import os
+import time
+import logging
+
+import numpy as np
+import sympy
+import scipy.optimize
+import scipy.integrate
+from langchain_core.tools import tool
+from sympy.utilities.lambdify import lambdify
+
+from tools.math_tools import parse_calculator_expression, calculator_pool
+from tools.worker_pool import WorkerPoolError, JobTimeoutError, JobMemoryError, PoolBusyError
+
+
+NUMERIC_MAX_ITERATIONS = int(os.getenv("NUMERIC_MAX_ITERATIONS", 10_000))
+# Soft time limit checked inside objective functions, below the worker pool hard timeout
+NUMERIC_TIME_LIMIT = float(os.getenv("NUMERIC_TIME_LIMIT", 20))
+ODE_OUTPUT_POINTS = 11
+
+PROBLEMS = ("root", "minimize", "fit", "ode")
+
+
+class _TimeLimitExceeded(Exception):
+    pass
+
+
+def _with_deadline(function, deadline: float):
+    def wrapper(*args):
+        if time.monotonic() > deadline:
+            raise _TimeLimitExceeded()
+        return function(*args)
+    return wrapper
+
+
+def _parse_function(expression: str) -> sympy.Expr:
+    """
+    Parses an expression, turning 'lhs = rhs' and Eq(lhs, rhs) into lhs - rhs.
+
+    Every symbol is made real (see _real_symbol): derivatives of abs, re, im... then simplify
+    to expressions lambdify can compile, e.g. d|y|/dy = sign(y).
+    """
+    if "=" in expression.replace("==", "").replace("<=", "").replace(">=", "").replace("!=", ""):
+        lhs, rhs = expression.split("=", 1)
+        parsed = sympy.sympify(parse_calculator_expression(lhs)) - sympy.sympify(parse_calculator_expression(rhs))
+    else:
+        parsed = sympy.sympify(parse_calculator_expression(expression))
+        if isinstance(parsed, sympy.Equality):
+            parsed = parsed.lhs - parsed.rhs
+    return parsed.xreplace({symbol: _real_symbol(symbol.name) for symbol in parsed.free_symbols})
+
+
+def _real_symbol(name: str) -> sympy.Symbol:
+    return sympy.Symbol(name, real=True)
+
+
+def _lambdify_derivatives(symbols, derivatives):
+    """
+    Compiles the gradient or Jacobian entries, or returns None when they cannot be compiled
+    (derivatives left unevaluated, e.g. of floor or max) so the caller can go derivative-free.
+    """
+    if sympy.Matrix(derivatives).has(sympy.Derivative, sympy.Subs):
+        return None
+    try:
+        return lambdify([symbols], derivatives, modules="numpy")
+    except Exception as e:
+        logging.info(f"numeric_solver_tool: derivatives not compiled ({type(e).__name__}), going derivative-free")
+        return None
+
+
+def _check_symbols(functions: list[sympy.Expr], allowed: list[sympy.Symbol]):
+    unknown = set().union(*(function.free_symbols for function in functions)) - set(allowed)
+    if unknown:
+        raise ValueError(f"no values given for {', '.join(sorted(str(symbol) for symbol in unknown))}")
+
+
+def _format_number(value) -> str:
+    return format(float(value), ".12g")
+
+
+def _format_values(names: list[str], values) -> str:
+    return ", ".join(f"{name} = {_format_number(value)}" for name, value in zip(names, np.atleast_1d(values)))
+
+
+def _solve_root(functions, symbols, names, initial_values, bounds, max_iterations, deadline) -> str:
+    if len(functions) != len(symbols):
+        raise ValueError(f"{len(functions)} equations for {len(symbols)} unknowns, root finding needs as many equations as unknowns")
+
+    if len(symbols) == 1 and bounds:
+        f = _with_deadline(lambdify(symbols, functions[0], modules="numpy"), deadline)
+        root, result = scipy.optimize.brentq(f, bounds[0][0], bounds[0][1], maxiter=max_iterations, full_output=True, disp=False)
+        status = "converged" if result.converged else f"not converged ({result.flag})"
+        return f"Root ({status}, {result.iterations} iterations): {_format_values(names, [root])}"
+
+    vector = sympy.Matrix(functions)
+    residuals = lambdify([symbols], list(vector), modules="numpy")
+    jacobian = _lambdify_derivatives(symbols, vector.jacobian(symbols).tolist())
+    result = scipy.optimize.root(
+        _with_deadline(lambda x: np.asarray(residuals(x), dtype=float), deadline),
+        np.asarray(initial_values, dtype=float),
+        # Without a compiled Jacobian, hybr estimates it by finite differences
+        jac=_with_deadline(lambda x: np.asarray(jacobian(x), dtype=float), deadline) if jacobian else None,
+        method="hybr",
+        options={"maxfev": max_iterations},
+    )
+    status = "converged" if result.success else f"not converged: {result.message}"
+    residual = float(np.max(np.abs(result.fun)))
+    return f"Root ({status}, {result.nfev} evaluations, max residual {residual:.3g}): {_format_values(names, result.x)}"
+
+
+def _solve_minimize(functions, symbols, names, initial_values, bounds, max_iterations, deadline) -> str:
+    if len(functions) != 1:
+        raise ValueError("minimization needs exactly one objective expression")
+    objective = functions[0]
+
+    if len(symbols) == 1 and bounds:
+        f = _with_deadline(lambdify(symbols, objective, modules="numpy"), deadline)
+        result = scipy.optimize.minimize_scalar(f, bounds=tuple(bounds[0]), method="bounded", options={"maxiter": max_iterations})
+        status = "converged" if result.success else f"not converged: {result.message}"
+        return f"Minimum ({status}, {result.nfev} evaluations): {_format_number(result.fun)} at {_format_values(names, [result.x])}"
+
+    f = lambdify([symbols], objective, modules="numpy")
+    gradient = _lambdify_derivatives(symbols, [sympy.diff(objective, symbol) for symbol in symbols])
+    if gradient is None:
+        method, jac = "Nelder-Mead", None
+    else:
+        method, jac = "L-BFGS-B" if bounds else "BFGS", _with_deadline(lambda x: np.asarray(gradient(x), dtype=float), deadline)
+    result = scipy.optimize.minimize(
+        _with_deadline(lambda x: float(f(x)), deadline),
+        np.asarray(initial_values, dtype=float),
+        jac=jac,
+        method=method,
+        bounds=[tuple(bound) for bound in bounds] if bounds else None,
+        options={"maxiter": max_iterations},
+    )
+    status = "converged" if result.success else f"not converged: {result.message}"
+    return f"Minimum ({status}, {result.nit} iterations): {_format_number(result.fun)} at {_format_values(names, result.x)}"
+
+
+def _solve_fit(functions, symbols, names, initial_values, data_x, data_y, max_iterations, deadline) -> str:
+    if len(functions) != 1 or len(symbols) != 1:
+        raise ValueError("curve fitting needs one model expression and one independent variable")
+    if not data_x or not data_y or len(data_x) != len(data_y):
+        raise ValueError("curve fitting needs data_x and data_y of the same length")
+
+    model = functions[0]
+    parameters = sorted(model.free_symbols - set(symbols), key=str)
+    if not parameters:
+        raise ValueError("the model has no parameters to fit")
+    if len(data_x) < len(parameters):
+        raise ValueError(f"{len(data_x)} data points for {len(parameters)} parameters")
+    if initial_values and len(initial_values) != len(parameters):
+        raise ValueError(f"{len(initial_values)} initial values for {len(parameters)} parameters, "
+                         f"give one guess per parameter in the order {', '.join(str(parameter) for parameter in parameters)}")
+
+    f = lambdify([symbols[0]] + parameters, model, modules="numpy")
+    x, y = np.asarray(data_x, dtype=float), np.asarray(data_y, dtype=float)
+    guess = initial_values if initial_values else [1.0] * len(parameters)
+    values, covariance = scipy.optimize.curve_fit(
+        _with_deadline(lambda x, *p: np.broadcast_to(f(x, *p), x.shape).astype(float), deadline),
+        x, y, p0=guess, maxfev=max_iterations,
+    )
+
+    residuals = y - np.broadcast_to(f(x, *values), x.shape)
+    total = np.sum((y - y.mean()) ** 2)
+    r_squared = 1 - np.sum(residuals ** 2) / total if total else float("nan")
+    errors = np.sqrt(np.diag(covariance)) if np.all(np.isfinite(covariance)) else [float("nan")] * len(values)
+    fitted = ", ".join(f"{parameter} = {_format_number(value)} ± {_format_number(error)}"
+                       for parameter, value, error in zip(parameters, values, errors))
+    return f"Fit of {model} ({len(x)} points, R² = {r_squared:.6g}): {fitted}"
+
+
+def _solve_ode(functions, symbols, names, initial_values, t_span, max_iterations, deadline) -> str:
+    if len(functions) != len(symbols):
+        raise ValueError(f"{len(functions)} derivatives for {len(symbols)} state variables")
+    if not initial_values or len(initial_values) != len(symbols):
+        raise ValueError("ODE integration needs one initial value per state variable")
+    if not t_span or len(t_span) != 2:
+        raise ValueError("ODE integration needs t_span = [t0, t1]")
+
+    t = _real_symbol("t")
+    _check_symbols(functions, symbols + [t])
+    derivatives = lambdify([t, symbols], functions, modules="numpy")
+    evaluations = 0
+    stopped: Exception | None = None
+
+    def rhs(time_value, state):
+        # An exception raised through LSODA's Fortran callback gets "capi_return is NULL" printed
+        # on stderr: once stopped, the derivatives are zero so the integration ends in a few steps
+        nonlocal evaluations, stopped
+        if stopped is None:
+            evaluations += 1
+            try:
+                if evaluations > max_iterations:
+                    raise _TimeLimitExceeded(f"more than {max_iterations} evaluations")
+                if time.monotonic() > deadline:
+                    raise _TimeLimitExceeded()
+                return np.asarray(derivatives(time_value, state), dtype=float)
+            except Exception as e:
+                stopped = e
+        return np.zeros(len(symbols))
+
+    t_eval = np.linspace(t_span[0], t_span[1], ODE_OUTPUT_POINTS)
+    result = scipy.integrate.solve_ivp(rhs, t_span, initial_values, method="LSODA", t_eval=t_eval, rtol=1e-8, atol=1e-10)
+    if stopped is not None:
+        raise stopped
+    if not result.success:
+        return f"Error: ODE integration failed - {result.message}"
+
+    header = "| t | " + " | ".join(names) + " |"
+    rows = [f"| {_format_number(time_value)} | " + " | ".join(_format_number(value) for value in result.y[:, i]) + " |"
+            for i, time_value in enumerate(result.t)]
+    return "\n".join([f"ODE solution ({result.nfev} evaluations):", header, "|" + "---|" * (len(names) + 1)] + rows)
+
+
+def solve_numeric(problem: str, expressions: list[str], variables: list[str], initial_values: list[float] | None = None,
+                  bounds: list[list[float]] | None = None, data_x: list[float] | None = None,
+                  data_y: list[float] | None = None, t_span: list[float] | None = None,
+                  max_iterations: int = 1000) -> str:
+    """
+    Solves a numeric problem with SciPy, the expressions being compiled once with lambdify.
+
+    See numeric_solver_tool for the arguments.
+
+    Returns:
+        str: The solution, or an error message starting with "Error".
+    """
+    start = time.monotonic()
+    deadline = start + NUMERIC_TIME_LIMIT
+    try:
+        if problem not in PROBLEMS:
+            return f"Error: Unknown problem '{problem}', use one of {', '.join(PROBLEMS)}"
+        if not expressions or not variables:
+            return "Error: At least one expression and one variable are required"
+        max_iterations = max(1, min(int(max_iterations), NUMERIC_MAX_ITERATIONS))
+
+        functions = [_parse_function(expression) for expression in expressions]
+        symbols = [_real_symbol(name) for name in variables]
+        if initial_values is None and problem in ("root", "minimize"):
+            initial_values = [1.0] * len(symbols)
+        if initial_values is not None and problem in ("root", "minimize") and len(initial_values) != len(symbols):
+            return f"Error: {len(initial_values)} initial values for {len(symbols)} variables"
+        if bounds and len(bounds) != len(symbols):
+            return f"Error: {len(bounds)} bounds for {len(symbols)} variables"
+
+        if problem == "root":
+            _check_symbols(functions, symbols)
+            answer = _solve_root(functions, symbols, variables, initial_values, bounds, max_iterations, deadline)
+        elif problem == "minimize":
+            _check_symbols(functions, symbols)
+            answer = _solve_minimize(functions, symbols, variables, initial_values, bounds, max_iterations, deadline)
+        elif problem == "fit":
+            answer = _solve_fit(functions, symbols, variables, initial_values, data_x, data_y, max_iterations, deadline)
+        else:
+            answer = _solve_ode(functions, symbols, variables, initial_values, t_span, max_iterations, deadline)
+
+        logging.info(f"numeric_solver_tool {problem} solved in {time.monotonic() - start:.3f}s")
+        return answer
+
+    except _TimeLimitExceeded as e:
+        logging.error(f"Error in numeric_solver_tool: limit exceeded for {problem} {expressions}")
+        return f"Error: The {problem} computation was stopped ({str(e) or f'time limit of {NUMERIC_TIME_LIMIT}s exceeded'})"
+    except (SyntaxError, TypeError, ValueError, sympy.SympifyError, RuntimeError) as e:
+        # curve_fit raises RuntimeError when it does not converge within maxfev
+        logging.error(f"Error in numeric_solver_tool: {type(e).__name__}: {e}")
+        return f"Error: {type(e).__name__}: {e}"
+    except Exception as e:
+        logging.error(f"Unexpected error in numeric_solver_tool: {type(e).__name__} - {e}")
+        return f"An unexpected error occurred: {type(e).__name__} - {e}"
+
+
+@tool
+async def numeric_solver_tool(problem: str, expressions: list[str], variables: list[str],
+                              initial_values: list[float] | None = None, bounds: list[list[float]] | None = None,
+                              data_x: list[float] | None = None, data_y: list[float] | None = None,
+                              t_span: list[float] | None = None, max_iterations: int = 1000) -> str:
+    """
+    Solves numeric problems with SciPy: root finding, minimization, curve fitting and ODE integration.
+    Prefer it to `calculator_tool` solve/nsolve for transcendental equations, systems and optimization.
+
+    Args:
+        problem: One of:
+                   - 'root': solve equations, e.g. expressions=["cos(x) = x"], variables=["x"], bounds=[[0, 1]]
+                     or a system: expressions=["x**2 + y**2 = 4", "exp(x) = y"], variables=["x", "y"], initial_values=[1, 1]
+                   - 'minimize': minimize expressions[0], e.g. expressions=["(x-1)**2 + (y-2)**2"], variables=["x", "y"];
+                     pass bounds to constrain each variable
+                   - 'fit': least-squares fit of the model expressions[0] in the independent variable variables[0];
+                     every other symbol is a parameter, e.g. expressions=["a*exp(b*x)"], variables=["x"], data_x=[...], data_y=[...]
+                   - 'ode': integrate d(variables[i])/dt = expressions[i] from t_span[0] to t_span[1] starting at initial_values,
+                     e.g. expressions=["v", "-9.81"], variables=["h", "v"], initial_values=[100, 0], t_span=[0, 4]
+        expressions: The equations ('lhs = rhs' or an expression equal to zero), objective, model or derivatives.
+        variables: The unknowns, optimization variables, independent variable (fit) or state variables (ode).
+        initial_values: Starting point (root, minimize; defaults to 1 for each variable), parameter guesses (fit)
+                        or initial state (ode).
+        bounds: One [low, high] pair per variable. For a single unknown, a root bracket or the search interval.
+        data_x: Independent variable data (fit).
+        data_y: Observed data (fit).
+        t_span: [t0, t1] integration interval (ode), the time variable is 't'.
+        max_iterations: Iteration or function evaluation limit. Defaults to 1000.
+
+    Returns:
+        The solution with its convergence status, or an error message.
+    """
+    try:
+        return await calculator_pool.submit(solve_numeric, problem, expressions, variables, initial_values,
+                                            bounds, data_x, data_y, t_span, max_iterations)
+    except JobTimeoutError as e:
+        logging.error(f"Error in numeric_solver_tool: {e}")
+        return f"Error: Computation took too long and was stopped ({e}). Try a better initial guess or fewer iterations."
+    except JobMemoryError as e:
+        logging.error(f"Error in numeric_solver_tool: {e}")
+        return f"Error: Computation used too much memory and was stopped ({e})"
+    except PoolBusyError as e:
+        logging.error(f"Error in numeric_solver_tool: {e}")
+        return "Error: The calculator is busy, try again in a moment"
+    except WorkerPoolError as e:
+        logging.error(f"Error in numeric_solver_tool: {type(e).__name__} - {e}")
+        return f"An unexpected error occurred: {type(e).__name__} - {e}"
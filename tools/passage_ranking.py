@@ -0,0 +1,246 @@
+import os
+import re
+import math
+import hashlib
+import threading
+from collections import Counter, OrderedDict, defaultdict
+
+
+# BM25 parameters (standard Okapi values)
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+PASSAGE_MAX_WORDS = 120
+CHARS_PER_TOKEN = 4  # rough estimate used for token budgets, good enough for English/French text
+PASSAGE_INDEX_CACHE_SIZE = int(os.getenv('PASSAGE_INDEX_CACHE_SIZE', 32))  # documents whose index is kept
+
+STOPWORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "how", "in", "is",
+    "it", "its", "of", "on", "or", "that", "the", "this", "to", "was", "were", "what", "when", "where",
+    "which", "who", "why", "will", "with", "de", "des", "du", "en", "et", "la", "le", "les", "un", "une",
+})
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Splits text into lowercase terms, dropping stopwords and single characters.
+
+    Args:
+        text (str): The text to tokenize.
+
+    Returns:
+        list[str]: The list of indexable terms, in order of appearance.
+    """
+    return [term for term in _TOKEN_PATTERN.findall(text.lower()) if len(term) > 1 and term not in STOPWORDS]
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimates the number of LLM tokens in a text without loading a tokenizer.
+
+    Args:
+        text (str): The text to measure.
+
+    Returns:
+        int: The approximate token count.
+    """
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def split_passages(text: str, max_words: int = PASSAGE_MAX_WORDS) -> list[str]:
+    """
+    Splits extracted page text into passages of roughly `max_words` words.
+
+    Lines (as produced by BeautifulSoup's get_text with a newline separator) are kept
+    whole and grouped until the word budget is reached; overlong lines are cut.
+
+    Args:
+        text (str): The extracted page text.
+        max_words (int, optional): Target passage size in words. Defaults to PASSAGE_MAX_WORDS.
+
+    Returns:
+        list[str]: The passages, in document order.
+    """
+    passages = []
+    current = []
+    current_words = 0
+
+    for line in text.splitlines():
+        words = line.split()
+        if not words:
+            continue
+
+        while len(words) > max_words:
+            if current:
+                passages.append(" ".join(current))
+                current, current_words = [], 0
+            passages.append(" ".join(words[:max_words]))
+            words = words[max_words:]
+
+        if current_words + len(words) > max_words and current:
+            passages.append(" ".join(current))
+            current, current_words = [], 0
+
+        current.append(" ".join(words))
+        current_words += len(words)
+
+    if current:
+        passages.append(" ".join(current))
+
+    return passages
+
+
+def bm25_idf(passage_count: int, document_frequency: int) -> float:
+    """Okapi BM25 inverse document frequency (the always-positive variant)."""
+    return math.log(1 + (passage_count - document_frequency + 0.5) / (document_frequency + 0.5))
+
+
+class PassageIndex:
+    """
+    BM25 inverted index over the passages of a single document.
+
+    The index (postings, document lengths and IDF table) is computed once per document
+    (see get_passage_index), so any number of queries can be scored against it cheaply.
+    """
+
+    def __init__(self, passages: list[str]):
+        self.passages = passages
+        self.lengths = []
+        self.postings: dict[str, list[tuple[int, int]]] = defaultdict(list)
+
+        for passage_id, passage in enumerate(passages):
+            terms = Counter(tokenize(passage))
+            self.lengths.append(sum(terms.values()))
+            for term, frequency in terms.items():
+                self.postings[term].append((passage_id, frequency))
+
+        self.average_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+        self.idf = {
+            term: bm25_idf(len(passages), len(postings))
+            for term, postings in self.postings.items()
+        }
+
+    @classmethod
+    def from_text(cls, text: str, max_words: int = PASSAGE_MAX_WORDS) -> "PassageIndex":
+        """Builds an index from raw page text."""
+        return cls(split_passages(text, max_words=max_words))
+
+    def score(self, query: str, idf: dict[str, float] | None = None, average_length: float | None = None) -> dict[int, float]:
+        """
+        Scores the passages containing at least one query term.
+
+        Args:
+            query (str): The search query.
+            idf (dict[str, float], optional): IDF table to use instead of this document's own,
+                                              e.g. one computed over a whole collection.
+            average_length (float, optional): Passage length to normalize against, also for
+                                              collection-wide scoring.
+
+        Returns:
+            dict[int, float]: BM25 score per matching passage id.
+        """
+        idf = self.idf if idf is None else idf
+        average_length = self.average_length if average_length is None else average_length
+        scores: dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            term_idf = idf.get(term)
+            if term_idf is None or term not in self.postings:
+                continue
+            for passage_id, frequency in self.postings[term]:
+                length_norm = 1 - BM25_B + BM25_B * self.lengths[passage_id] / (average_length or 1)
+                scores[passage_id] += term_idf * frequency * (BM25_K1 + 1) / (frequency + BM25_K1 * length_norm)
+        return scores
+
+    def top_passages(self, query: str, top_k: int = 8, token_budget: int = 2000) -> list[int]:
+        """
+        Selects the best passages for a query within a token budget.
+
+        Args:
+            query (str): The search query.
+            top_k (int, optional): Maximum number of passages to keep. Defaults to 8.
+            token_budget (int, optional): Maximum estimated tokens for the selection. Defaults to 2000.
+
+        Returns:
+            list[int]: The selected passage ids, in document order.
+        """
+        ranked = sorted(self.score(query).items(), key=lambda item: item[1], reverse=True)
+        selected = []
+        used_tokens = 0
+        for passage_id, _ in ranked:
+            if len(selected) >= top_k:
+                break
+            cost = estimate_tokens(self.passages[passage_id])
+            if used_tokens + cost > token_budget:
+                continue
+            selected.append(passage_id)
+            used_tokens += cost
+        return sorted(selected)
+
+
+_index_cache: OrderedDict[tuple[bytes, int], PassageIndex] = OrderedDict()
+_index_cache_lock = threading.Lock()
+
+
+def get_passage_index(text: str, max_words: int = PASSAGE_MAX_WORDS) -> PassageIndex:
+    """
+    Returns the passage index of a text, built on first use and shared afterwards.
+
+    The research memory indexes every fetched page, and the same page is then ranked
+    against the query (and later ones): both get the same index from this LRU cache of
+    the last PASSAGE_INDEX_CACHE_SIZE documents, keyed by a digest of the text.
+
+    Args:
+        text (str): The extracted page text.
+        max_words (int, optional): Target passage size in words. Defaults to PASSAGE_MAX_WORDS.
+
+    Returns:
+        PassageIndex: The index of the text.
+    """
+    key = (hashlib.blake2b(text.encode("utf-8", errors="replace"), digest_size=16).digest(), max_words)
+    with _index_cache_lock:
+        index = _index_cache.get(key)
+        if index is not None:
+            _index_cache.move_to_end(key)
+            return index
+
+    # Built outside the lock: two threads may index the same new text, the last one is kept
+    index = PassageIndex.from_text(text, max_words=max_words)
+    with _index_cache_lock:
+        _index_cache[key] = index
+        while len(_index_cache) > PASSAGE_INDEX_CACHE_SIZE:
+            _index_cache.popitem(last=False)
+    return index
+
+
+def rank_passages(text: str, query: str, top_k: int = 8, token_budget: int = 2000) -> str:
+    """
+    Reduces a page to the passages most relevant to a query.
+
+    Args:
+        text (str): The extracted page text.
+        query (str): The question the page is being read for.
+        top_k (int, optional): Maximum number of passages to return. Defaults to 8.
+        token_budget (int, optional): Maximum estimated tokens to return. Defaults to 2000.
+
+    Returns:
+        str: The selected passages in document order, separated by "[...]" markers and
+             preceded by a one-line summary. Texts already within budget are returned as is.
+    """
+    if estimate_tokens(text) <= token_budget:
+        return text
+
+    index = get_passage_index(text)
+    selected = index.top_passages(query, top_k=top_k, token_budget=token_budget)
+    if not selected:
+        # Nothing matched the query: fall back to the beginning of the page.
+        used_tokens = 0
+        for passage_id, passage in enumerate(index.passages[:top_k]):
+            used_tokens += estimate_tokens(passage)
+            if used_tokens > token_budget:
+                break
+            selected.append(passage_id)
+
+    header = f"[{len(selected)} of {len(index.passages)} passages selected for: {query}]"
+    return header + "\n" + "\n[...]\n".join(index.passages[passage_id] for passage_id in selected)
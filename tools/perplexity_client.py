@@ -0,0 +1,228 @@
+import json
+import time
+import random
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional
+
+import httpx
+
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class PerplexityError(Exception):
+    """Raised when the Perplexity API call fails for good (after retries, or on a non-retryable error)."""
+
+
+class CircuitOpenError(PerplexityError):
+    """Raised without calling the API while the circuit breaker is open."""
+
+
+class _RetryableStatusError(Exception):
+    def __init__(self, status_code: int, retry_after: Optional[float]):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Fails fast while an upstream provider is degraded.
+
+    After `failure_threshold` consecutive failed requests the circuit opens and requests
+    are rejected for `reset_timeout` seconds. Then a single trial request is let through
+    (half-open): its success closes the circuit, its failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+
+    def allow_request(self) -> bool:
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+            self.trial_in_flight = False
+
+        if self.state == self.HALF_OPEN:
+            if self.trial_in_flight:
+                return False
+            self.trial_in_flight = True
+
+        return True
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self.trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.trial_in_flight = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def release_trial(self):
+        # A trial that ended without a verdict (cancelled, or failed for a reason that is not the
+        # provider's): the circuit stays half-open and the next request becomes the trial
+        self.trial_in_flight = False
+
+
+class PerplexityClient:
+    """
+    Async streaming client for the Perplexity chat completions (Sonar) API.
+
+    Responses are streamed (server-sent events) so partial answers can be forwarded as
+    they arrive. Every request has connect and read timeouts, retries 429/5xx responses
+    and transport errors with jittered exponential backoff (honouring Retry-After), and
+    goes through a circuit breaker shared by all callers of the client.
+
+    The HTTP connection pool (one httpx.AsyncClient) is shared by all requests of the
+    client, so connections are kept alive between calls; close it with `aclose` on shutdown.
+    """
+
+    def __init__(self, api_key: Optional[str], base_url: str = "https://api.perplexity.ai",
+                 connect_timeout: float = 5.0, read_timeout: float = 30.0, max_retries: int = 3,
+                 backoff_base: float = 0.5, backoff_max: float = 8.0, breaker: Optional[CircuitBreaker] = None):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.timeout = httpx.Timeout(connect=connect_timeout, read=read_timeout, write=connect_timeout, pool=connect_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        self._client: httpx.AsyncClient | None = None
+
+    def _http_client(self) -> httpx.AsyncClient:
+        # Created on first use, inside the event loop the client runs in
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(timeout=self.timeout)
+        return self._client
+
+    async def aclose(self):
+        """Closes the pooled connections (the next request opens new ones)."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _backoff_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        # "Full jitter": uniform in [0, min(cap, base * 2^attempt)]
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def chat(self, messages: list[dict], model: str = "sonar", temperature: float = 0,
+                   on_token: Optional[Callable[[str], Awaitable[None]]] = None) -> str:
+        """
+        Streams a chat completion and returns the full answer.
+
+        Args:
+            messages (list[dict]): The chat messages (role/content dictionaries).
+            model (str, optional): The Perplexity model. Defaults to "sonar".
+            temperature (float, optional): Sampling temperature. Defaults to 0.
+            on_token (Callable, optional): Coroutine called with each content delta as it arrives.
+
+        Returns:
+            str: The answer, followed by the list of cited URLs when the API returns them.
+
+        Raises:
+            CircuitOpenError: If the circuit breaker is open.
+            PerplexityError: If the request failed after all retries or on a non-retryable
+                             HTTP error. A stream broken after tokens were forwarded is not
+                             retried; the partial answer is returned with an interruption note.
+        """
+        if not self.breaker.allow_request():
+            raise CircuitOpenError("Perplexity AI is temporarily unavailable (circuit open), try again later")
+        is_trial = self.breaker.state == CircuitBreaker.HALF_OPEN
+
+        try:
+            return await self._chat_with_retries(messages, model, temperature, on_token)
+        finally:
+            # Cancellation (e.g. a caller's wait_for) is a BaseException: no success or failure gets recorded
+            if is_trial:
+                self.breaker.release_trial()
+
+    async def _chat_with_retries(self, messages: list[dict], model: str, temperature: float,
+                                 on_token: Optional[Callable[[str], Awaitable[None]]]) -> str:
+        payload = {"model": model, "temperature": temperature, "stream": True, "messages": messages}
+        headers = {"Content-Type": "application/json", "Authorization": f"Bearer {self.api_key}"}
+
+        last_error: Exception | None = None
+        for attempt in range(self.max_retries + 1):
+            received = []
+            try:
+                answer = await self._stream(payload, headers, received, on_token)
+                self.breaker.record_success()
+                return answer
+            except _RetryableStatusError as e:
+                last_error, retry_after = e, e.retry_after
+            except (httpx.TimeoutException, httpx.TransportError) as e:
+                last_error, retry_after = e, None
+            except httpx.HTTPStatusError as e:
+                # 4xx errors (bad key, bad request) are not a provider outage: no retry, breaker untouched
+                raise PerplexityError(f"HTTP {e.response.status_code}: {e.response.text[:200]}") from e
+            # Anything else (a malformed chunk, an error raised by on_token) propagates without
+            # counting as a provider failure
+
+            if received:
+                # Partial tokens were already forwarded, retrying would duplicate them: keep what we have
+                self.breaker.record_failure()
+                logging.warning(f"Perplexity AI stream interrupted after {len(received)} chunks: {last_error}")
+                return "".join(received) + f"\n\n[Answer interrupted: {type(last_error).__name__}]"
+            if attempt < self.max_retries:
+                delay = self._backoff_delay(attempt, retry_after)
+                logging.warning(f"Perplexity AI request failed ({type(last_error).__name__}: {last_error}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+        self.breaker.record_failure()
+        raise PerplexityError(f"{type(last_error).__name__}: {last_error}") from last_error
+
+    async def _stream(self, payload: dict, headers: dict, received: list[str],
+                      on_token: Optional[Callable[[str], Awaitable[None]]]) -> str:
+        citations = []
+        async with self._http_client().stream("POST", f"{self.base_url}/chat/completions", json=payload,
+                                              headers=headers) as response:
+            if response.status_code in RETRYABLE_STATUS_CODES:
+                retry_after = response.headers.get("Retry-After")
+                raise _RetryableStatusError(
+                    response.status_code,
+                    float(retry_after) if retry_after and retry_after.replace(".", "", 1).isdigit() else None
+                )
+            if response.is_error:
+                await response.aread()
+                response.raise_for_status()
+
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+
+                try:
+                    chunk = json.loads(data)
+                except json.JSONDecodeError as e:
+                    raise PerplexityError(f"Malformed response chunk: {data[:200]}") from e
+                citations = chunk.get("citations") or citations
+                choices = chunk.get("choices") or [{}]
+                delta = (choices[0].get("delta") or {}).get("content") or ""
+                if delta:
+                    received.append(delta)
+                    if on_token is not None:
+                        await on_token(delta)
+
+        answer = "".join(received)
+        if citations:
+            answer += "\n\nSources:\n" + "\n".join(f"[{i}] {url}" for i, url in enumerate(citations, 1))
+        return answer
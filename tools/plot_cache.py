@@ -0,0 +1,119 @@
+import os
+import hashlib
+import logging
+import tempfile
+import threading
+
+
+class PlotCache:
+    """
+    Size-bounded, content-addressed store of rendered plot images on disk.
+
+    Each image is stored in a file named after its key (a hash of everything that
+    determines the picture, see `make_key`), so identical requests share one file and
+    writes never need to be coordinated between processes: a file is complete once it
+    exists. Least recently used images are removed when the directory grows beyond
+    `max_bytes`. Storage errors are logged and never raised: the cache must not break
+    a plot.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 200 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.total_bytes = None  # computed on first write
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """Hashes the parts (strings, numbers, lists...) that determine a rendered image."""
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(repr(part).encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.img")
+
+    def get(self, key: str) -> bytes | None:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as file:
+                image = file.read()
+            os.utime(path)  # the modification time orders the eviction
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except OSError as e:
+            logging.error(f"Error reading the plot cache {path}: {e}")
+            self.misses += 1
+            return None
+        self.hits += 1
+        return image
+
+    def put(self, key: str, image: bytes):
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename, so that readers never see a partial file
+            descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            try:
+                with os.fdopen(descriptor, "wb") as file:
+                    file.write(image)
+                os.replace(temporary_path, path)
+            except OSError:
+                os.remove(temporary_path)
+                raise
+
+            with self.lock:
+                if self.total_bytes is None:
+                    self.total_bytes = sum(size for _, size, _ in self._entries())
+                else:
+                    self.total_bytes += len(image)
+                if self.total_bytes > self.max_bytes:
+                    self._evict()
+        except OSError as e:
+            logging.error(f"Error writing the plot cache {path}: {e}")
+
+    def _entries(self) -> list[tuple[float, int, str]]:
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".img"):
+                    path = os.path.join(root, name)
+                    try:
+                        status = os.stat(path)
+                    except FileNotFoundError:
+                        continue  # evicted by another process
+                    entries.append((status.st_mtime, status.st_size, path))
+        return entries
+
+    def _evict(self):
+        # Down to 90% of the limit, so that eviction does not run on every write
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                total -= size
+        self.total_bytes = total
+
+    def clear(self):
+        with self.lock:
+            for _, _, path in self._entries():
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    logging.error(f"Error clearing the plot cache {path}: {e}")
+            self.total_bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / lookups if lookups else 0.0}
@@ -1,19 +1,64 @@
 import io
+import os
 import logging
+import importlib.metadata
 from typing import Union
 
 import chainlit as cl
 
-import matplotlib.pyplot as plt
-import seaborn as sns
+import numpy as np
+import sympy
+import matplotlib
+from matplotlib.figure import Figure
 import pandas as pd
 from langchain_core.tools import tool
+from sympy.utilities.lambdify import lambdify
+
+from tools.downsampling import downsample_line
+from tools.file_tools import resolve_workspace_path
+from tools.fast_plot import PLOT_STYLE, styled_figure, can_draw_fast, draw_fast
+from tools.image_encoding import (
+    encode_figure, sniff_format, IMAGE_FORMATS, IMAGE_PRESETS, MIME_TYPES, EXTENSIONS,
+    CHART_IMAGE_FORMAT, CHART_IMAGE_PRESET, CHART_IMAGE_MAX_BYTES,
+)
+from tools.math_tools import parse_calculator_expression
+from tools.plot_cache import PlotCache
+from tools.table_ingest import read_table, read_table_file
+from tools.worker_pool import WorkerPool, WorkerPoolError, JobTimeoutError, JobMemoryError, PoolBusyError
+
+
+# Plots are rendered off the event loop in pre-warmed worker processes
+PLOT_WORKERS = int(os.getenv("PLOT_WORKERS", 2))
+PLOT_TIMEOUT = float(os.getenv("PLOT_TIMEOUT", 30))  # wall-clock seconds per plot, including the wait for a worker
+PLOT_MAX_PENDING = int(os.getenv("PLOT_MAX_PENDING", 32))  # plots waiting for a worker before new ones are refused
+PLOT_MEMORY_LIMIT_MB = int(os.getenv("PLOT_MEMORY_LIMIT_MB", 2048))  # per worker (POSIX only)
+
+# Rendered images are cached on disk, keyed by the data and everything that changes the picture
+PLOT_CACHE_DIR = os.getenv("PLOT_CACHE_DIR", os.path.join(".cache", "plots"))  # empty to disable
+PLOT_CACHE_MAX_MB = int(os.getenv("PLOT_CACHE_MAX_MB", 200))
+PLOT_CACHE_VERSION = 3  # bump when a rendering change should invalidate cached images
+
+
+# Expression plots: initial uniform samples, then adaptive refinement where the curve changes fast
+PLOT_SAMPLES = int(os.getenv("PLOT_SAMPLES", 600))
+PLOT_MAX_SAMPLES = int(os.getenv("PLOT_MAX_SAMPLES", 20_000))
+PLOT_REFINE_PASSES = 8
+PLOT_MAX_EXPRESSIONS = 10
+
+# Line and scatter plots with more rows are reduced: LTTB for lines, hexbin density for scatters
+PLOT_MAX_POINTS = int(os.getenv("PLOT_MAX_POINTS", 5000))
+PLOT_DOWNSAMPLE_POINTS = 2000  # points kept on a downsampled line, about twice the image width in pixels
+PLOT_HEXBIN_GRIDSIZE = 80
 
 
 def generate_plot(data, plot_type='line', title='Data Visualization', x_label='X-axis', y_label='Y-axis'):
     """
     Generate an interactive plot using matplotlib and seaborn.
 
+    Plots of numbers or dates are drawn with matplotlib directly (see tools.fast_plot);
+    seaborn, imported on first use, draws the others, e.g. the mean and confidence
+    interval of repeated x values.
+
     Args:
         data (str, pd.DataFrame or dict): Input data for plotting. If string, it should be CSV format or markdown table.
         plot_type (str): Type of plot (line, bar, scatter, histogram)
@@ -22,87 +67,390 @@ def generate_plot(data, plot_type='line', title='Data Visualization', x_label='X
         y_label (str): Y-axis label
 
     Returns:
-        plt.Figure: Matplotlib figure object
+        Figure: Matplotlib figure object, or None if the data could not be plotted
     """
-    # Set seaborn style for enhanced aesthetics
-    sns.set_theme(style="darkgrid")
-
-    # Create a new figure
-    plt.figure(figsize=(10, 6))
 
     # Convert input data to DataFrame
     if isinstance(data, str):
         try:
-            # Remove any leading/trailing whitespace and potential markdown formatting
-            clean_data = data.strip()
-            
-            # Check if it's a markdown table (has | characters)
-            if '|' in clean_data:
-                # Extract the content between the markdown table formatting
-                table_lines = [line.strip() for line in clean_data.split('\n') if line.strip()]
-                
-                # Remove the separator line if present (contains dashes)
-                table_lines = [line for line in table_lines if not (line.startswith('|') and all(c == '-' or c == '|' or c.isspace() for c in line))]
-                
-                # Remove the outer | characters and split by |
-                rows = [[cell.strip() for cell in line.strip('|').split('|')] for line in table_lines]
-                
-                # Create DataFrame
-                if len(rows) >= 2:  # At least header and one data row
-                    df = pd.DataFrame(rows[1:], columns=rows[0])
-                    
-                    # Convert numeric columns to numbers
-                    for col in df.columns:
-                        try:
-                            df[col] = pd.to_numeric(df[col])
-                        except (ValueError, TypeError):
-                            pass  # Keep as string if conversion fails
-                    
-                    data = df
-                else:
-                    raise ValueError("Not enough data rows in markdown table")
-            else:
-                # Try to parse as CSV
-                data = pd.read_csv(io.StringIO(clean_data))
+            # Markdown table or CSV, parsed in one pass with typed columns
+            data = read_table(data)
         except Exception as e:
             logging.error(f"Error parsing data: {e}")
             return None
     elif isinstance(data, dict):
         data = pd.DataFrame(data)
 
-    # Plot based on type
+    # Plot based on type, on a figure of its own: no pyplot global state is involved
     try:
-        if plot_type == 'line':
-            sns.lineplot(x=data.columns[0], y=data.columns[1], data=data)
-        elif plot_type == 'bar':
-            sns.barplot(x=data.columns[0], y=data.columns[1], data=data)
-        elif plot_type == 'scatter':
-            sns.scatterplot(x=data.columns[0], y=data.columns[1], data=data)
-        elif plot_type == 'histogram':
-            sns.histplot(x=data.columns[0], y=data.columns[1], data=data)
+        # Seaborn "darkgrid" style for enhanced aesthetics, applied to this figure only
+        figure, axes = styled_figure()
+
+        large = plot_type in ('line', 'scatter') and len(data) > PLOT_MAX_POINTS and _is_numeric_series(data)
+
+        if plot_type == 'line' and large:
+            reduced, rows = downsample_line_data(data, PLOT_DOWNSAMPLE_POINTS)
+            draw_fast(axes, reduced, 'line')
+            _annotate(axes, f"{rows:,} points downsampled to {len(reduced):,} ({rows / len(reduced):.0f}:1, LTTB)")
+        elif plot_type == 'scatter' and large:
+            x, y = (pd.to_numeric(data[column], errors='coerce').to_numpy(dtype=float) for column in data.columns[:2])
+            finite = np.isfinite(x) & np.isfinite(y)
+            bins = axes.hexbin(x[finite], y[finite], gridsize=PLOT_HEXBIN_GRIDSIZE, mincnt=1, bins='log', cmap='viridis')
+            figure.colorbar(bins, ax=axes, label='points per cell')
+            _annotate(axes, f"{int(finite.sum()):,} points shown as density (hexbin)")
+        elif can_draw_fast(data, plot_type):
+            draw_fast(axes, data, plot_type)
         else:
-            raise ValueError(f"Unsupported plot type: {plot_type}")
+            _draw_seaborn(axes, data, plot_type)
 
         # Set plot details
-        plt.title(title, fontsize=15)
-        plt.xlabel(x_label, fontsize=12)
-        plt.ylabel(y_label, fontsize=12)
-        plt.tight_layout()
+        axes.set_title(title, fontsize=15)
+        axes.set_xlabel(x_label, fontsize=12)
+        axes.set_ylabel(y_label, fontsize=12)
+        figure.tight_layout()
 
-        return plt
+        return figure
 
     except Exception as e:
         logging.error(f"Error generating plot: {e}")
         return None
 
 
+def _draw_seaborn(axes, data: pd.DataFrame, plot_type: str):
+    # Seaborn and the scipy.stats modules it loads cost about half a second: imported on first use only
+    import seaborn as sns
+
+    if plot_type == 'line':
+        sns.lineplot(x=data.columns[0], y=data.columns[1], data=data, ax=axes)
+    elif plot_type == 'bar':
+        sns.barplot(x=data.columns[0], y=data.columns[1], data=data, ax=axes)
+    elif plot_type == 'scatter':
+        sns.scatterplot(x=data.columns[0], y=data.columns[1], data=data, ax=axes)
+    elif plot_type == 'histogram':
+        sns.histplot(x=data.columns[0], y=data.columns[1], data=data, ax=axes)
+    else:
+        raise ValueError(f"Unsupported plot type: {plot_type}")
+
+
+def _is_numeric_series(data: pd.DataFrame) -> bool:
+    if len(data.columns) < 2:
+        return False
+    x, y = data[data.columns[0]], data[data.columns[1]]
+    return (pd.api.types.is_numeric_dtype(x) or pd.api.types.is_datetime64_any_dtype(x)) and pd.api.types.is_numeric_dtype(y)
+
+
+def downsample_line_data(data: pd.DataFrame, points: int) -> tuple[pd.DataFrame, int]:
+    """
+    Reduces a numeric (x, y) table to about `points` rows that keep the shape of its line.
+
+    Rows are sorted by x, as lines are drawn; repeated x values are averaged first,
+    which is the line seaborn would draw through them. LTTB then picks the rows to keep.
+
+    Args:
+        data (pd.DataFrame): Table with x in the first column and y in the second.
+        points (int): Number of rows to keep.
+
+    Returns:
+        tuple[pd.DataFrame, int]: The reduced table and the number of rows it represents.
+    """
+    x_column, y_column = data.columns[0], data.columns[1]
+    frame = data[[x_column, y_column]].dropna()
+    rows = len(frame)
+    if not frame[x_column].is_unique:
+        frame = frame.groupby(x_column, as_index=False, sort=True)[y_column].mean()
+    elif not frame[x_column].is_monotonic_increasing:
+        frame = frame.sort_values(x_column, kind='stable')
+
+    x = frame[x_column].to_numpy()
+    x = x.astype('datetime64[ns]').astype(np.int64).astype(float) if np.issubdtype(x.dtype, np.datetime64) else x.astype(float)
+    indices = downsample_line(x, frame[y_column].to_numpy(dtype=float), points)
+    return frame.iloc[indices], rows
+
+
+def _annotate(axes, text: str):
+    # Note in the lower right corner of the plot how the data was reduced
+    axes.text(0.99, 0.01, text, transform=axes.transAxes, ha='right', va='bottom', fontsize=9, color='dimgray',
+              bbox=dict(boxstyle='round,pad=0.3', facecolor='white', alpha=0.7, edgecolor='none'))
+
+
+def parse_plot_range(spec: str) -> tuple[float, float]:
+    """
+    Parses a plotting domain 'start:stop' (or 'start,stop'); bounds may be expressions such as '-2*pi:2*pi'.
+
+    Raises:
+        ValueError: If the range is invalid or empty.
+    """
+    parts = spec.split(":") if ":" in spec else spec.split(",")
+    if len(parts) != 2:
+        raise ValueError(f"invalid range '{spec}', expected 'start:stop'")
+    start, stop = (float(sympy.N(parse_calculator_expression(part.strip()))) for part in parts)
+    if not np.isfinite(start) or not np.isfinite(stop) or start >= stop:
+        raise ValueError(f"invalid range '{spec}', start must be lower than stop")
+    return start, stop
+
+
+def _evaluate_real(function, x: np.ndarray) -> np.ndarray:
+    with np.errstate(all="ignore"):
+        y = np.broadcast_to(np.asarray(function(x)), x.shape)
+    if np.iscomplexobj(y):
+        # Keep the real branch only: points with an imaginary part are not drawn
+        y = np.where(np.abs(y.imag) <= 1e-12 * np.maximum(1, np.abs(y.real)), y.real, np.nan)
+    y = y.astype(float)
+    y[~np.isfinite(y)] = np.nan
+    return y
+
+
+def sample_expression(expression: str, x_min: float, x_max: float, variable: str = "x",
+                      samples: int = PLOT_SAMPLES, max_samples: int = PLOT_MAX_SAMPLES) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Samples y = f(x) for plotting with one compiled, vectorized function.
+
+    The expression is parsed with the calculator namespace and compiled once with lambdify.
+    Starting from a uniform grid, intervals where the curve moves by more than a small
+    fraction of its visible range are split (up to PLOT_REFINE_PASSES times, max_samples
+    points in total). Jumps that refinement cannot resolve (discontinuities, poles) are
+    broken with NaN so the line is not drawn across them.
+
+    Args:
+        expression (str): The expression in `variable`, in calculator syntax.
+        x_min (float): Start of the domain.
+        x_max (float): End of the domain.
+        variable (str, optional): The plotted variable. Defaults to "x".
+        samples (int, optional): Initial number of uniform samples.
+        max_samples (int, optional): Maximum number of samples after refinement.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The x and y samples, NaN where nothing is drawn.
+
+    Raises:
+        ValueError: If the expression cannot be parsed or uses other free symbols.
+    """
+    symbol = sympy.Symbol(variable)
+    parsed_expr = sympy.sympify(parse_calculator_expression(expression))
+    unknown = parsed_expr.free_symbols - {symbol}
+    if unknown:
+        raise ValueError(f"'{expression}' depends on {', '.join(sorted(map(str, unknown)))}, only {variable} can vary")
+    function = lambdify([symbol], parsed_expr, modules="numpy")
+
+    x = np.linspace(x_min, x_max, samples)
+    y = _evaluate_real(function, x)
+    threshold = 0.0
+
+    for _ in range(PLOT_REFINE_PASSES):
+        finite = y[np.isfinite(y)]
+        if len(finite) < 2:
+            break
+        low, high = np.percentile(finite, [2, 98])
+        threshold = 0.01 * ((high - low) or 1.0)
+
+        jumps = np.abs(np.diff(y))
+        # Intervals with a large change, or between a drawn and an undrawn point (domain edges)
+        refine = np.flatnonzero((jumps > threshold) | (np.isfinite(y[:-1]) != np.isfinite(y[1:])))
+        if len(refine) == 0 or len(x) + len(refine) > max_samples:
+            break
+
+        midpoints = (x[refine] + x[refine + 1]) / 2
+        x = np.insert(x, refine + 1, midpoints)
+        y = np.insert(y, refine + 1, _evaluate_real(function, midpoints))
+
+    # Jumps left after refinement are discontinuities: steps (much larger than the neighbouring
+    # changes) and poles with a sign change (across more than the visible range). The line is broken there.
+    jumps = np.abs(np.diff(y))
+    neighbours = np.maximum(np.concatenate(([0], jumps[:-1])), np.concatenate((jumps[1:], [0])))
+    steps = (jumps > 2 * threshold) & (jumps > 20 * np.nan_to_num(neighbours))
+    poles = (jumps > 100 * threshold) & (y[:-1] * y[1:] < 0)
+    breaks = np.flatnonzero(steps | poles)
+    if len(breaks):
+        x = np.insert(x, breaks + 1, (x[breaks] + x[breaks + 1]) / 2)
+        y = np.insert(y, breaks + 1, np.nan)
+
+    return x, y
+
+
+def render_expression_plot(series: list[tuple[str, np.ndarray, np.ndarray]], title: str, x_label: str, y_label: str) -> Figure:
+    """
+    Draws sampled expressions as lines on one set of axes.
+
+    The y axis is limited to the bulk of the values so that poles do not flatten the curves.
+
+    Args:
+        series (list[tuple[str, np.ndarray, np.ndarray]]): (label, x, y) of each curve.
+        title (str): Plot title.
+        x_label (str): X-axis label.
+        y_label (str): Y-axis label.
+
+    Returns:
+        Figure: The matplotlib figure.
+    """
+    figure = Figure(figsize=(10, 6))
+    axes = figure.add_subplot()
+    for label, x, y in series:
+        axes.plot(x, y, label=label, linewidth=1.8)
+
+    # Percentiles weighted by the x spacing: refined points crowd around poles and must not widen the limits
+    values = np.concatenate([y[np.isfinite(y)] for _, _, y in series])
+    weights = np.concatenate([np.gradient(x)[np.isfinite(y)] if len(x) > 1 else np.ones(len(x)) for _, x, y in series])
+    if len(values):
+        order = np.argsort(values)
+        cumulative = np.cumsum(weights[order]) / weights.sum()
+        low, high = np.interp([0.01, 0.99], cumulative, values[order])
+        if values.min() < low - 5 * (high - low) or values.max() > high + 5 * (high - low):
+            margin = 0.1 * ((high - low) or 1.0)
+            axes.set_ylim(low - margin, high + margin)
+
+    axes.axhline(0, color="grey", linewidth=0.8)
+    axes.axvline(0, color="grey", linewidth=0.8)
+    axes.grid(True, alpha=0.4)
+    if len(series) > 1:
+        axes.legend()
+    axes.set_title(title, fontsize=15)
+    axes.set_xlabel(x_label, fontsize=12)
+    axes.set_ylabel(y_label, fontsize=12)
+    figure.tight_layout()
+    return figure
+
+
+def generate_expression_plot(expressions: list[str], x_range: str, title: str, x_label: str, y_label: str, variable: str = "x") -> Figure:
+    """
+    Samples and draws one or more expressions over a domain.
+
+    Args:
+        expressions (list[str]): The expressions in `variable`.
+        x_range (str): The domain, see parse_plot_range.
+        title (str): Plot title.
+        x_label (str): X-axis label.
+        y_label (str): Y-axis label.
+        variable (str, optional): The plotted variable. Defaults to "x".
+
+    Returns:
+        Figure: The matplotlib figure.
+
+    Raises:
+        ValueError: If an expression or the range is invalid, or nothing can be drawn.
+    """
+    if len(expressions) > PLOT_MAX_EXPRESSIONS:
+        raise ValueError(f"{len(expressions)} expressions given, the limit is {PLOT_MAX_EXPRESSIONS}")
+    x_min, x_max = parse_plot_range(x_range)
+    samples_per_expression = max(PLOT_SAMPLES, PLOT_MAX_SAMPLES // max(1, len(expressions)))
+
+    series = []
+    for expression in expressions:
+        x, y = sample_expression(expression, x_min, x_max, variable=variable, max_samples=samples_per_expression)
+        series.append((expression, x, y))
+    if not any(np.isfinite(y).any() for _, _, y in series):
+        raise ValueError("the expressions have no real values on this range")
+
+    return render_expression_plot(series, title, x_label, y_label)
+
+
+def render_data_plot_image(data: str, plot_type: str, title: str, x_label: str, y_label: str,
+                           image_format: str = CHART_IMAGE_FORMAT, size: str = CHART_IMAGE_PRESET) -> bytes:
+    """
+    Renders a data plot to an encoded image (see encode_figure); runs in the plot worker processes.
+
+    Raises:
+        ValueError: If the data cannot be parsed or plotted.
+    """
+    figure = generate_plot(data=data, plot_type=plot_type, title=title, x_label=x_label, y_label=y_label)
+    if figure is None:
+        raise ValueError(f"could not generate a {plot_type} plot from the data")
+    return encode_figure(figure, image_format, size, CHART_IMAGE_MAX_BYTES).data
+
+
+def render_file_plot_image(path: str, columns: list[str] | None, filters: list[str] | None, aggregate: str,
+                           plot_type: str, title: str, x_label: str, y_label: str,
+                           image_format: str = CHART_IMAGE_FORMAT, size: str = CHART_IMAGE_PRESET) -> bytes:
+    """
+    Reads the columns to plot from a table file (see read_table_file) and renders them to an
+    encoded image; runs in the plot worker processes, so the file is read off the event loop.
+
+    Raises:
+        ValueError: If the file cannot be read or plotted.
+    """
+    data = read_table_file(path, columns, filters, aggregate)
+    figure = generate_plot(data=data, plot_type=plot_type, title=title, x_label=x_label, y_label=y_label)
+    if figure is None:
+        raise ValueError(f"could not generate a {plot_type} plot from the file")
+    return encode_figure(figure, image_format, size, CHART_IMAGE_MAX_BYTES).data
+
+
+def render_expression_plot_image(expressions: list[str], x_range: str, title: str, x_label: str, y_label: str,
+                                 image_format: str = CHART_IMAGE_FORMAT, size: str = CHART_IMAGE_PRESET) -> bytes:
+    """
+    Renders an expression plot to an encoded image (see encode_figure); runs in the plot worker processes.
+
+    Raises:
+        ValueError: If an expression or the range is invalid.
+    """
+    figure = generate_expression_plot(expressions, x_range, title, x_label, y_label)
+    return encode_figure(figure, image_format, size, CHART_IMAGE_MAX_BYTES).data
+
+
+def warm_up_renderer():
+    """
+    Renders a small plot so that the first real plot of a worker does not pay for the
+    Agg backend set-up, the font cache and glyph loading.
+    """
+    matplotlib.use("Agg")
+    render_data_plot_image("x,y\n0,0\n1,1", "line", "Warm-up", "x", "y")
+    render_expression_plot_image(["x"], "0:1", "Warm-up", "x", "y")
+
+
+SEABORN_VERSION = importlib.metadata.version("seaborn")  # without importing it
+plot_cache = PlotCache(PLOT_CACHE_DIR, max_bytes=PLOT_CACHE_MAX_MB * 1024 * 1024) if PLOT_CACHE_DIR else None
+
+
+def normalize_plot_data(data: str) -> str:
+    """
+    Normalizes plot data text without parsing it, so that inputs that parse to the same
+    table share a cache entry: line endings, blank lines and surrounding whitespace are
+    ignored, markdown table cells are stripped and the separator line is dropped.
+    """
+    lines = [line.strip() for line in data.strip().splitlines() if line.strip()]
+    if any('|' in line for line in lines):
+        lines = [
+            '|'.join(cell.strip() for cell in line.strip('|').split('|'))
+            for line in lines
+            if not (line.startswith('|') and all(c in '-|: ' for c in line))
+        ]
+    return '\n'.join(lines)
+
+
+def plot_cache_key(**request) -> str:
+    """
+    Cache key of a plot request: the normalized data or expressions, the plot and image
+    options and the style, matplotlib and seaborn versions that render them.
+    """
+    if "data" in request:
+        request["data"] = normalize_plot_data(request["data"])
+    return PlotCache.make_key(
+        PLOT_CACHE_VERSION, sorted(PLOT_STYLE.items()), matplotlib.__version__, SEABORN_VERSION, PLOT_SAMPLES,
+        CHART_IMAGE_MAX_BYTES, sorted(request.items()),
+    )
+
+
+plot_pool = WorkerPool(
+    size=PLOT_WORKERS,
+    job_timeout=PLOT_TIMEOUT,
+    memory_limit_mb=PLOT_MEMORY_LIMIT_MB,
+    max_pending=PLOT_MAX_PENDING,
+    warm_modules=("tools.plotting",),
+    initializer=warm_up_renderer,
+)
+
+
 @tool
-async def plot_tool(data:str, plot_type:str = 'line', title:str = 'Sample Line Plot', x_label:str = 'X Values', y_label:str = 'Y Values'):
+async def plot_tool(data:str = '', plot_type:str = 'line', title:str = 'Sample Line Plot', x_label:str = 'X Values', y_label:str = 'Y Values',
+                    expressions: list[str] | None = None, x_range: str = '-10:10',
+                    file: str = '', columns: list[str] | None = None, filters: list[str] | None = None, aggregate: str = '',
+                    image_format: str = CHART_IMAGE_FORMAT, size: str = CHART_IMAGE_PRESET):
     """
-    Generates and displays a data visualization plot based on the provided data.
+    Generates and displays a data visualization plot based on the provided data or mathematical expressions.
     
     This tool creates various types of plots (line, bar, scatter, histogram) from
     structured data and sends the visualization to the user in the chat interface.
+    To plot functions, pass `expressions` and `x_range` instead of generating data points:
+    the curves are computed by the tool.
     
     Args:
         data (str): Input data in one of these formats:
@@ -135,15 +483,41 @@ async def plot_tool(data:str, plot_type:str = 'line', title:str = 'Sample Line P
                                 Defaults to 'X Values'.
         y_label (str, optional): Label for the Y-axis.
                                 Defaults to 'Y Values'.
+        expressions (list[str], optional): Functions of x to plot, in `calculator_tool` syntax,
+                                           e.g. ["sin(x)", "x**2/10", "tan(x)"]. When given, `data`
+                                           and `plot_type` are ignored.
+        x_range (str, optional): Domain of the expressions as 'start:stop', bounds may be
+                                 expressions, e.g. '-2*pi:2*pi'. Defaults to '-10:10'.
+        file (str, optional): A CSV, TSV, Parquet or Feather file of the Jarvis directory to plot,
+                              e.g. "data/sales.csv", instead of passing its content as `data`.
+                              Only the chart is returned: do not read the file first.
+        columns (list[str], optional): With `file`, the x and y columns, e.g. ["month", "sales"].
+                                       Defaults to the first two columns.
+        filters (list[str], optional): With `file`, conditions the plotted rows must all meet,
+                                       e.g. ["region == north", "sales >= 100", "date < '2024-01-01'"].
+        aggregate (str, optional): With `file`, combines the rows of each x value:
+                                   'sum', 'mean', 'median', 'min', 'max', or 'count' (rows per x,
+                                   then `columns` is only the x column). Defaults to '' (no aggregation).
+        image_format (str, optional): 'auto' (smallest of palette PNG, WebP and, for simple
+                                      charts, SVG), 'png', 'png8', 'webp' or 'svg'.
+                                      Defaults to the CHART_IMAGE_FORMAT setting.
+        size (str, optional): Size preset: 'small', 'medium', 'large' or 'hires'.
+                              Defaults to the CHART_IMAGE_PRESET setting.
                                 
     Returns:
         str: "ok" if the plot was successfully generated and sent,
              "ko" if there was an error in plot generation.
              
     Implementation Details:
+        - Serves repeated requests (same data, options and theme) from the on-disk
+          image cache (plot_cache) without parsing or rendering
         - Uses matplotlib and seaborn for plot generation
-        - Converts various input formats to pandas DataFrame
-        - Generates the plot with specified parameters
+        - Converts various input formats to pandas DataFrame; files are read in the worker,
+          only the selected columns and filtered rows
+        - Generates the plot with specified parameters in a pre-warmed worker process
+          (plot_pool), so rendering never blocks the event loop
+        - Encodes the image compactly within the CHART_IMAGE_MAX_BYTES budget and logs
+          its size in bytes
         - Sends the plot as an image to the chat interface
         
     Example:
@@ -168,37 +542,66 @@ async def plot_tool(data:str, plot_type:str = 'line', title:str = 'Sample Line P
     else:
         data_str = data
 
-    try:
-        plot = generate_plot(
-            data=data_str,
-            plot_type=plot_type,
-            title=title,
-            x_label=x_label,
-            y_label=y_label
-        )
+    if image_format not in IMAGE_FORMATS or size not in IMAGE_PRESETS:
+        logging.error(f"Error in plot_tool: unsupported image format '{image_format}' or size '{size}'")
+        return "ko"
 
-        if plot:
-            # Save plot to a file
-            buf = io.BytesIO()
-            plot.savefig(buf, format='png')
-            buf.seek(0)
-
-            try:
-                # Send plot as an image in Chainlit
-                await cl.Message(
-                    content="Here's your generated plot!",
-                    elements=[cl.Image(name="plot.png", display="inline", content=buf.read())]
-                ).send()
-            except Exception as e:
-                logging.error(f"Error sending plot via Chainlit: {e}")
-                # Continue execution - this allows tests to work without Chainlit context
-
-            # Clean up
-            plt.close()
-            return "ok"
-        else:
+    if file and not expressions:
+        try:
+            path = resolve_workspace_path(file)
+            stat = os.stat(path)
+        except (ValueError, OSError) as e:
+            logging.error(f"Error in plot_tool: cannot plot file '{file}': {e}")
             return "ko"
-    except Exception as e:
+        file_options = dict(columns=list(columns) if columns else None, filters=list(filters) if filters else None, aggregate=aggregate)
+
+    options = dict(title=title, x_label=x_label, y_label=y_label, image_format=image_format, size=size)
+    if expressions:
+        key = plot_cache_key(expressions=list(expressions), x_range=x_range, **options)
+    elif file:
+        # A changed file has another size or modification time, hence another key
+        key = plot_cache_key(file=path, file_version=(stat.st_size, stat.st_mtime_ns), plot_type=plot_type, **file_options, **options)
+    else:
+        key = plot_cache_key(data=data_str, plot_type=plot_type, **options)
+    image = plot_cache.get(key) if plot_cache else None
+    cached = image is not None
+
+    try:
+        if cached:
+            logging.debug(f"plot_tool cache hit - {plot_cache.stats()}")
+        elif expressions:
+            image = await plot_pool.submit(render_expression_plot_image, list(expressions), x_range, **options)
+        elif file:
+            image = await plot_pool.submit(render_file_plot_image, path, plot_type=plot_type, **file_options, **options)
+        else:
+            image = await plot_pool.submit(render_data_plot_image, data_str, plot_type, **options)
+    except JobTimeoutError as e:
+        logging.error(f"Error in plot_tool: rendering took too long and was stopped ({e})")
+        return "ko"
+    except JobMemoryError as e:
+        logging.error(f"Error in plot_tool: rendering used too much memory and was stopped ({e})")
+        return "ko"
+    except PoolBusyError as e:
+        logging.error(f"Error in plot_tool: the plot renderer is busy ({e})")
+        return "ko"
+    except WorkerPoolError as e:
         logging.error(f"Error in plot_tool: {e}")
         return "ko"
 
+    if plot_cache and not cached:
+        plot_cache.put(key, image)
+
+    encoding = sniff_format(image)
+    logging.info(f"plot_tool chart payload: {len(image)} bytes ({encoding}, {size})")
+
+    try:
+        # Send plot as an image in Chainlit
+        await cl.Message(
+            content="Here's your generated plot!",
+            elements=[cl.Image(name=f"plot.{EXTENSIONS[encoding]}", mime=MIME_TYPES[encoding], display="inline", content=image)]
+        ).send()
+    except Exception as e:
+        logging.error(f"Error sending plot via Chainlit: {e}")
+        # Continue execution - this allows tests to work without Chainlit context
+
+    return "ok"
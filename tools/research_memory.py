@@ -0,0 +1,227 @@
+import os
+import logging
+import threading
+from collections import OrderedDict
+
+import chainlit as cl
+from langchain_core.tools import tool
+
+from tools.passage_ranking import bm25_idf, estimate_tokens, get_passage_index, tokenize
+
+
+# Size limits of the research memory (least recently used documents/threads are evicted first)
+RESEARCH_MEMORY_MAX_DOCUMENTS = int(os.getenv('RESEARCH_MEMORY_MAX_DOCUMENTS', 200))  # per thread
+RESEARCH_MEMORY_MAX_CHARS = int(os.getenv('RESEARCH_MEMORY_MAX_CHARS', 5_000_000))  # per thread
+RESEARCH_MEMORY_MAX_THREADS = int(os.getenv('RESEARCH_MEMORY_MAX_THREADS', 100))
+
+DEFAULT_THREAD_ID = "default"
+
+
+class MemoryDocument:
+    def __init__(self, source: str, text: str, title: str = "", kind: str = "page"):
+        self.source = source
+        self.title = title
+        self.kind = kind
+        self.size = len(text)
+        self.index = get_passage_index(text)
+
+
+class ThreadMemory:
+    """
+    Research documents gathered in one conversation thread.
+
+    Every document keeps its own precomputed BM25 passage index; queries are scored
+    across all documents with collection-wide IDF and passage length statistics.
+    """
+
+    def __init__(self, max_documents: int = RESEARCH_MEMORY_MAX_DOCUMENTS, max_chars: int = RESEARCH_MEMORY_MAX_CHARS):
+        self.max_documents = max_documents
+        self.max_chars = max_chars
+        self.documents: OrderedDict[str, MemoryDocument] = OrderedDict()
+        self.total_chars = 0
+
+    def add(self, document: MemoryDocument):
+        previous = self.documents.get(document.source)
+        if previous is not None and previous.kind == "page" and document.kind != "page":
+            # A search snippet of an already fetched page: keep the full text
+            self.documents.move_to_end(document.source)
+            return
+        if previous is not None:
+            del self.documents[document.source]
+            self.total_chars -= previous.size
+
+        self.documents[document.source] = document
+        self.total_chars += document.size
+
+        while len(self.documents) > 1 and (len(self.documents) > self.max_documents or self.total_chars > self.max_chars):
+            _, evicted = self.documents.popitem(last=False)
+            self.total_chars -= evicted.size
+
+    def search(self, query: str, top_k: int, token_budget: int) -> list[tuple[float, MemoryDocument, str]]:
+        documents = list(self.documents.values())
+        passage_count = sum(len(document.index.passages) for document in documents)
+        if passage_count == 0:
+            return []
+
+        average_length = sum(sum(document.index.lengths) for document in documents) / passage_count
+        idf = {}
+        for term in set(tokenize(query)):
+            frequency = sum(len(document.index.postings[term]) for document in documents if term in document.index.postings)
+            if frequency:
+                idf[term] = bm25_idf(passage_count, frequency)
+
+        candidates = []
+        for document in documents:
+            for passage_id, score in document.index.score(query, idf=idf, average_length=average_length).items():
+                candidates.append((score, document, document.index.passages[passage_id]))
+        candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+
+        results = []
+        used_tokens = 0
+        for score, document, passage in candidates:
+            if len(results) >= top_k:
+                break
+            cost = estimate_tokens(passage)
+            if used_tokens + cost > token_budget:
+                continue
+            results.append((score, document, passage))
+            used_tokens += cost
+
+        # Touch the documents that answered so they are evicted last.
+        for _, document, _ in results:
+            if document.source in self.documents:
+                self.documents.move_to_end(document.source)
+
+        return results
+
+
+class ResearchMemory:
+    """
+    Per-thread store of the pages, search snippets and answers gathered by the research tools.
+    """
+
+    def __init__(self, max_threads: int = RESEARCH_MEMORY_MAX_THREADS):
+        self.max_threads = max_threads
+        self.threads: OrderedDict[str, ThreadMemory] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _get_thread(self, thread_id: str) -> ThreadMemory:
+        thread_memory = self.threads.get(thread_id)
+        if thread_memory is None:
+            thread_memory = ThreadMemory()
+            self.threads[thread_id] = thread_memory
+            while len(self.threads) > self.max_threads:
+                self.threads.popitem(last=False)
+        else:
+            self.threads.move_to_end(thread_id)
+        return thread_memory
+
+    def add(self, thread_id: str, source: str, text: str, title: str = "", kind: str = "page"):
+        if not text or not text.strip():
+            return
+        # Indexing happens outside the lock, only the insertion is serialized.
+        document = MemoryDocument(source=source, text=text, title=title, kind=kind)
+        with self.lock:
+            self._get_thread(thread_id).add(document)
+
+    def search(self, thread_id: str, query: str, top_k: int = 5, token_budget: int = 2000) -> list[tuple[float, MemoryDocument, str]]:
+        with self.lock:
+            thread_memory = self.threads.get(thread_id)
+            if thread_memory is None:
+                return []
+            self.threads.move_to_end(thread_id)
+            return thread_memory.search(query, top_k=top_k, token_budget=token_budget)
+
+    def clear(self, thread_id: str):
+        with self.lock:
+            self.threads.pop(thread_id, None)
+
+
+research_memory = ResearchMemory()
+
+
+def get_current_thread_id() -> str:
+    """
+    Returns the Chainlit thread id of the running conversation.
+
+    Falls back to DEFAULT_THREAD_ID outside of a Chainlit context (tests, scripts).
+    """
+    try:
+        return cl.context.session.thread_id or DEFAULT_THREAD_ID
+    except Exception:
+        return DEFAULT_THREAD_ID
+
+
+def remember(source: str, text: str, title: str = "", kind: str = "page"):
+    """
+    Stores a research result in the memory of the current thread.
+
+    Ingestion must never break the calling tool, so errors are only logged.
+
+    Args:
+        source (str): Unique source identifier, usually the URL.
+        text (str): The text to index.
+        title (str, optional): Human readable title of the source.
+        kind (str, optional): 'page', 'search' or 'answer'.
+    """
+    try:
+        research_memory.add(get_current_thread_id(), source=source, text=text, title=title, kind=kind)
+    except Exception as e:
+        logging.error(f"Error storing research result from {source}: {e}")
+
+
+def remember_search_results(results: dict):
+    """
+    Stores the organic results, answer box and knowledge graph of a Serper search response.
+
+    Args:
+        results (dict): The raw response returned by GoogleSerperAPIWrapper.aresults.
+    """
+    if not isinstance(results, dict):
+        return
+
+    for result in results.get("organic", []):
+        link = result.get("link")
+        snippet = result.get("snippet")
+        if link and snippet:
+            remember(link, f"{result.get('title', '')}\n{snippet}", title=result.get("title", ""), kind="search")
+
+    answer_box = results.get("answerBox") or {}
+    answer = answer_box.get("answer") or answer_box.get("snippet")
+    if answer:
+        remember(answer_box.get("link") or f"answerBox:{answer_box.get('title', '')}", answer, title=answer_box.get("title", ""), kind="search")
+
+    knowledge_graph = results.get("knowledgeGraph") or {}
+    description = knowledge_graph.get("description")
+    if description:
+        remember(knowledge_graph.get("descriptionLink") or f"knowledgeGraph:{knowledge_graph.get('title', '')}", description,
+                 title=knowledge_graph.get("title", ""), kind="search")
+
+
+@tool
+def research_memory_tool(query: str, max_results: int = 5) -> str:
+    """
+    Searches the pages, search results and research answers already gathered in this conversation.
+
+    Call this FIRST for follow-up questions: everything fetched by `google_search_tool`,
+    `advanced_research_tool`, `webpage_research_tool` and `multi_webpage_research_tool`
+    earlier in the thread is indexed locally and can be answered without going back
+    to the network. Only use the network tools when this returns nothing relevant.
+
+    Args:
+        query (str): The question or keywords to look for.
+        max_results (int, optional): Maximum number of passages to return. Defaults to 5.
+
+    Returns:
+        str: The most relevant stored passages with their source, or a message saying
+             that nothing relevant is stored yet.
+    """
+    results = research_memory.search(get_current_thread_id(), query, top_k=max_results)
+    if not results:
+        return "No stored research matches this query. Use the network research tools instead."
+
+    sections = []
+    for i, (score, document, passage) in enumerate(results, 1):
+        title = f"{document.title} - " if document.title else ""
+        sections.append(f"Result {i} ({document.kind}, score {score:.2f}):\nSource: {title}{document.source}\n{passage}")
+    return "\n\n".join(sections)
@@ -1,8 +1,14 @@
 import os
+import re
+import time
+import asyncio
+import codecs
 import logging
+from typing import Awaitable, Callable, Optional
 
+import chardet
 import requests
-from chainlit import make_async, Video
+from chainlit import Step, Video
 from duckduckgo_search import DDGS
 from google.genai import types
 from langchain_core.tools import tool, Tool
@@ -10,9 +16,44 @@ from langchain_community.utilities import GoogleSerperAPIWrapper
 from pydantic import SecretStr
 from bs4 import BeautifulSoup
 
+from tools.passage_ranking import rank_passages
+from tools.perplexity_client import PerplexityClient, CircuitBreaker
+from tools import research_memory  # the module, not the tool: tool discovery would register research_memory_tool twice
+from tools.research_memory import remember, remember_search_results
+
 
 perplexity_ai_key = SecretStr(os.getenv('PERPLEXITY_API_KEY'))
 
+perplexity_client = PerplexityClient(
+    api_key=perplexity_ai_key.get_secret_value(),
+    base_url=os.getenv('PERPLEXITY_API_URL', 'https://api.perplexity.ai'),
+    connect_timeout=float(os.getenv('PERPLEXITY_CONNECT_TIMEOUT', 5)),
+    read_timeout=float(os.getenv('PERPLEXITY_READ_TIMEOUT', 30)),
+    max_retries=int(os.getenv('PERPLEXITY_MAX_RETRIES', 3)),
+    breaker=CircuitBreaker(
+        failure_threshold=int(os.getenv('PERPLEXITY_BREAKER_THRESHOLD', 5)),
+        reset_timeout=float(os.getenv('PERPLEXITY_BREAKER_RESET', 30)),
+    ),
+)
+
+# Streaming limits for fetch_url_content
+FETCH_MAX_BYTES = int(os.getenv('FETCH_MAX_BYTES', 2 * 1024 * 1024))
+FETCH_CHUNK_SIZE = 64 * 1024
+FETCH_TIMEOUT = 10  # connect/read timeout in seconds
+FETCH_TOTAL_TIMEOUT = int(os.getenv('FETCH_TOTAL_TIMEOUT', 30))  # overall download budget in seconds
+TEXT_CONTENT_TYPES = (
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'application/xhtml+xml',
+)
+MULTI_FETCH_MAX_URLS = 10
+MULTI_FETCH_MAX_CONCURRENCY = int(os.getenv('MULTI_FETCH_MAX_CONCURRENCY', 5))
+MULTI_FETCH_MIN_TIMEOUT = 1  # per-URL timeouts asked by the model are clamped to [1, FETCH_TOTAL_TIMEOUT]
+PASSAGE_TOP_K = int(os.getenv('PASSAGE_TOP_K', 8))
+PASSAGE_TOKEN_BUDGET = int(os.getenv('PASSAGE_TOKEN_BUDGET', 2000))
+TRUNCATION_MARKER = "\n\n[Content truncated: {reason}]"
+
 
 @tool
 async def google_search_tool(query: str, max_results: int = 10) -> dict:
@@ -38,6 +79,7 @@ async def google_search_tool(query: str, max_results: int = 10) -> dict:
     google_search = GoogleSerperAPIWrapper()
     google_search.k = max_results
     result = await google_search.aresults(query=query)
+    remember_search_results(result)
 
     return result
 
@@ -194,56 +236,201 @@ async def standard_research_tool(query: str, max_results: int = 10) -> str:
         return f"Search error: {str(e)}"
 
 
-def perplexity_ai(query: str, max_results: int) -> str:
-    headers = {
-        'Content-Type': 'application/json',
-        'Authorization': f'Bearer {perplexity_ai_key.get_secret_value()}'
-    }
-
-    json = {
-        "model": "sonar",
-        "temperature": 0,
-        "messages": [
-            {
-                "role": "system",
-                "content": "Be precise and concise."
-            },
-            {
-                "role": "user",
-                "content": f"Be precise and concise, and provide at minimum {max_results} citations WITH their source url. Here is my query : {query}"
-            }
-        ]
-    }
+async def perplexity_ai(query: str, max_results: int, on_token: Optional[Callable[[str], Awaitable[None]]] = None) -> str:
+    messages = [
+        {
+            "role": "system",
+            "content": "Be precise and concise."
+        },
+        {
+            "role": "user",
+            "content": f"Be precise and concise, and provide at minimum {max_results} citations WITH their source url. Here is my query : {query}"
+        }
+    ]
 
     try:
-        response = requests.post("https://api.perplexity.ai/chat/completions", headers=headers, json=json).json()
-        return response['choices'][-1]['message']['content']
+        return await perplexity_client.chat(messages, model="sonar", temperature=0, on_token=on_token)
     except Exception as e:
         logging.error(f"Error in perplexity_ai: {e}")
         return f"Perplexity AI error: {e}"
 
 
-async_perplexity_ai = make_async(perplexity_ai)
-
-
 @tool
 async def advanced_research_tool(query: str, max_results: int = 10) -> str:
     """
-    Call Perplexity AI to perform detailed research on subjects
+    Call Perplexity AI to perform detailed research on subjects.
+    The answer is streamed into a Chainlit step as it is generated.
     :param query: the query to perform,
     :param max_results: Maximum number of results to return. Defaults to 5.
     :return: the answer from `Perplexity AI`
     """
-    response = await async_perplexity_ai(query=query, max_results=max_results)
+    try:
+        step = Step(name="Perplexity AI", type="llm")
+    except Exception:
+        step = None  # Outside of a Chainlit session there is nowhere to stream to
+
+    if step is None:
+        response = await perplexity_ai(query=query, max_results=max_results)
+    else:
+        async with step:
+            response = await perplexity_ai(query=query, max_results=max_results, on_token=step.stream_token)
+
+    if not response.startswith("Perplexity AI error"):
+        remember(f"perplexity:{query}", response, title=query, kind="answer")
     return response
 
 
-def fetch_url_content(url: str) -> str:
+def _is_text_content_type(content_type: str) -> bool:
+    """
+    Checks whether a Content-Type header describes a textual payload worth parsing.
+
+    Args:
+        content_type (str): The raw Content-Type header value (may include parameters).
+
+    Returns:
+        bool: True for text/* and the common textual application types, or when the
+              server did not send a Content-Type at all (the body is sniffed instead).
+    """
+    mime_type = content_type.split(';', 1)[0].strip().lower()
+    if not mime_type:
+        return True
+    return mime_type.startswith('text/') or mime_type in TEXT_CONTENT_TYPES or mime_type.endswith('+xml')
+
+
+def _detect_encoding(content_type: str, first_chunk: bytes) -> str:
+    """
+    Picks the character encoding used to decode a streamed page.
+
+    The charset declared in the Content-Type header wins, then a <meta charset>
+    declaration found in the first chunk, and finally chardet's guess on that chunk.
+
+    Args:
+        content_type (str): The raw Content-Type header value.
+        first_chunk (bytes): The first bytes received from the server.
+
+    Returns:
+        str: A codec name known to Python, defaulting to 'utf-8'.
+    """
+    candidates = []
+    header_charset = re.search(r'charset=["\']?([\w.:-]+)', content_type, re.IGNORECASE)
+    if header_charset:
+        candidates.append(header_charset.group(1))
+    meta_charset = re.search(rb'<meta[^>]+charset=["\']?([\w.:-]+)', first_chunk[:4096], re.IGNORECASE)
+    if meta_charset:
+        candidates.append(meta_charset.group(1).decode('ascii', errors='ignore'))
+    candidates.append(chardet.detect(first_chunk).get('encoding'))
+
+    for encoding in candidates:
+        if not encoding:
+            continue
+        try:
+            return codecs.lookup(encoding).name
+        except LookupError:
+            continue
+    return 'utf-8'
+
+
+def _read_text_stream(response: requests.Response, max_bytes: int, deadline: float) -> tuple[str, Optional[str]]:
+    """
+    Reads a streamed response body incrementally, decoding it as it arrives.
+
+    Args:
+        response (requests.Response): A response opened with stream=True.
+        max_bytes (int): Maximum number of (decompressed) body bytes to keep.
+        deadline (float): time.monotonic() value after which the download is cut short.
+
+    Returns:
+        tuple[str, Optional[str]]: The decoded text, and why the body was truncated (None if it was not).
+
+    Raises:
+        ValueError: If the body turns out to be binary despite a missing Content-Type.
+    """
+    content_type = response.headers.get('Content-Type', '')
+    decoder = None
+    parts = []
+    received = 0
+    truncation = None
+
+    for chunk in response.iter_content(chunk_size=FETCH_CHUNK_SIZE):
+        if not chunk:
+            continue
+
+        if received + len(chunk) > max_bytes:
+            chunk = chunk[:max_bytes - received]
+            truncation = f"only the first {max_bytes} bytes of this page were downloaded"
+        received += len(chunk)
+
+        if decoder is None:
+            if not content_type and b'\x00' in chunk[:1024]:
+                raise ValueError("binary content detected")
+            decoder = codecs.getincrementaldecoder(_detect_encoding(content_type, chunk))(errors='replace')
+        parts.append(decoder.decode(chunk))
+
+        if truncation:
+            break
+        if time.monotonic() > deadline:
+            truncation = f"the download took too long, only the first {received} bytes of this page were read"
+            break
+
+    if decoder is not None:
+        parts.append(decoder.decode(b'', final=True))
+
+    return ''.join(parts), truncation
+
+
+def fetch_and_remember(url: str, timeout: float = FETCH_TOTAL_TIMEOUT) -> str:
+    """
+    Fetches a page with fetch_url_content and stores it in the research memory of the current thread.
+
+    Args:
+        url (str): The URL to fetch.
+        timeout (float, optional): Download budget in seconds. Defaults to FETCH_TOTAL_TIMEOUT.
+
+    Returns:
+        str: The full extracted text, or an error message (which is not stored).
+    """
+    text = fetch_url_content(url, timeout=timeout)
+    if not text.startswith(("Error fetching URL", "Error processing URL")):
+        # Stored without the truncation marker: the same text is then ranked by focus_page_content,
+        # which reuses the passage index built here (see get_passage_index)
+        remember(url, text.partition(TRUNCATION_MARKER.split("{", 1)[0])[0])
+    return text
+
+
+def focus_page_content(text: str, query: str) -> str:
+    """
+    Keeps only the passages of a fetched page that are relevant to a query.
+
+    Args:
+        text (str): The text returned by fetch_url_content.
+        query (str): The question the page is read for; an empty query keeps the full text.
+
+    Returns:
+        str: The ranked passages (see rank_passages), with the truncation marker preserved.
+    """
+    if not query or not query.strip() or text.startswith(("Error fetching URL", "Error processing URL")):
+        return text
+
+    body, marker, notice = text.partition(TRUNCATION_MARKER.split("{", 1)[0])
+    focused = rank_passages(body, query, top_k=PASSAGE_TOP_K, token_budget=PASSAGE_TOKEN_BUDGET)
+    return focused + marker + notice
+
+
+def fetch_url_content(url: str, max_bytes: int = FETCH_MAX_BYTES, timeout: float = FETCH_TOTAL_TIMEOUT) -> str:
     """
     Fetches the content of a URL and transforms it into a text format suitable for LLMs.
 
+    The page is streamed rather than buffered: non-textual content types are rejected
+    before the body is downloaded, at most `max_bytes` are read (and decoded
+    incrementally), and a truncation marker is appended when the cap or the overall
+    download deadline is hit. Connection and socket reads are also bounded by the
+    deadline, so the download stops by itself (within one chunk read) once it is passed.
+
     Args:
         url (str): The URL to fetch.
+        max_bytes (int, optional): Maximum number of body bytes to download.
+                                   Defaults to FETCH_MAX_BYTES.
+        timeout (float, optional): Overall download budget in seconds. Defaults to FETCH_TOTAL_TIMEOUT.
 
     Returns:
         str: The extracted text content from the URL, or an error message if fetching fails.
@@ -256,11 +443,21 @@ def fetch_url_content(url: str) -> str:
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.36'
     }
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()  # Raise HTTPError for bad responses (4xx or 5xx)
+        deadline = time.monotonic() + timeout
+        socket_timeout = min(FETCH_TIMEOUT, timeout)
+        with requests.get(url, headers=headers, timeout=socket_timeout, stream=True) as response:
+            response.raise_for_status()  # Raise HTTPError for bad responses (4xx or 5xx)
+
+            content_type = response.headers.get('Content-Type', '')
+            if not _is_text_content_type(content_type):
+                return f"Error fetching URL '{url}': unsupported content type '{content_type}', only text pages can be read"
 
-        soup = BeautifulSoup(response.content, 'html.parser')
+            html, truncation = _read_text_stream(response, max_bytes, deadline)
+
+        soup = BeautifulSoup(html, 'html.parser')
         text = soup.get_text(separator='\n', strip=True)
+        if truncation:
+            text += TRUNCATION_MARKER.format(reason=truncation)
         return text
     except requests.exceptions.RequestException as e:
         return f"Error fetching URL '{url}': {str(e)}"
@@ -269,24 +466,88 @@ def fetch_url_content(url: str) -> str:
 
 
 @tool
-def webpage_research_tool(url: str) -> str:
+def webpage_research_tool(url: str, query: str = "") -> str:
     """
     Fetches the raw text content of a specific webpage URL.
 
+    When a query is given, long pages are reduced to the passages most relevant to it
+    (BM25 ranking within a token budget) instead of being returned wholesale.
+
     Args:
         url: The URL of the webpage to fetch.
+        query: Optional question the page is read for. Leave empty to get the full text.
+
+    Returns:
+        The text content of the webpage (or its most relevant passages) or an error message.
+    """
+    return focus_page_content(fetch_and_remember(url), query)
+
+
+@tool
+async def multi_webpage_research_tool(urls: list[str], query: str = "", timeout: int = 20) -> str:
+    """
+    Fetches the raw text content of several webpage URLs in a single call.
+
+    Use this instead of calling `webpage_research_tool` repeatedly, e.g. to read the
+    top results of a search at once. Pages are downloaded concurrently (bounded
+    parallelism), each with its own download deadline, and a failing URL does not
+    prevent the others from being returned.
+
+    Args:
+        urls (list[str]): The URLs of the webpages to fetch (at most 10, duplicates are ignored).
+        query (str, optional): Question the pages are read for. When given, each page is reduced
+                               to its most relevant passages. Defaults to "" (full text).
+        timeout (int, optional): Maximum number of seconds allowed per URL, between 1 and
+                                 FETCH_TOTAL_TIMEOUT (30 by default). Defaults to 20.
 
     Returns:
-        The text content of the webpage or an error message.
+        str: One section per URL, in completion order, each starting with a
+             "=== <url> ===" header followed by the page text or an error message.
+
+    Example:
+        result = await multi_webpage_research_tool.ainvoke({
+            "urls": ["https://example.com/a", "https://example.com/b"]
+        })
     """
-    return fetch_url_content(url)
+    unique_urls = list(dict.fromkeys(url.strip() for url in urls if url and url.strip()))
+    if not unique_urls:
+        return "Error: no URL provided."
+
+    try:
+        timeout = min(max(float(timeout), MULTI_FETCH_MIN_TIMEOUT), FETCH_TOTAL_TIMEOUT)
+    except (TypeError, ValueError):
+        timeout = FETCH_TOTAL_TIMEOUT
+    skipped = unique_urls[MULTI_FETCH_MAX_URLS:]
+    unique_urls = unique_urls[:MULTI_FETCH_MAX_URLS]
+    semaphore = asyncio.Semaphore(MULTI_FETCH_MAX_CONCURRENCY)
+
+    async def fetch(url: str) -> tuple[str, str]:
+        async with semaphore:
+            try:
+                # The worker stops at its own deadline: waiting for it keeps the slot until the download is over
+                content = await asyncio.to_thread(fetch_and_remember, url, timeout)
+                return url, focus_page_content(content, query)
+            except Exception as e:
+                logging.error(f"Error in multi_webpage_research_tool for {url}: {e}")
+                return url, f"Error processing URL '{url}': {str(e)}"
+
+    sections = []
+    for completed in asyncio.as_completed([fetch(url) for url in unique_urls]):
+        url, content = await completed
+        sections.append(f"=== {url} ===\n{content}")
+
+    if skipped:
+        sections.append(f"Skipped {len(skipped)} URL(s) over the limit of {MULTI_FETCH_MAX_URLS}: {', '.join(skipped)}")
+
+    return "\n\n".join(sections)
 
 
 def get_research_tools() -> list:
     """
     Returns a list of available research tool functions.
 
-    Includes advanced research, Google search, image search, and a tool to fetch webpage content.
+    Includes advanced research, Google search, image search, tools to fetch webpage content,
+    and the per-thread research memory.
     Note: standard_research_tool is temporarily disabled due to DuckDuckGo rate limiting issues.
     """
     tools = [
@@ -294,6 +555,8 @@ def get_research_tools() -> list:
         advanced_research_tool,
         google_search_tool,
         images_search_tool,
-        webpage_research_tool
+        webpage_research_tool,
+        multi_webpage_research_tool,
+        research_memory.research_memory_tool
     ]
     return tools
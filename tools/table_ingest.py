@@ -0,0 +1,388 @@
+import io
+import os
+import re
+import logging
+import operator
+import warnings
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+try:
+    # Multithreaded CSV parser and string kernels in C (in requirements.txt, the pandas parser is used without it)
+    import pyarrow
+    import pyarrow.csv
+    import pyarrow.compute
+    import pyarrow.dataset
+except ImportError:
+    pyarrow = None
+
+
+SAMPLE_SIZE = 200  # values checked before a whole column is converted
+
+# Timestamp formats the pyarrow reader parses while reading. Only unambiguous ones: pyarrow tries
+# them value by value, so day/month and month/day dates would be mixed in a column. Those are
+# left as text and converted by _convert_dates with a single format per column
+TIMESTAMP_FORMATS = ("%Y-%m-%d %H:%M", "%Y/%m/%d")
+
+
+# Header separator row of markdown tables, e.g. |---|:---:|
+_MARKDOWN_SEPARATOR_CELL = r"\s*:?-+:?\s*"
+
+# Formatted numbers: optional sign and currency, thousands separators, decimals, percent sign
+_FORMATTED_NUMBER = r"[-+]?[$€£]?(?:\d{1,3}(?:,\d{3})+|\d*)(?:\.\d+)?(?:[eE][-+]?\d+)?%?"
+_NUMBER_DECORATIONS = r"[,$€£%]"
+_FORMATTED_NUMBER_PATTERN = re.compile(_FORMATTED_NUMBER)
+_NUMBER_DECORATIONS_TABLE = str.maketrans("", "", ",$€£%")
+
+
+def is_markdown_table(text: str) -> bool:
+    """Whether the text is a markdown table rather than CSV: its first line has cell separators."""
+    return '|' in text.lstrip().split('\n', 1)[0]
+
+
+def _read_delimited(text: str, separator: str) -> pd.DataFrame:
+    if pyarrow is not None:
+        try:
+            table = pyarrow.csv.read_csv(
+                io.BytesIO(text.encode("utf-8")),
+                parse_options=pyarrow.csv.ParseOptions(delimiter=separator),
+                convert_options=pyarrow.csv.ConvertOptions(timestamp_parsers=[pyarrow.csv.ISO8601, *TIMESTAMP_FORMATS]),
+            )
+            # Text columns stay in Arrow memory, so that infer_column_types runs C string kernels on them
+            return table.to_pandas(types_mapper={pyarrow.string(): pd.StringDtype("pyarrow")}.get)
+        except (pyarrow.ArrowException, ValueError) as e:
+            # e.g. rows with a different number of cells: the pandas parser is more lenient
+            logging.debug(f"pyarrow could not parse the table, using the pandas parser: {e}")
+    with warnings.catch_warnings():
+        # Columns typed differently in two chunks of the file are left as objects, infer_column_types
+        # converts them (low_memory=False would avoid that at the cost of a much slower parse)
+        warnings.simplefilter("ignore", pd.errors.DtypeWarning)
+        return pd.read_csv(io.StringIO(text), sep=separator, skipinitialspace=True)
+
+
+def _read_markdown(text: str) -> pd.DataFrame:
+    # The table is read as '|'-delimited text in one pass: the outer pipes give empty first and
+    # last columns, the separator row is the first data row, cells keep their padding
+    data = _read_delimited(text, "|")
+    names = [str(name).strip() for name in data.columns]
+    keep = [i for i, name in enumerate(names)
+            if not ((i == 0 or i == len(names) - 1) and (name == "" or name.startswith("Unnamed:")) and data.iloc[:, i].isna().all())]
+    data = data.iloc[:, keep]
+    data.columns = [names[i] for i in keep]
+
+    if len(data) and all(isinstance(value, str) for value in data.iloc[0]) and \
+            data.iloc[0].astype(str).str.fullmatch(_MARKDOWN_SEPARATOR_CELL).all():
+        data = data.iloc[1:].reset_index(drop=True)
+    return data
+
+
+def _strip(column: pd.Series) -> pd.Series:
+    # Stripping costs a pass over the column: skip it when the sampled values have no padding
+    sample = column.iloc[:SAMPLE_SIZE].dropna().astype(str)
+    if (sample == sample.str.strip()).all() and not isinstance(column.dtype, pd.StringDtype):
+        return column
+    return column.str.strip()
+
+
+def _sample(column: pd.Series) -> pd.Series:
+    values = column.iloc[:SAMPLE_SIZE].dropna().astype(str).str.strip()
+    return values[values != ""]
+
+
+def _convert_formatted_numbers(column: pd.Series) -> pd.Series | None:
+    # A sample rules out most text columns before the whole column is scanned
+    sample = _sample(column)
+    if sample.empty or not sample.str.fullmatch(_FORMATTED_NUMBER).all() or not sample.str.contains(r"\d").all():
+        return None
+
+    if isinstance(column.dtype, pd.StringDtype) and column.dtype.storage == "pyarrow":
+        # Arrow string kernels, then an Arrow cast: empty cells become nulls
+        text = column.str.strip()
+        if not text.str.fullmatch(_FORMATTED_NUMBER, na=True).all():
+            return None
+        digits = pyarrow.array(text.str.replace(_NUMBER_DECORATIONS, "", regex=True).replace("", None), type=pyarrow.string())
+        # Integers when every value is one, as pd.to_numeric does below (nulls make both float)
+        values = None
+        if not sample.str.contains(r"[.eE]").any():
+            try:
+                values = pyarrow.compute.cast(digits, pyarrow.int64())
+            except pyarrow.ArrowInvalid:
+                pass
+        if values is None:
+            values = pyarrow.compute.cast(digits, pyarrow.float64())
+        return pd.Series(values.to_numpy(zero_copy_only=False), index=column.index)
+
+    # Python strings: one loop that validates and cleans, instead of a pandas pass per step
+    match = _FORMATTED_NUMBER_PATTERN.fullmatch
+    digits = []
+    for value in column.to_numpy():
+        if not isinstance(value, str):
+            # Missing, or a number the parser already converted in another chunk of the file
+            digits.append(None if pd.isna(value) else str(value))
+            continue
+        value = value.strip()
+        if not match(value):
+            return None
+        digits.append(value.translate(_NUMBER_DECORATIONS_TABLE) or None)
+    return pd.to_numeric(pd.Series(digits, index=column.index, dtype=object), errors="coerce")
+
+
+def _convert_dates(column: pd.Series) -> pd.Series | None:
+    # Dates contain a digit and a separator; this skips names such as 'Jan' that pandas would guess a year for
+    sample = _sample(column)
+    if sample.empty or not sample.str.contains(r"\d").all() or not sample.str.contains(r"[-/:. ]").all():
+        return None
+    # One format for the whole column, guessed from its first value (month first when ambiguous,
+    # as pandas does): a column mixing day/month and month/day dates stays text
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")  # dayfirst warnings for day/month dates
+        date_format = guess_datetime_format(sample.iloc[0])
+    if date_format is None:
+        return None
+    dates = pd.to_datetime(column, format=date_format, errors="coerce")
+    if dates[column.notna()].isna().any():
+        return None
+    return dates
+
+
+def infer_column_types(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converts the text columns left by the CSV parser that hold formatted numbers or dates.
+
+    Numbers may have thousands separators ('1,234.5'), a currency sign ('$12') or a percent
+    sign ('12.5%', kept as 12.5). Dates use any format pandas infers from the first value.
+    A column is converted only when every non-empty value matches, otherwise it stays text.
+    Each column is converted with vectorized string operations, once. Dates are given
+    nanosecond precision, so the pyarrow and pandas parsers give the same column types.
+
+    Args:
+        data (pd.DataFrame): The parsed table.
+
+    Returns:
+        pd.DataFrame: The same table with converted columns.
+    """
+    for name in data.columns:
+        column = data[name]
+        if pd.api.types.is_datetime64_any_dtype(column.dtype):
+            data[name] = column.dt.as_unit("ns")  # pyarrow reads timestamps in seconds
+            continue
+        if column.dtype != object and not isinstance(column.dtype, pd.StringDtype):
+            continue
+        converted = _convert_formatted_numbers(column)
+        if converted is None:
+            converted = _convert_dates(_strip(column))
+        if converted is not None:
+            data[name] = converted
+        elif isinstance(column.dtype, pd.StringDtype):
+            # Text columns are handed to the plotting libraries as plain Python strings
+            data[name] = _strip(column).astype(object).where(column.notna(), np.nan)
+        else:
+            data[name] = _strip(column)
+    return data
+
+
+def read_table(text: str) -> pd.DataFrame:
+    """
+    Parses a markdown table or CSV text into a DataFrame with typed columns.
+
+    Markdown tables are read as '|'-delimited text, so both formats go through the same
+    single-pass parser: pyarrow's multithreaded CSV reader when pyarrow is installed, the
+    pandas C parser otherwise. Column types are inferred once by the parser,
+    then formatted numbers and dates are converted (see infer_column_types).
+
+    Args:
+        text (str): A markdown table or CSV with a header row.
+
+    Returns:
+        pd.DataFrame: The table.
+
+    Raises:
+        ValueError: If the text has no data rows.
+    """
+    text = text.strip()
+    data = _read_markdown(text) if is_markdown_table(text) else _read_delimited(text, ",")
+
+    if data.empty:
+        raise ValueError("Not enough data rows in the table")
+    data.columns = [str(name).strip() for name in data.columns]
+    return infer_column_types(data)
+
+
+# Table files plot_tool can read from the workspace, by extension
+TABLE_FILE_FORMATS = {".csv": "csv", ".txt": "csv", ".tsv": "tsv", ".parquet": "parquet", ".feather": "feather", ".arrow": "feather"}
+CHUNK_ROWS = 100_000  # rows per chunk when pyarrow is not installed
+AGGREGATIONS = ("sum", "mean", "median", "min", "max", "count")
+
+_FILTER_PATTERN = re.compile(r"^\s*(.+?)\s*(==|!=|>=|<=|=|>|<)\s*(.+?)\s*$")
+_FILTER_OPERATORS = {
+    "==": operator.eq, "=": operator.eq, "!=": operator.ne,
+    ">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le,
+}
+
+
+def parse_filter(condition: str) -> tuple[str, str, object]:
+    """
+    Parses a row filter such as "region == north", "sales >= 1000" or "date < '2024-01-01'".
+
+    Returns:
+        tuple[str, str, object]: The column, the operator and the value (a number when it reads as one).
+
+    Raises:
+        ValueError: If the condition is not 'column operator value'.
+    """
+    match = _FILTER_PATTERN.match(condition)
+    if not match:
+        raise ValueError(f"invalid filter '{condition}', expected 'column operator value', e.g. 'sales > 100'")
+    column, op, value = match.groups()
+    column, value = column.strip("'\"`"), value.strip()
+    if len(value) > 1 and value[0] == value[-1] and value[0] in "'\"":
+        return column, op, value[1:-1]
+    for number in (int, float):
+        try:
+            return column, op, number(value)
+        except ValueError:
+            pass
+    return column, op, value
+
+
+def _arrow_file_format(file_format: str):
+    if file_format in ("csv", "tsv"):
+        return pyarrow.dataset.CsvFileFormat(
+            parse_options=pyarrow.csv.ParseOptions(delimiter="\t" if file_format == "tsv" else ","),
+            convert_options=pyarrow.csv.ConvertOptions(timestamp_parsers=[pyarrow.csv.ISO8601, *TIMESTAMP_FORMATS]),
+        )
+    return file_format
+
+
+def _arrow_literal(arrow_type, value):
+    # Filter values are compared in the type of their column: dates written as text
+    if isinstance(value, str) and (pyarrow.types.is_timestamp(arrow_type) or pyarrow.types.is_date(arrow_type)):
+        return pyarrow.scalar(pd.Timestamp(value).to_datetime64()).cast(arrow_type)
+    return value
+
+
+def _pushed_down(op: str, value, text_column: bool) -> bool:
+    # Text columns may hold formatted numbers or dates ("1,200", "20%", "03/01/2024") that only
+    # infer_column_types converts: comparing their raw text would keep the wrong rows, so only
+    # exact text matches are applied while reading, the other filters once the types are known
+    return not text_column or (isinstance(value, str) and op in ("==", "=", "!="))
+
+
+def _filter_frame(data: pd.DataFrame, filters: list[tuple]) -> pd.DataFrame:
+    for column, op, value in filters:
+        dtype = data[column].dtype
+        if isinstance(value, str) and pd.api.types.is_datetime64_any_dtype(dtype):
+            value = pd.Timestamp(value)
+        elif not isinstance(value, str) and not pd.api.types.is_numeric_dtype(dtype):
+            raise ValueError(f"could not apply the filters: column '{column}' holds text, not numbers to compare with {value}")
+        try:
+            data = data[_FILTER_OPERATORS[op](data[column], value)]
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"could not apply the filters: {e}") from e
+    return data
+
+
+def _read_file_arrow(path: str, file_format: str, columns: list[str] | None,
+                     filters: list[tuple]) -> tuple[pd.DataFrame, list[tuple]]:
+    # Only the needed columns are decoded, and the filters are applied while scanning; Parquet
+    # files skip row groups the filters exclude, Feather files are memory-mapped
+    dataset = pyarrow.dataset.dataset(path, format=_arrow_file_format(file_format))
+    columns = _select_columns(columns, dataset.schema.names, filters)
+    expression = None
+    deferred = []
+    for column, op, value in filters:
+        arrow_type = dataset.schema.field(column).type
+        if not _pushed_down(op, value, pyarrow.types.is_string(arrow_type) or pyarrow.types.is_large_string(arrow_type)):
+            deferred.append((column, op, value))
+            continue
+        condition = _FILTER_OPERATORS[op](pyarrow.dataset.field(column), _arrow_literal(arrow_type, value))
+        expression = condition if expression is None else expression & condition
+    try:
+        table = dataset.to_table(columns=columns, filter=expression)
+    except (pyarrow.ArrowException, TypeError, ValueError) as e:
+        raise ValueError(f"could not apply the filters: {e}") from e
+    return table.to_pandas(types_mapper={pyarrow.string(): pd.StringDtype("pyarrow")}.get), deferred
+
+
+def _read_file_pandas(path: str, file_format: str, columns: list[str] | None,
+                      filters: list[tuple]) -> tuple[pd.DataFrame, list[tuple]]:
+    if file_format not in ("csv", "tsv"):
+        raise ValueError(f"reading {file_format} files requires pyarrow")
+    separator = "\t" if file_format == "tsv" else ","
+    names = list(pd.read_csv(path, sep=separator, nrows=0).columns)
+    columns = _select_columns(columns, names, filters)
+    # Chunks of the needed columns, filtered as they are read: the file is never in memory at once.
+    # A filter on a column left as text in any chunk is applied after type inference instead
+    chunks = []
+    deferred = set()
+    for chunk in pd.read_csv(path, sep=separator, usecols=columns, chunksize=CHUNK_ROWS, skipinitialspace=True):
+        for condition in filters:
+            column, op, value = condition
+            if not _pushed_down(op, value, chunk[column].dtype == object):
+                deferred.add(condition)
+        chunks.append(_filter_frame(chunk, [condition for condition in filters if condition not in deferred])[columns])
+    return pd.concat(chunks, ignore_index=True), [condition for condition in filters if condition in deferred]
+
+
+def _select_columns(columns: list[str] | None, names: list[str], filters: list[tuple]) -> list[str]:
+    selected = list(columns) if columns else names[:2]
+    missing = [name for name in selected + [column for column, _, _ in filters] if name not in names]
+    if missing:
+        raise ValueError(f"unknown column(s) {', '.join(missing)}; the file has {', '.join(map(str, names))}")
+    return list(dict.fromkeys(selected + [column for column, _, _ in filters]))
+
+
+def read_table_file(path: str, columns: list[str] | None = None, filters: list[str] | None = None,
+                    aggregate: str = "") -> pd.DataFrame:
+    """
+    Reads the columns to plot from a CSV, TSV, Parquet or Feather file.
+
+    Only the selected columns are read, rows are filtered while the file is scanned
+    (pyarrow datasets when pyarrow is installed, chunks of CHUNK_ROWS rows with pandas
+    otherwise), then column types are inferred as in read_table and rows may be
+    aggregated per x value. Comparisons on text columns, which may turn out to hold
+    formatted numbers or dates, wait for the type inference.
+
+    Args:
+        path (str): Path of the file, already checked by the caller.
+        columns (list[str], optional): The x and y columns. Defaults to the first two columns.
+        filters (list[str], optional): Row conditions, all of which must hold (see parse_filter).
+        aggregate (str, optional): One of AGGREGATIONS to reduce the rows sharing an x value,
+                                   or "" to keep every row. With "count", no y column is needed.
+
+    Returns:
+        pd.DataFrame: The x and y columns.
+
+    Raises:
+        ValueError: If the file type, a column, a filter or the aggregation is invalid, or no row is left.
+    """
+    file_format = TABLE_FILE_FORMATS.get(os.path.splitext(path)[1].lower())
+    if file_format is None:
+        raise ValueError(f"unsupported file type, expected one of {', '.join(TABLE_FILE_FORMATS)}")
+    if aggregate and aggregate not in AGGREGATIONS:
+        raise ValueError(f"unknown aggregation '{aggregate}', expected one of {', '.join(AGGREGATIONS)}")
+    conditions = [parse_filter(condition) for condition in filters or []]
+
+    if pyarrow is not None:
+        data, deferred = _read_file_arrow(path, file_format, columns, conditions)
+    else:
+        data, deferred = _read_file_pandas(path, file_format, columns, conditions)
+    data.columns = [str(name) for name in data.columns]
+    plotted = list(columns) if columns else list(data.columns[:2])
+    if len(plotted) != (1 if aggregate == "count" else 2):
+        raise ValueError("expected an x and a y column, or only an x column to count rows")
+    filtered = [column for column, _, _ in deferred]
+    data = infer_column_types(data[list(dict.fromkeys(plotted + filtered))].copy())
+    data = _filter_frame(data, deferred)[plotted]
+    if data.empty:
+        raise ValueError("no rows left after filtering")
+
+    if aggregate == "count":
+        x = data.columns[0]
+        return data.groupby(x, sort=True).size().reset_index(name="count")
+    if aggregate:
+        x, y = data.columns[0], data.columns[1]
+        return data.groupby(x, sort=True, as_index=False)[y].agg(aggregate)
+    return data
@@ -0,0 +1,366 @@
+import time
+import queue
+import atexit
+import signal
+import asyncio
+import logging
+import importlib
+import threading
+import traceback
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+try:
+    import resource  # POSIX only, resource limits are skipped elsewhere
+except ImportError:
+    resource = None
+
+
+POLL_INTERVAL = 0.05  # seconds between checks for cancellation while a job runs
+
+
+class WorkerPoolError(Exception):
+    """Base class of the errors raised by WorkerPool when a job could not complete."""
+
+
+class JobTimeoutError(WorkerPoolError):
+    """The job exceeded its wall-clock or CPU time limit."""
+
+
+class JobMemoryError(WorkerPoolError):
+    """The job exceeded the worker memory limit."""
+
+
+class JobCancelledError(WorkerPoolError):
+    """The job was cancelled before it completed."""
+
+
+class PoolBusyError(WorkerPoolError):
+    """Too many jobs are already waiting for a worker."""
+
+
+class WorkerCrashedError(WorkerPoolError):
+    """The worker process died while running the job."""
+
+
+class _CpuTimeExceeded(BaseException):
+    # BaseException so that broad `except Exception` blocks in job code cannot swallow it
+    pass
+
+
+def _on_cpu_limit(signum, frame):
+    raise _CpuTimeExceeded()
+
+
+def _set_cpu_limit(seconds: Optional[float]):
+    """Allows the calling process `seconds` more CPU time before SIGXCPU is delivered."""
+    if resource is None or not seconds:
+        return
+    used = time.process_time()
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = int(used + seconds) + 1
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _clear_cpu_limit():
+    if resource is None:
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    resource.setrlimit(resource.RLIMIT_CPU, (hard, hard))
+
+
+def _worker_main(connection, warm_modules: tuple[str, ...], cpu_limit: Optional[float], memory_limit_mb: Optional[int],
+                 initializer: Optional[Callable] = None):
+    """
+    Entry point of a worker process: applies the resource limits, imports the warm
+    modules, calls the initializer, then runs jobs received on `connection` until it is closed.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C is handled by the parent
+
+    if resource is not None:
+        if memory_limit_mb:
+            limit = memory_limit_mb * 1024 * 1024
+            try:
+                resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+            except (ValueError, OSError) as e:
+                logging.warning(f"Worker could not set its memory limit: {e}")
+        if cpu_limit and hasattr(signal, "SIGXCPU"):
+            signal.signal(signal.SIGXCPU, _on_cpu_limit)
+
+    for module_name in warm_modules:
+        importlib.import_module(module_name)
+    if initializer is not None:
+        try:
+            initializer()
+        except Exception as e:
+            logging.warning(f"Worker initializer failed: {type(e).__name__}: {e}")
+
+    while True:
+        try:
+            job = connection.recv()
+        except (EOFError, OSError):
+            break
+        if job is None:
+            break
+
+        function, args, kwargs = job
+        try:
+            _set_cpu_limit(cpu_limit)
+            result = function(*args, **kwargs)
+            reply = ("ok", result)
+        except _CpuTimeExceeded:
+            reply = ("cpu_limit", f"CPU time limit of {cpu_limit}s exceeded")
+        except MemoryError:
+            reply = ("memory", "memory limit exceeded")
+        except Exception as e:
+            reply = ("error", f"{type(e).__name__}: {e}", traceback.format_exc())
+        finally:
+            _clear_cpu_limit()
+
+        try:
+            connection.send(reply)
+        except Exception as e:
+            # e.g. an unpicklable result
+            connection.send(("error", f"Could not return the job result - {type(e).__name__}: {e}", ""))
+
+        if reply[0] == "memory":
+            # The heap may be fragmented or partly corrupted, let the parent start a fresh worker
+            break
+
+
+class _Worker:
+    def __init__(self, context, warm_modules, cpu_limit, memory_limit_mb, initializer=None):
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_connection, warm_modules, cpu_limit, memory_limit_mb, initializer),
+            daemon=True,
+        )
+        self.process.start()
+        child_connection.close()
+        self.jobs = 0
+
+    def kill(self):
+        try:
+            self.connection.close()
+        except OSError:
+            pass
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=5)
+
+    def stop(self):
+        try:
+            self.connection.send(None)
+        except (OSError, BrokenPipeError):
+            pass
+        self.process.join(timeout=1)
+        self.kill()
+
+
+class WorkerPool:
+    """
+    Pool of pre-warmed worker processes running CPU-bound jobs with hard limits.
+
+    Every job runs in a separate process so that it cannot block the event loop and can
+    always be stopped: a job exceeding its wall-clock timeout, or cancelled by its caller,
+    has its worker killed and replaced. On POSIX systems each job also gets a CPU time
+    limit (RLIMIT_CPU) and each worker an address space limit (RLIMIT_AS).
+
+    Workers are started by `start` (at application startup, or else on first use) with
+    `warm_modules` already imported and `initializer` (a picklable function, e.g. to fill
+    caches) already called, and are recycled after `max_jobs_per_worker` jobs to bound
+    memory growth.
+    Jobs must be picklable: module-level functions and plain arguments.
+    """
+
+    def __init__(self, size: int = 2, job_timeout: float = 30.0, cpu_limit: Optional[float] = None,
+                 memory_limit_mb: Optional[int] = None, max_jobs_per_worker: int = 200,
+                 max_pending: int = 32, warm_modules: tuple[str, ...] = (), initializer: Optional[Callable] = None):
+        self.size = max(1, size)
+        self.job_timeout = job_timeout
+        self.cpu_limit = cpu_limit
+        self.memory_limit_mb = memory_limit_mb
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.max_pending = max_pending
+        self.warm_modules = tuple(warm_modules)
+        self.initializer = initializer
+
+        self.context = multiprocessing.get_context("spawn")
+        # Threads waiting on the jobs of `submit`: one per worker, so queued jobs hold no thread
+        self.executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="worker-pool")
+        self.idle: queue.Queue[_Worker] = queue.Queue()
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.started = False
+        self.closed = False
+
+    def _spawn(self) -> _Worker:
+        return _Worker(self.context, self.warm_modules, self.cpu_limit, self.memory_limit_mb, self.initializer)
+
+    def start(self):
+        """Starts the workers (safe to call several times)."""
+        with self.lock:
+            if self.started or self.closed:
+                return
+            for _ in range(self.size):
+                self.idle.put(self._spawn())
+            self.started = True
+            atexit.register(self.shutdown)
+
+    def shutdown(self):
+        """Stops the idle workers; busy ones are killed when their job ends."""
+        with self.lock:
+            self.closed = True
+        self.executor.shutdown(wait=False)
+        while True:
+            try:
+                self.idle.get_nowait().stop()
+            except queue.Empty:
+                break
+
+    def _release(self, worker: _Worker, healthy: bool):
+        if healthy and worker.jobs < self.max_jobs_per_worker and not self.closed:
+            self.idle.put(worker)
+            return
+
+        # Stopping a worker and starting its replacement takes a while: not on the job's thread,
+        # which still has to deliver the result
+        threading.Thread(target=self._replace, args=(worker, healthy), name="worker-pool-replace", daemon=True).start()
+
+    def _replace(self, worker: _Worker, healthy: bool):
+        if healthy:
+            worker.stop()
+        else:
+            worker.kill()
+        if self.closed:
+            return
+
+        replacement = self._spawn()
+        with self.lock:
+            if not self.closed:
+                self.idle.put(replacement)
+                return
+        replacement.stop()  # the pool was shut down while the worker started
+
+    def run(self, function: Callable, *args, timeout: Optional[float] = None,
+            cancel_event: Optional[threading.Event] = None, **kwargs) -> Any:
+        """
+        Runs a job in a worker process and blocks until it completes.
+
+        Args:
+            function (Callable): A picklable (module-level) function.
+            *args: Positional arguments of the function.
+            timeout (float, optional): Wall-clock limit in seconds, including the wait for a
+                                       free worker. Defaults to the pool job_timeout.
+            cancel_event (threading.Event, optional): Set it to abort the job.
+            **kwargs: Keyword arguments of the function.
+
+        Returns:
+            Any: The return value of the function.
+
+        Raises:
+            PoolBusyError: If max_pending jobs are already waiting.
+            JobTimeoutError: If the job exceeded its wall-clock or CPU limit.
+            JobMemoryError: If the job exceeded the memory limit.
+            JobCancelledError: If cancel_event was set.
+            WorkerCrashedError: If the worker died.
+            WorkerPoolError: If the function raised, with the original error message.
+        """
+        timeout = self.job_timeout if timeout is None else timeout
+        self._reserve()
+        return self._run_reserved(function, args, kwargs, timeout, time.monotonic() + timeout, cancel_event)
+
+    def _reserve(self):
+        with self.lock:
+            if self.pending >= self.max_pending:
+                raise PoolBusyError(f"{self.pending} jobs already waiting for a worker")
+            self.pending += 1
+
+    def _unreserve(self):
+        with self.lock:
+            self.pending -= 1
+
+    def _run_reserved(self, function: Callable, args: tuple, kwargs: dict, timeout: float, deadline: float,
+                      cancel_event: Optional[threading.Event]) -> Any:
+        # The pending slot taken by _reserve is given back once a worker is acquired (or not)
+        try:
+            self.start()
+            worker = self._acquire(deadline, cancel_event)
+        finally:
+            self._unreserve()
+
+        healthy = False
+        try:
+            worker.jobs += 1
+            try:
+                worker.connection.send((function, args, kwargs))
+            except (BrokenPipeError, OSError) as e:
+                raise WorkerCrashedError(f"worker exited with code {worker.process.exitcode}") from e
+
+            while not worker.connection.poll(POLL_INTERVAL):
+                if cancel_event is not None and cancel_event.is_set():
+                    raise JobCancelledError("job cancelled")
+                if time.monotonic() > deadline:
+                    raise JobTimeoutError(f"job exceeded the {timeout}s time limit")
+                if not worker.process.is_alive():
+                    raise WorkerCrashedError(f"worker exited with code {worker.process.exitcode}")
+
+            try:
+                reply = worker.connection.recv()
+            except (EOFError, OSError) as e:
+                raise WorkerCrashedError(f"worker exited with code {worker.process.exitcode}") from e
+
+            status = reply[0]
+            healthy = status in ("ok", "error", "cpu_limit")
+            if status == "ok":
+                return reply[1]
+            if status == "cpu_limit":
+                raise JobTimeoutError(reply[1])
+            if status == "memory":
+                raise JobMemoryError(reply[1])
+            logging.debug(f"Worker job failed: {reply[2]}")
+            raise WorkerPoolError(reply[1])
+        finally:
+            self._release(worker, healthy)
+
+    def _acquire(self, deadline: float, cancel_event: Optional[threading.Event]) -> _Worker:
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                raise JobCancelledError("job cancelled")
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise JobTimeoutError("timed out waiting for a free worker")
+            try:
+                return self.idle.get(timeout=min(POLL_INTERVAL, remaining))
+            except queue.Empty:
+                continue
+
+    async def submit(self, function: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """
+        Runs a job in a worker process without blocking the event loop.
+
+        Jobs are waited on by the pool's own threads (one per worker), never by the default
+        executor shared with the rest of the application; jobs waiting for a free worker hold
+        no thread at all. Cancelling the awaiting task kills the job. See `run` for the
+        arguments and errors.
+        """
+        timeout = self.job_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        cancel_event = threading.Event()
+        self._reserve()
+        try:
+            future = self.executor.submit(self._run_reserved, function, args, kwargs, timeout, deadline, cancel_event)
+        except RuntimeError as e:
+            self._unreserve()
+            raise WorkerPoolError("the worker pool is shut down") from e
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            cancel_event.set()
+            if future.cancel():
+                self._unreserve()  # the job never started
+            raise